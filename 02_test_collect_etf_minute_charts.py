@@ -23,7 +23,7 @@ def make_argument_dic(tr_code, code, is_next=False):
     tr_code에 따라 적절한 arg_dic을 만들어서 반환한다.
   '''
 
-  arg_dic = {'틱범위': "1", 'next':2 if is_next else 0}
+  arg_dic = {'틱범위': "1", 'next':2 if is_next else 0, 'priority': TRScheduler.BULK}
   if tr_code == 'opt10080':
     arg_dic.update({'종목코드': code, 'output': "주식분봉차트조회", '수정주가구분': "1"})
   elif tr_code == 'opt20005':
@@ -44,7 +44,6 @@ def main_job(kiwoom, tr_code, code, name, is_daily=False):
 
     if not is_daily:
       while kiwoom.tr_remained:
-        time.sleep(1)
         df = kiwoom.block_TR_request(tr_code,
                                   **make_argument_dic(tr_code, code, is_next=True))
         dfs.append(df)
@@ -70,6 +69,7 @@ if __name__ == "__main__":
   minute_data_provider = MinuteChartDataProvider.Factory(cm, tag='history')
 
   kiwoom = RTKiwoom()
+  kiwoom.configure(cm)
   
   if args.daily:
     kiwoom.get_logger().info(f"Run with daily={args.daily}, daysago={args.daysago}")
@@ -86,5 +86,5 @@ if __name__ == "__main__":
         df = df[df['체결시간'] >= from_dt_str]
         name = f'{name}_{day_str}'
       df.to_csv(f'data/{name}.csv', index=False)
-      num_inserted = minute_data_provider.insert_raw_dataframe_data(df, code)
-      kiwoom.get_logger().info(f'{name} saved (or updated) with #{num_inserted} rows')
+      counts = minute_data_provider.ingest_raw_dataframes({code: df})[code]
+      kiwoom.get_logger().info(f"{name} saved (or updated) with #{counts['inserted']} rows (#{counts['skipped']} already stored)")
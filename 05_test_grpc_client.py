@@ -8,6 +8,7 @@ import grpc_python.prediction_pb2 as prediction_pb2
 import grpc_python.prediction_pb2_grpc as prediction_pb2_grpc
 from realtime_kiwoom.data_provider import *
 from grpc_python.request import RequestBuilder
+from realtime_kiwoom.history_cache import MinuteHistoryCache
 import sys
 
 if __name__ == "__main__":
@@ -22,7 +23,9 @@ if __name__ == "__main__":
         )
 
     history_provider = MinuteChartDataProvider.Factory(cm, tag='history')
-    history_minute_dic = history_provider.get_history_from_ndays_ago(n_days=5)
+    history_cache = MinuteHistoryCache(history_provider, lookback_days=5)
+    history_cache.refresh()
+    history_minute_dic = history_cache.get_history()
     
     # tag_code_dic = {tag:code for code, _, tag in cm.retrieve_candidate_ETFs()}
 
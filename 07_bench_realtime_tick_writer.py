@@ -0,0 +1,56 @@
+from realtime_kiwoom.data_provider import *
+from realtime_kiwoom.kiwoom_type import RealDataDecoder
+import argparse
+import random
+import time
+
+'''
+ 실시간 틱 삽입 벤치마크
+ - insert_by_dataframe: 틱마다 1행 데이터프레임을 to_sql로 삽입 (기존 방식)
+ - insert_by_buffer: 버퍼에 모아 executemany로 일괄 삽입 (BufferedTickWriter)
+'''
+
+def make_fake_real_data(n_ticks, codes=('069500', '114800', '226490'), seed=0):
+  '''
+    주식체결 실시간 데이터를 RealDataDecoder로 디코딩한 것과 같은 가짜 레코드를 만든다.
+  '''
+  rng = random.Random(seed)
+  decoder = RealDataDecoder(["20", "16", "17", "18", "10", "15", "11", "12", "13", "27", "28"])
+  ticks = []
+  sec = 9 * 3600
+  for i in range(n_ticks):
+    sec = min(sec + rng.randint(0, 1), 15 * 3600 + 30 * 60)
+    price = rng.randint(9000, 11000)
+    raw = {
+      '20': f'{sec // 3600:02d}{sec // 60 % 60:02d}{sec % 60:02d}',
+      '16': f'+{price}', '17': f'+{price}', '18': f'-{price}',
+      '10': f'{rng.choice("+-")}{price}',
+      '15': f'{rng.choice("+-")}{rng.randint(1, 500)}',
+      '11': '-5', '12': '-0.05', '13': '1000', '27': f'+{price}', '28': f'-{price}',
+    }
+    ticks.append(decoder.decode('주식체결', rng.choice(codes), lambda code, fid: raw[fid]))
+  return ticks
+
+def run(method_name, ticks, buffer_size):
+  provider = RealTimeTickDataPrivder(None, buffer_size=buffer_size, flush_seconds=1.0)
+  insert = getattr(provider, method_name)
+  ts_start = time.perf_counter()
+  for real_data in ticks:
+    insert(real_data)
+  provider.flush()
+  elapsed = time.perf_counter() - ts_start
+  num_rows = provider.query(f'SELECT count(*) cnt FROM {provider.table_name}').iloc[0]['cnt']
+  assert num_rows == len(ticks)
+  return elapsed
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-n", "--ticks", type=int, nargs='+', help="number of ticks", default=[10000, 100000])
+  parser.add_argument("-b", "--buffer_size", type=int, help="buffer size of BufferedTickWriter", default=4096)
+  args = parser.parse_args()
+
+  for n_ticks in args.ticks:
+    ticks = make_fake_real_data(n_ticks)
+    for method_name in ['insert_by_dataframe', 'insert_by_buffer']:
+      elapsed = run(method_name, ticks, args.buffer_size)
+      print(f'{n_ticks=:>7} {method_name:<20} {elapsed:9.3f}s {n_ticks / elapsed:12.0f} ticks/s {elapsed / n_ticks * 1e6:9.1f} us/tick')
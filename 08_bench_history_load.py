@@ -0,0 +1,100 @@
+from realtime_kiwoom.data_provider import *
+from miscs.time_manager import TimeManager
+import argparse
+import tracemalloc
+import tempfile
+import numpy as np
+
+'''
+ 과거 분봉 로딩 벤치마크 (MinuteChartDataProvider.get_history_from_ndays_ago)
+ - legacy: 포맷 없는 to_datetime + 종목별 df.query (기존 방식)
+ - current: 포맷 지정 to_datetime 한 번 + 종목 경계 슬라이스
+ - snapshot: HistorySnapshotCache (스냅샷 생성 후 메모리 맵 로딩)
+ - --stream: 한 번에 읽기 vs iter_history_range(하루 조각 + lookback) 최대 메모리 비교 (tracemalloc)
+'''
+
+def make_fake_minute_db(provider:MinuteChartDataProvider, n_days, codes, seed=0):
+  '''
+  오늘부터 n_days 전까지 영업일마다 09:00~15:30 1분봉을 종목별로 채운다.
+  '''
+  rng = np.random.default_rng(seed)
+  ts_now = TimeManager.get_now()
+  days = pd.bdate_range(TimeManager.ts_day_shift(ts_now, days=-n_days, floor=True).tz_localize(None), ts_now.normalize().tz_localize(None))
+  minutes = pd.timedelta_range('9h', '15h30m', freq='T')
+  dt = (days.values[:, None] + minutes.values[None, :]).ravel()
+  dt_str = pd.DatetimeIndex(dt).strftime('%Y%m%d%H%M%S')
+  for code in codes:
+    close = 10000 + rng.integers(-20, 21, len(dt)).cumsum()
+    pd.DataFrame({
+      'st_code': code, 'dt': dt_str,
+      'open': close, 'high': close + 5, 'low': close - 5, 'close': close, 'volume': rng.integers(1, 10000, len(dt)),
+    }).to_sql(provider.table_name, provider.engine, if_exists='append', index=False, chunksize=50000)
+
+def legacy_get_history_from_ndays_ago(provider:MinuteChartDataProvider, n_days, codes):
+  from_ts = TimeManager.ts_day_shift(TimeManager.get_now(), days=-n_days, floor=True)
+  df = provider.query(f'''
+  SELECT * FROM {provider.table_name}
+  WHERE dt >= '{TimeManager.ts_to_str(from_ts)}'
+  ORDER BY st_code ASC, dt ASC
+  ''')
+  df['dt'] = pd.to_datetime(df['dt']).dt.tz_localize('Asia/Seoul')
+  return {st_code: df.query(f"st_code=='{st_code}'").set_index('dt') for st_code in codes}
+
+def measure(fn, repeat):
+  elapsed = []
+  for _ in range(repeat):
+    ts_start = time.perf_counter()
+    result = fn()
+    elapsed.append(time.perf_counter() - ts_start)
+  return min(elapsed), result
+
+def measure_peak_memory(fn):
+  '''
+  fn 실행 중 파이썬 할당 최대치 (MiB)
+  '''
+  tracemalloc.start()
+  try:
+    result = fn()
+    return tracemalloc.get_traced_memory()[1] / 2**20, result
+  finally:
+    tracemalloc.stop()
+
+def stream_num_rows(provider:MinuteChartDataProvider, n_days, codes, lookback):
+  ts_from = TimeManager.ts_day_shift(TimeManager.get_now(), days=-n_days, floor=True)
+  return sum(len(chunk.body) for chunk in provider.iter_history_range(ts_from, codes=codes, chunk='day', lookback=lookback))
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-d", "--days", type=int, nargs='+', help="n_days", default=[14, 110, 365])
+  parser.add_argument("-c", "--codes", nargs='+', help="candidate codes", default=['069500', '114800'])
+  parser.add_argument("-e", "--extra_codes", type=int, help="number of non-candidate codes in the table", default=2)
+  parser.add_argument("-r", "--repeat", type=int, help="repeat count (min is reported)", default=3)
+  parser.add_argument("--skip_legacy", action='store_true', help="skip the legacy loader (slow for large n_days)")
+  parser.add_argument("--stream", action='store_true', help="compare peak memory of full load vs iter_history_range")
+  parser.add_argument("--lookback", type=int, help="lookback rows for --stream", default=60)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as work_dir:
+    provider = MinuteChartDataProvider(None, db_path=os.path.join(work_dir, 'bench.db'), table_name='history_minute', drop_table=True)
+    all_codes = args.codes + [f'9{i:05d}' for i in range(args.extra_codes)]
+    make_fake_minute_db(provider, max(args.days), all_codes)
+    for n_days in args.days:
+      provider.snapshot_cache = None
+      elapsed, current = measure(lambda: provider.get_history_from_ndays_ago(n_days=n_days, codes=args.codes), args.repeat)
+      num_rows = sum(len(df) for df in current.values())
+      print(f'{n_days=:>4} {num_rows=:>8} {"current":<8} {elapsed:9.3f}s')
+      provider.snapshot_cache = HistorySnapshotCache(provider, os.path.join(work_dir, 'snapshot'))
+      elapsed, snapshot = measure(lambda: provider.get_history_from_ndays_ago(n_days=n_days, codes=args.codes), args.repeat)
+      assert all(snapshot[code].equals(current[code]) for code in args.codes)
+      print(f'{n_days=:>4} {num_rows=:>8} {"snapshot":<8} {elapsed:9.3f}s')
+      if not args.skip_legacy:
+        elapsed, legacy = measure(lambda: legacy_get_history_from_ndays_ago(provider, n_days, args.codes), args.repeat)
+        assert all(legacy[code].equals(current[code]) for code in args.codes)
+        print(f'{n_days=:>4} {num_rows=:>8} {"legacy":<8} {elapsed:9.3f}s')
+      if args.stream:
+        provider.snapshot_cache = None
+        peak_full, _ = measure_peak_memory(lambda: sum(len(df) for df in provider.get_history_from_ndays_ago(n_days=n_days, codes=args.codes).values()))
+        peak_stream, num_streamed = measure_peak_memory(lambda: stream_num_rows(provider, n_days, args.codes, args.lookback))
+        assert num_streamed == num_rows
+        print(f'{n_days=:>4} {num_rows=:>8} peak MiB full={peak_full:.1f} stream={peak_stream:.1f}')
+    provider.close()
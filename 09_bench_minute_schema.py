@@ -0,0 +1,72 @@
+from realtime_kiwoom.data_provider import *
+from miscs.time_manager import TimeManager
+import argparse
+import shutil
+import tempfile
+import numpy as np
+
+'''
+ 분봉 스키마 v1 vs v2 벤치마크
+ - v1: st_code TEXT, dt TEXT + (st_code, dt) 보조 인덱스 (rowid 테이블)
+ - v2: st_id INTEGER, dt INTEGER(epoch 분), PRIMARY KEY(st_id, dt) WITHOUT ROWID
+ 같은 데이터를 v1으로 만든 뒤 복사본을 migrate_schema('v2')로 변환하여 로딩 시간과 파일 크기를 비교한다.
+'''
+
+def make_fake_v1_db(provider:MinuteChartDataProvider, n_days, codes, seed=0):
+  '''
+  오늘부터 n_days 전까지 영업일마다 09:00~15:30 1분봉을 종목별로 채운다.
+  '''
+  rng = np.random.default_rng(seed)
+  ts_now = TimeManager.get_now()
+  days = pd.bdate_range(TimeManager.ts_day_shift(ts_now, days=-n_days, floor=True).tz_localize(None), ts_now.normalize().tz_localize(None))
+  minutes = pd.timedelta_range('9h', '15h30m', freq='T')
+  dt = (days.values[:, None] + minutes.values[None, :]).ravel()
+  dt_str = pd.DatetimeIndex(dt).strftime('%Y%m%d%H%M%S')
+  for code in codes:
+    close = 10000 + rng.integers(-20, 21, len(dt)).cumsum()
+    provider.insert_minute_dataframe(pd.DataFrame({
+      'dt': dt_str, 'open': close, 'high': close + 5, 'low': close - 5, 'close': close, 'volume': rng.integers(1, 10000, len(dt)), 'st_code': code,
+    }))
+
+def measure(fn, repeat):
+  elapsed = []
+  for _ in range(repeat):
+    ts_start = time.perf_counter()
+    result = fn()
+    elapsed.append(time.perf_counter() - ts_start)
+  return min(elapsed), result
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-d", "--days", type=int, nargs='+', help="n_days", default=[14, 365])
+  parser.add_argument("-c", "--codes", nargs='+', help="candidate codes", default=['069500', '114800'])
+  parser.add_argument("-e", "--extra_codes", type=int, help="number of non-candidate codes in the table", default=2)
+  parser.add_argument("-r", "--repeat", type=int, help="repeat count (min is reported)", default=3)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as work_dir:
+    db_paths = {version: os.path.join(work_dir, f'bench_{version}.db') for version in ['v1', 'v2']}
+    provider = MinuteChartDataProvider(None, db_path=db_paths['v1'], table_name='history_minute', drop_table=True, schema_version='v1')
+    make_fake_v1_db(provider, max(args.days), args.codes + [f'9{i:05d}' for i in range(args.extra_codes)])
+    provider.close()
+    shutil.copyfile(db_paths['v1'], db_paths['v2'])
+
+    providers = {}
+    for version, db_path in db_paths.items():
+      providers[version] = MinuteChartDataProvider(None, db_path=db_path, table_name='history_minute', drop_table=False)
+      if version == 'v2':
+        ts_start = time.perf_counter()
+        num_before, num_after = providers[version].migrate_schema('v2')
+        print(f'migrate v1 -> v2: rows {num_before} -> {num_after}, {time.perf_counter() - ts_start:.2f}s')
+      providers[version].close()
+      print(f'{version}: {os.path.getsize(db_path) / 2**20:8.2f} MiB')
+
+    for n_days in args.days:
+      loaded = {}
+      for version, provider in providers.items():
+        elapsed, loaded[version] = measure(lambda: provider.get_history_from_ndays_ago(n_days=n_days, codes=args.codes), args.repeat)
+        num_rows = sum(len(df) for df in loaded[version].values())
+        print(f'{n_days=:>4} {num_rows=:>8} {version} {elapsed:9.3f}s')
+      assert all(loaded['v1'][code].equals(loaded['v2'][code]) for code in args.codes)
+    for provider in providers.values():
+      provider.close()
@@ -0,0 +1,266 @@
+from realtime_kiwoom.data_provider import *
+import argparse
+import importlib.util
+import sqlite3
+import tempfile
+
+'''
+ 저장소 백엔드 공통 적합성 테스트 (sqlite v1/v2, duckdb, numpy)
+ MinuteChartDataProvider / RealTimeTickDataPrivder를 백엔드만 바꿔서 같은 시나리오를 돌리고,
+ pandas로 직접 계산한 기대값과 비교한다. (duckdb 패키지가 없으면 건너뜀)
+'''
+
+backend_variants = {
+  'sqlite-v1': ('sqlite', 'v1'),
+  'sqlite-v2': ('sqlite', 'v2'),
+  'duckdb': ('duckdb', None),
+  'numpy': ('numpy', None),
+}
+
+def minute_rows(code, day, hhmm_list, base):
+  return pd.DataFrame({
+    'st_code': code,
+    'dt': [f'{day}{hhmm}00' for hhmm in hhmm_list],
+    'open': [base + i for i in range(len(hhmm_list))],
+    'high': [base + i + 5 for i in range(len(hhmm_list))],
+    'low': [base + i - 5 for i in range(len(hhmm_list))],
+    'close': [base + i + 1 for i in range(len(hhmm_list))],
+    'volume': [10 * (i + 1) for i in range(len(hhmm_list))],
+  })
+
+def expected_history(frames, codes, ts_from, ts_end=None):
+  '''
+  기대값: 먼저 들어간 (종목, 시간)만 남기고 [ts_from, ts_end) 구간 (분 단위 내림)
+  '''
+  df = pd.concat(frames, ignore_index=True).drop_duplicates(['st_code', 'dt'], keep='first')
+  df['dt'] = pd.to_datetime(df['dt'], format='%Y%m%d%H%M%S').dt.tz_localize('Asia/Seoul')
+  ts_from = TimeManager.ts_floor_time(ts_from, freq='T')
+  ts_end = TimeManager.ts_floor_time(ts_end, freq='T') if ts_end is not None else None
+  df = df[(df['dt'] >= ts_from) & ((df['dt'] < ts_end) if ts_end is not None else True)].sort_values(['st_code', 'dt'])
+  history = {}
+  for code in codes:
+    code_df = df[df['st_code'] == code].set_index('dt')[['st_code', 'open', 'high', 'low', 'close', 'volume']]
+    code_df[['open', 'high', 'low', 'close', 'volume']] = code_df[['open', 'high', 'low', 'close', 'volume']].astype('int64')
+    history[code] = code_df
+  return history
+
+def assert_history_equal(actual, expected):
+  assert list(actual) == list(expected), (list(actual), list(expected))
+  for code in expected:
+    a, e = actual[code], expected[code]
+    assert list(a.columns) == list(e.columns), (code, list(a.columns))
+    assert list(a.index) == list(e.index), (code, len(a), len(e))
+    assert (a[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='int64') == e[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='int64')).all(), code
+    assert (a['st_code'] == code).all(), code
+
+def test_minutes(backend, schema_version, work_dir):
+  db_path = os.path.join(work_dir, f'minute.{backend}') if backend != 'numpy' else ':memory:'
+  provider = MinuteChartDataProvider(None, db_path, 'history_minute', drop_table=True, schema_version=schema_version or 'v1', backend=backend)
+  day1, day2 = '20221014', '20221017'
+  first = pd.concat((
+    minute_rows('069500', day1, ['0900', '0901', '0902', '1530'], 10000),
+    minute_rows('114800', day1, ['0900', '0901'], 5000),
+  ), ignore_index=True)
+  counts = provider.ingest_minute_dataframe(first)
+  assert counts == {'069500': {'inserted': 4, 'skipped': 0}, '114800': {'inserted': 2, 'skipped': 0}}, counts
+
+  # 겹치는 구간 + 배치 안의 중복 (먼저 나온 행만) + 앞쪽 백필 (정렬되지 않은 배치)
+  second = pd.concat((
+    minute_rows('069500', day2, ['0901', '0900'], 20000),
+    minute_rows('069500', day1, ['0902', '0903'], 30000),
+    minute_rows('069500', day2, ['0901'], 40000),
+    minute_rows('069500', '20221013', ['1500'], 50000),
+  ), ignore_index=True)
+  counts = provider.ingest_minute_dataframe(second)
+  assert counts == {'069500': {'inserted': 4, 'skipped': 2}}, counts
+  assert provider.ingest_minute_dataframe(first.iloc[:0]) == {}
+
+  codes = ['069500', '114800', '226490']
+  frames = [first, second]
+  for ts_from, ts_end in [
+    (TimeManager.str_to_ts('19700101000000'), None),
+    (TimeManager.str_to_ts('20221014090100'), TimeManager.str_to_ts('20221017090100')),
+    (TimeManager.str_to_ts('20221014090130'), TimeManager.str_to_ts('20221014153000')), # 분 단위 내림
+  ]:
+    assert_history_equal(provider.read_history_range(ts_from, ts_end, codes=codes), expected_history(frames, codes, ts_from, ts_end))
+  assert_history_equal(provider.read_history_range(TimeManager.str_to_ts('19700101000000'), codes=[]), {})
+
+  assert provider.get_ts_last_inserted('069500') == TimeManager.str_to_ts('20221017090100')
+  assert provider.get_ts_last_inserted('226490') == TimeManager.str_to_ts('19700101000000')
+  stats = provider.get_code_stats(codes)
+  assert stats == {'069500': ('20221013150000', '20221017090100'), '114800': ('20221014090000', '20221014090100')}, stats
+  provider.close()
+
+def test_legacy_v1_duplicates(work_dir):
+  # 예전 v1 테이블 (비유일 인덱스 + 중복 행): 열기만 해서는 지우지 않고, 마이그레이션에서 먼저 들어간 행만 남긴다.
+  db_path = os.path.join(work_dir, 'legacy.sqlite')
+  legacy = minute_rows('069500', '20221014', ['0900', '0901', '0900', '0902'], 10000)
+  connection = sqlite3.connect(db_path)
+  connection.execute(QueryBaseStrings.table_create_query.format(TABLE_NAME='history_minute'))
+  connection.execute('CREATE INDEX idx_history_minute ON history_minute (st_code, dt)')
+  connection.executemany('INSERT INTO history_minute VALUES (?, ?, ?, ?, ?, ?, ?)', legacy.values.tolist())
+  connection.commit()
+  connection.close()
+
+  provider = MinuteChartDataProvider(None, db_path, 'history_minute', drop_table=False)
+  ts_all = TimeManager.str_to_ts('19700101000000')
+  assert len(provider.read_history_range(ts_all, codes=['069500'])['069500']) == 4
+  try:
+    provider.ingest_minute_dataframe(minute_rows('069500', '20221014', ['0903'], 20000))
+    assert False, 'ingest into a table with duplicated keys'
+  except AssertionError as e:
+    assert 'run_migrate_minute_schema' in str(e), e
+  assert provider.migrate_schema('v1', vacuum=False) == (4, 3)
+  assert_history_equal(provider.read_history_range(ts_all, codes=['069500']), expected_history([legacy], ['069500'], ts_all))
+  assert provider.ingest_minute_dataframe(minute_rows('069500', '20221014', ['0900', '0903'], 20000)) == {'069500': {'inserted': 1, 'skipped': 1}}
+  provider.close()
+
+  # 중복이 없는 예전 테이블은 열 때 유일 인덱스로 바꾼다.
+  reopened = MinuteChartDataProvider(None, db_path, 'history_minute', drop_table=False)
+  indexes = [row[0] for row in reopened.backend.connections.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='history_minute'")]
+  assert indexes == ['uidx_history_minute'], indexes
+  reopened.close()
+
+def test_snapshot(backend, schema_version, work_dir):
+  db_path = os.path.join(work_dir, f'snapshot.{backend}') if backend != 'numpy' else ':memory:'
+  provider = MinuteChartDataProvider(None, db_path, 'history_minute', drop_table=True, schema_version=schema_version or 'v1', backend=backend)
+  provider.snapshot_cache = HistorySnapshotCache(provider, os.path.join(work_dir, f'snapshot_{backend}'))
+  day = '20221014'
+  codes = ['069500', '114800']
+  ts_all = TimeManager.str_to_ts('19700101000000')
+  frames = []
+  for frame in [
+    pd.concat((minute_rows('069500', day, ['0900', '0905'], 10000), minute_rows('114800', day, ['0900'], 5000)), ignore_index=True),
+    minute_rows('069500', day, ['0901', '0902', '0903'], 20000), # 중간의 빈 구간만 채움 (스냅샷 키는 그대로)
+    pd.concat((minute_rows('069500', day, ['0904', '0906'], 30000), minute_rows('114800', day, ['0901'], 6000)), ignore_index=True), # 빈 구간 + 뒤쪽
+    minute_rows('069500', day, ['0905', '0907'], 40000), # 이미 있는 분 + 뒤쪽만 새 행 (이어 붙이기)
+  ]:
+    frames.append(frame)
+    provider.ingest_minute_dataframe(frame)
+    assert_history_equal(provider.get_history_range(ts_all, codes=codes), expected_history(frames, codes, ts_all))
+  assert len(provider.get_history_range(ts_all, codes=codes)['069500']) == 8
+  # 스냅샷 이후에 쌓인 행 (아직 읽지 않음)과 겹치는 배치가 중간을 채운 경우: 행 수로 확인
+  frames.append(minute_rows('226490', day, ['0900', '0905'], 7000))
+  provider.ingest_minute_dataframe(frames[-1])
+  provider.get_history_range(ts_all, codes=['226490'])
+  for frame in [minute_rows('226490', day, ['0906'], 8000), minute_rows('226490', day, ['0902', '0906'], 9000)]:
+    frames.append(frame)
+    provider.ingest_minute_dataframe(frame)
+  assert_history_equal(provider.get_history_range(ts_all, codes=['226490']), expected_history(frames, ['226490'], ts_all))
+  provider.close()
+
+def expected_rollup(frames, code, resolution):
+  '''
+  기대값: 먼저 들어간 분봉만 남기고 pandas groupby로 버킷 집계 (분 버킷은 09:00 기준, 일봉은 00:00)
+  '''
+  df = expected_history(frames, [code], TimeManager.str_to_ts('19700101000000'))[code]
+  minutes = {'5m': 5, '15m': 15, '60m': 60, '1d': None}[resolution]
+  day = df.index.normalize()
+  key = day if minutes is None else day + pd.to_timedelta(9 * 60 + ((df.index.hour * 60 + df.index.minute - 9 * 60) // minutes) * minutes, unit='m')
+  return df.groupby(key).agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+
+def test_rollups(backend, schema_version, work_dir):
+  db_path = os.path.join(work_dir, f'rollup.{backend}') if backend != 'numpy' else ':memory:'
+  provider = MinuteChartDataProvider(None, db_path, 'history_minute', drop_table=True, schema_version=schema_version or 'v1', backend=backend, rollups=['5m', '15m', '60m', '1d'])
+  day0, day1, day2 = '20221013', '20221014', '20221017'
+  frames = [
+    pd.concat((minute_rows('069500', day1, ['0900', '0901', '0904', '0905', '0959', '1000', '1530'], 10000), minute_rows('114800', day1, ['0900'], 5000)), ignore_index=True),
+    minute_rows('069500', day2, ['0902', '0901'], 20000),
+    # 이미 집계된 버킷에 늦게 들어온 분 + 이미 있는 분(건너뜀) + 앞쪽 날짜 백필
+    pd.concat((minute_rows('069500', day1, ['0902', '0900'], 30000), minute_rows('069500', day0, ['1500', '1514', '1515'], 40000)), ignore_index=True),
+  ]
+  for frame in frames:
+    provider.ingest_minute_dataframe(frame)
+  ts_all = TimeManager.str_to_ts('19700101000000')
+  for res in ['5m', '15m', '60m', '1d']:
+    rollups = provider.read_rollup(res, ts_all, codes=['069500', '114800', '226490'])
+    assert len(rollups['226490']) == 0
+    for code in ['069500', '114800']:
+      actual, expected = rollups[code], expected_rollup(frames, code, res)
+      assert list(actual.index) == list(expected.index), (backend, res, code, list(actual.index))
+      assert (actual[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='int64') == expected.to_numpy(dtype='int64')).all(), (backend, res, code)
+  daily = expected_rollup(frames, '069500', '1d')
+  assert provider.get_prev_close('069500', TimeManager.str_to_ts(f'{day2}090500')) == daily['close'].iloc[1]
+  assert provider.get_prev_close('069500', TimeManager.str_to_ts(f'{day0}090500')) is None
+  prev_closes = provider.get_daily_prev_closes(TimeManager.str_to_ts(f'{day1}000000'), codes=['069500'])['069500']
+  assert list(prev_closes.values) == list(daily['close'].shift(1).values[1:]), prev_closes
+  # 롤업을 나중에 켠 경우: 전체 다시 집계
+  provider.backend.create_rollup_tables(provider.table_name, provider.rollups, drop=True)
+  provider.rebuild_rollups(['069500', '114800'])
+  assert provider.read_rollup('15m', ts_all, codes=['069500'])['069500'][['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='int64').tolist() == expected_rollup(frames, '069500', '15m').to_numpy(dtype='int64').tolist()
+  provider.close()
+
+def expected_minute_chart(ticks, yyyymmdd, from_hhmmss, end_hhmmss):
+  df = pd.DataFrame(ticks, columns=['st_code', 'dt', 'open', 'high', 'low', 'close', 'volume'])
+  df['arrival'] = np.arange(len(df))
+  df = df[(df['dt'] >= from_hhmmss) & (df['dt'] < end_hhmmss)].sort_values(['st_code', 'dt', 'arrival'])
+  df['minute'] = df['dt'].str[:4]
+  grouped = df.groupby(['st_code', 'minute'], sort=True)
+  return pd.DataFrame({
+    'open': grouped['close'].first(), 'high': grouped['close'].max(), 'low': grouped['close'].min(),
+    'close': grouped['close'].last(), 'volume': grouped['volume'].sum(),
+  }).reset_index().assign(dt=lambda x: yyyymmdd + x['minute'] + '00')[['st_code', 'dt', 'open', 'high', 'low', 'close', 'volume']]
+
+def test_ticks(backend):
+  provider = RealTimeTickDataPrivder(None, buffer_size=4, flush_seconds=3600, backend=backend)
+  rng = np.random.default_rng(0)
+  ticks = []
+  for i in range(200):
+    sec = 9 * 3600 + i // 2
+    if i % 17 == 0:
+      sec -= 70 # 늦게 도착한 틱
+    hhmmss = f'{sec // 3600:02d}{sec // 60 % 60:02d}{sec % 60:02d}'
+    close = int(rng.integers(9000, 11000))
+    ticks.append((['069500', '114800'][i % 3 == 0], hhmmss, close, close, close, close, int(rng.integers(1, 100))))
+  for row in ticks:
+    provider.tick_writer.append(row)
+  assert len(provider.retrieve_all()) == len(ticks)
+  assert TimeManager.ts_to_str(provider.recent_inserted_ts(), '%H%M%S') == max(row[1] for row in ticks)
+
+  yyyymmdd = TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d')
+  for from_hhmmss, end_hhmmss, ts_from, ts_end in [
+    ('090000', '153001', None, None),
+    ('090100', '090200', TimeManager.hhmmss_to_ts('090130'), TimeManager.hhmmss_to_ts('090200')),
+  ]:
+    actual = provider.make_minute_chart_df(ts_from, ts_end).reset_index(drop=True)
+    expected = expected_minute_chart(ticks, yyyymmdd, from_hhmmss, end_hhmmss).reset_index(drop=True)
+    assert list(actual['st_code']) == list(expected['st_code']) and list(actual['dt']) == list(expected['dt']), backend
+    assert (actual[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='int64') == expected[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='int64')).all(), backend
+  provider.close()
+
+def test_abstract_methods():
+  # 빠진 메소드가 있는 백엔드/프로바이더는 생성할 때 실패한다.
+  class PartialBackend(StorageBackend):
+    name = 'partial'
+    def create_tick_table(self, table, drop=False):
+      pass
+  try:
+    PartialBackend()
+    assert False, 'PartialBackend must not be instantiable'
+  except TypeError:
+    pass
+  try:
+    DataProviderBase(None, ':memory:', 'partial', backend='numpy')
+    assert False, 'DataProviderBase must not be instantiable'
+  except TypeError:
+    pass
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-b", "--backends", nargs='+', help="backend variants", choices=list(backend_variants), default=list(backend_variants))
+  args = parser.parse_args()
+
+  test_abstract_methods()
+  for variant in args.backends:
+    backend, schema_version = backend_variants[variant]
+    if backend == 'duckdb' and importlib.util.find_spec('duckdb') is None:
+      print(f'{variant:<10} skipped (duckdb is not installed)')
+      continue
+    with tempfile.TemporaryDirectory() as work_dir:
+      if variant == 'sqlite-v1':
+        test_legacy_v1_duplicates(work_dir)
+      test_minutes(backend, schema_version, work_dir)
+      test_snapshot(backend, schema_version, work_dir)
+      test_rollups(backend, schema_version, work_dir)
+      test_ticks(backend)
+    print(f'{variant:<10} ok')
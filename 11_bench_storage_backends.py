@@ -0,0 +1,120 @@
+from realtime_kiwoom.data_provider import *
+import argparse
+import importlib.util
+import tempfile
+
+'''
+ 저장소 백엔드 처리량 벤치마크 (sqlite v1/v2, duckdb, numpy)
+ - ingest: 가짜 분봉 (영업일 09:00~15:30, 종목 수 x 일 수)을 한 번에 삽입 (rows/s)
+ - reingest: 같은 데이터를 다시 삽입 (모두 건너뜀)
+ - read: 후보 종목의 최근 n일 구간 읽기
+ - last_ts: 종목별 마지막 시간 조회 (호출당 us)
+ - rollup: 롤업 전체 집계 / 일별 직전 종가 (일봉 롤업 읽기 vs 분봉 읽기 + groupby) / 직전 종가 한 건 (us)
+ - ticks: 틱 일괄 삽입 (rows/s) + 1분봉 집계
+'''
+
+backend_variants = {
+  'sqlite-v1': ('sqlite', 'v1'),
+  'sqlite-v2': ('sqlite', 'v2'),
+  'duckdb': ('duckdb', None),
+  'numpy': ('numpy', None),
+}
+
+def make_fake_minutes(n_days, codes, seed=0):
+  rng = np.random.default_rng(seed)
+  ts_now = TimeManager.get_now()
+  days = pd.bdate_range(TimeManager.ts_day_shift(ts_now, days=-n_days, floor=True).tz_localize(None), ts_now.normalize().tz_localize(None))
+  minutes = pd.timedelta_range('9h', '15h30m', freq='T')
+  dt_str = pd.DatetimeIndex((days.values[:, None] + minutes.values[None, :]).ravel()).strftime('%Y%m%d%H%M%S')
+  frames = []
+  for code in codes:
+    close = 10000 + rng.integers(-20, 21, len(dt_str)).cumsum()
+    frames.append(pd.DataFrame({
+      'st_code': code, 'dt': dt_str,
+      'open': close, 'high': close + 5, 'low': close - 5, 'close': close, 'volume': rng.integers(1, 10000, len(dt_str)),
+    }))
+  return pd.concat(frames, ignore_index=True)
+
+def make_fake_ticks(n_ticks, codes, seed=0):
+  rng = np.random.default_rng(seed)
+  sec = 9 * 3600 + np.minimum(np.cumsum(rng.integers(0, 2, n_ticks)), 6 * 3600 + 30 * 60)
+  close = rng.integers(9000, 11000, n_ticks)
+  volume = rng.integers(1, 500, n_ticks)
+  code = rng.integers(0, len(codes), n_ticks)
+  return [(codes[c], f'{s // 3600:02d}{s // 60 % 60:02d}{s % 60:02d}', p, p, p, p, v) for c, s, p, v in zip(code.tolist(), sec.tolist(), close.tolist(), volume.tolist())]
+
+def measure(fn, repeat=1):
+  elapsed = []
+  for _ in range(repeat):
+    ts_start = time.perf_counter()
+    result = fn()
+    elapsed.append(time.perf_counter() - ts_start)
+  return min(elapsed), result
+
+def run(variant, args, minutes, ticks, work_dir):
+  backend, schema_version = backend_variants[variant]
+  db_path = os.path.join(work_dir, f'bench.{variant}') if backend != 'numpy' else ':memory:'
+  provider = MinuteChartDataProvider(None, db_path, 'history_minute', drop_table=True, schema_version=schema_version or 'v1', backend=backend)
+  results = {}
+  elapsed, _ = measure(lambda: provider.ingest_minute_dataframe(minutes))
+  results['ingest rows/s'] = len(minutes) / elapsed
+  elapsed, _ = measure(lambda: provider.ingest_minute_dataframe(minutes))
+  results['reingest rows/s'] = len(minutes) / elapsed
+  for n_days in args.read_days:
+    ts_from = TimeManager.ts_day_shift(TimeManager.get_now(), days=-n_days, floor=True)
+    elapsed, history = measure(lambda: provider.read_history_range(ts_from, codes=args.codes), args.repeat)
+    results[f'read {n_days}d ms'] = elapsed * 1e3
+  elapsed, _ = measure(lambda: [provider.get_ts_last_inserted(code) for _ in range(100) for code in args.codes], args.repeat)
+  results['last_ts us'] = elapsed / (100 * len(args.codes)) * 1e6
+
+  provider.rollups = ['5m', '15m', '60m', '1d']
+  provider.backend.create_rollup_tables(provider.table_name, provider.rollups, drop=True)
+  elapsed, _ = measure(lambda: provider.rebuild_rollups(args.codes))
+  results['rollup build ms'] = elapsed * 1e3
+  ts_from = TimeManager.ts_day_shift(TimeManager.get_now(), days=-max(args.read_days), floor=True)
+  elapsed, _ = measure(lambda: provider.get_daily_prev_closes(ts_from, codes=args.codes), args.repeat)
+  results['prev_closes ms'] = elapsed * 1e3
+  def groupby_prev_closes():
+    history = provider.read_history_range(TimeManager.ts_day_shift(ts_from, days=-7), codes=args.codes)
+    return {code: df.groupby(df.index.strftime('%Y-%m-%d')).close.last().shift(1) for code, df in history.items()}
+  elapsed, _ = measure(groupby_prev_closes, args.repeat)
+  results['groupby prev_closes ms'] = elapsed * 1e3
+  elapsed, _ = measure(lambda: [provider.get_prev_close(code, TimeManager.get_now()) for _ in range(100) for code in args.codes], args.repeat)
+  results['prev_close us'] = elapsed / (100 * len(args.codes)) * 1e6
+  provider.close()
+
+  tick_provider = RealTimeTickDataPrivder(None, buffer_size=args.buffer_size, flush_seconds=3600, backend=backend)
+  def append_ticks():
+    for row in ticks:
+      tick_provider.tick_writer.append(row)
+    tick_provider.flush()
+  elapsed, _ = measure(append_ticks)
+  results['ticks rows/s'] = len(ticks) / elapsed
+  elapsed, _ = measure(lambda: tick_provider.make_minute_chart_df(), args.repeat)
+  results['tick->1m ms'] = elapsed * 1e3
+  tick_provider.close()
+  return results
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-b", "--backends", nargs='+', help="backend variants", choices=list(backend_variants), default=list(backend_variants))
+  parser.add_argument("-d", "--days", type=int, help="n_days of fake minute bars", default=365)
+  parser.add_argument("--read_days", type=int, nargs='+', help="n_days to read", default=[14, 365])
+  parser.add_argument("-c", "--codes", nargs='+', help="candidate codes", default=['069500', '114800'])
+  parser.add_argument("-e", "--extra_codes", type=int, help="number of non-candidate codes in the table", default=2)
+  parser.add_argument("-t", "--ticks", type=int, help="number of ticks", default=200000)
+  parser.add_argument("--buffer_size", type=int, help="buffer size of BufferedTickWriter", default=4096)
+  parser.add_argument("-r", "--repeat", type=int, help="repeat count (min is reported)", default=3)
+  args = parser.parse_args()
+
+  minutes = make_fake_minutes(args.days, args.codes + [f'9{i:05d}' for i in range(args.extra_codes)])
+  ticks = make_fake_ticks(args.ticks, args.codes)
+  print(f'minute rows={len(minutes)} ticks={len(ticks)}')
+  table = {}
+  with tempfile.TemporaryDirectory() as work_dir:
+    for variant in args.backends:
+      if backend_variants[variant][0] == 'duckdb' and importlib.util.find_spec('duckdb') is None:
+        print(f'{variant} skipped (duckdb is not installed)')
+        continue
+      table[variant] = run(variant, args, minutes, ticks, work_dir)
+  print(pd.DataFrame(table).round(1).to_string())
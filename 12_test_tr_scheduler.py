@@ -0,0 +1,93 @@
+from realtime_kiwoom.tr_scheduler import TRScheduler
+import argparse
+import threading
+import time
+
+'''
+ TR 스케줄러 점검 (키움 연결 없이, 실제 시간으로)
+ - 한도: 어떤 1초 구간에서도 per_second 회를 넘지 않고, 그 한도에 맞춰 바로 보낸다. (고정 time.sleep(1) 대비 처리량)
+ - 우선순위 (여러 스레드가 동시에 기다리는 경우만): 대량 수집 스레드들이 한도를 채우고 있을 때 복구/계좌 조회 스레드의 대기 시간
+   한 스레드 (Qt 스레드)에서는 우선순위와 관계없이 호출 순서대로 나간다.
+ - 예약분: BULK는 시간당 버킷의 bulk_reserve 개를 쓰지 않는다.
+'''
+
+def max_in_window(timestamps, period=1.0):
+  timestamps = sorted(timestamps)
+  j = 0
+  worst = 0
+  for i, ts in enumerate(timestamps):
+    while timestamps[j] <= ts - period:
+      j += 1
+    worst = max(worst, i - j + 1)
+  return worst
+
+def test_rate(per_second, num_requests):
+  scheduler = TRScheduler(per_second=per_second, per_hour=100_000, per_hour_burst=50_000, bulk_reserve=0)
+  timestamps = []
+  ts_start = time.monotonic()
+  for _ in range(num_requests):
+    scheduler.acquire(TRScheduler.BULK)
+    timestamps.append(time.monotonic())
+  elapsed = time.monotonic() - ts_start
+  worst = max_in_window(timestamps)
+  assert worst <= per_second, worst
+  print(f'rate: {num_requests} requests in {elapsed:.2f}s (fixed 1s sleep: {num_requests - 1}s), max {worst} per any 1s window (limit {per_second})')
+  print(scheduler.format_summary())
+
+def test_priority(per_second, seconds):
+  scheduler = TRScheduler(per_second=per_second, per_hour=100_000, per_hour_burst=50_000, bulk_reserve=0)
+  stop = threading.Event()
+  def loop(priority, interval):
+    while not stop.is_set():
+      scheduler.acquire(priority)
+      if interval:
+        time.sleep(interval)
+  workers = [threading.Thread(target=loop, args=(TRScheduler.BULK, 0)) for _ in range(3)]
+  workers += [threading.Thread(target=loop, args=(TRScheduler.ACCOUNT, 0.5)), threading.Thread(target=loop, args=(TRScheduler.RECOVERY, 0.7))]
+  for worker in workers:
+    worker.start()
+  time.sleep(seconds)
+  stop.set()
+  for worker in workers:
+    worker.join()
+  summary = scheduler.summary()
+  print('priority (threads):')
+  print(scheduler.format_summary())
+  # 다른 스레드와 동시에 기다릴 때, 높은 우선순위는 서로 겹칠 때를 빼면 다음 토큰 하나만 기다린다.
+  interval_ms = 1000 / (per_second - 1)
+  assert summary['recovery']['max'] < 3 * interval_ms + 50, summary['recovery']
+  assert summary['account']['max'] < 3 * interval_ms + 50, summary['account']
+  assert summary['bulk']['mean'] > summary['account']['mean']
+
+def test_single_thread(per_second):
+  # 한 스레드에서는 기다리는 요청이 하나뿐이므로 우선순위가 순서를 바꾸지 않는다.
+  scheduler = TRScheduler(per_second=per_second, per_hour=100_000, per_hour_burst=50_000, bulk_reserve=0)
+  for _ in range(3):
+    scheduler.acquire(TRScheduler.BULK)
+  wait = scheduler.acquire(TRScheduler.RECOVERY)
+  interval = 1 / (per_second - 1)
+  assert 0.5 * interval < wait < 1.5 * interval, wait
+  print(f'single thread: recovery after bulk still waited {wait * 1000:.0f}ms (one refill interval, served in call order)')
+
+def test_reserve():
+  scheduler = TRScheduler(per_second=1000, per_second_burst=100, per_hour=1000, per_hour_burst=30, bulk_reserve=20)
+  num_bulk = 0
+  while scheduler.acquire(TRScheduler.BULK) < 0.1:
+    num_bulk += 1
+  # 예약분은 BULK 외의 요청이 바로 쓸 수 있다.
+  waits = [scheduler.acquire(TRScheduler.ACCOUNT) for _ in range(15)]
+  assert num_bulk == 10 and max(waits) < 0.1, (num_bulk, waits)
+  print(f'reserve: bulk stopped after {num_bulk} of 30 burst tokens, 15 account requests served from the reserve (max wait {max(waits) * 1000:.1f}ms)')
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-r", "--per_second", type=int, help="per-second limit", default=5)
+  parser.add_argument("-n", "--num_requests", type=int, help="number of requests for the rate test", default=20)
+  parser.add_argument("-s", "--seconds", type=float, help="duration of the priority test", default=5)
+  args = parser.parse_args()
+
+  test_rate(args.per_second, args.num_requests)
+  test_priority(args.per_second, args.seconds)
+  test_single_thread(args.per_second)
+  test_reserve()
+  print('ok')
@@ -0,0 +1,75 @@
+from realtime_kiwoom.tr_schema import TRSchema, TRSchemaRegistry
+from pykiwoom import parser
+import argparse
+import os
+import tempfile
+import time
+import zipfile
+
+'''
+ TR 레이아웃 레지스트리 확인 + 벤치마크
+ - 요청마다 read_enc + parse_dat 하던 비용과, 레지스트리 (처음 파싱 / 캐시 파일에서 기동 / 메모리 조회) 비교
+ - 캐시 결과가 parse_dat과 같은지, .enc 수정 시간이 바뀌면 다시 파싱하는지 확인
+ - --enc_dir을 주지 않으면 opt10080 모양의 합성 .enc로 돈다. (실제 파일: --enc_dir C:/OpenAPI/data)
+'''
+
+def write_synthetic_enc(enc_dir, trcode, num_items=7):
+  lines = ['[TRINFO]', f'TRName={trcode}', '[INPUT]', f'@START_{trcode}=', ' 종목코드 = 000, 6, 0, A, 0', ' 틱범위 = 000, 2, 0, A, 0', ' 수정주가구분 = 000, 1, 0, A, 0', f'@END_{trcode}']
+  lines += ['[OUTPUT]', '@START_주식분봉차트=*,*,*', ' 종목코드 = 000, 20, 0, A, 0', '@END_주식분봉차트']
+  lines += ['[OUTPUT]', '@START_주식분봉차트조회=*,*,*'] + [f' 항목{i} = 000, 20, 0, A, 0' for i in range(num_items)] + ['@END_주식분봉차트조회']
+  with zipfile.ZipFile(os.path.join(enc_dir, f'{trcode}.enc'), 'w') as enc:
+    enc.writestr(trcode.upper() + '.dat', '\n'.join(lines).encode('cp949'))
+
+def per_call_ms(func, repeat):
+  ts_start = time.perf_counter()
+  for _ in range(repeat):
+    func()
+  return (time.perf_counter() - ts_start) / repeat * 1e3
+
+if __name__ == "__main__":
+  parser_ = argparse.ArgumentParser()
+  parser_.add_argument("-e", "--enc_dir", help="folder of .enc files", default=None)
+  parser_.add_argument("-t", "--trcodes", nargs='+', help="tr codes", default=['opt10080'])
+  parser_.add_argument("-r", "--repeat", type=int, help="repeat count", default=200)
+  args = parser_.parse_args()
+
+  with tempfile.TemporaryDirectory() as work_dir:
+    enc_dir = args.enc_dir
+    if enc_dir is None:
+      enc_dir = work_dir
+      for trcode in args.trcodes:
+        write_synthetic_enc(enc_dir, trcode)
+    cache_path = os.path.join(work_dir, 'tr_schema.json')
+
+    for trcode in args.trcodes:
+      reader = TRSchemaRegistry(enc_dir=enc_dir)
+      parse_ms = per_call_ms(lambda: reader.read_tr_items(trcode), args.repeat)
+
+      registry = TRSchemaRegistry(cache_path, enc_dir)
+      ts_start = time.perf_counter()
+      schema = registry.get(trcode)
+      cold_ms = (time.perf_counter() - ts_start) * 1e3
+      expected = TRSchema.from_tr_items(reader.read_tr_items(trcode))
+      assert schema.input_ids == expected.input_ids and schema.outputs == expected.outputs
+      assert registry.num_parsed == 1
+
+      # 새 프로세스처럼: 캐시 파일에서 읽고 파싱하지 않는다.
+      restarted = TRSchemaRegistry(cache_path, enc_dir)
+      ts_start = time.perf_counter()
+      cached = restarted.get(trcode)
+      restart_ms = (time.perf_counter() - ts_start) * 1e3
+      assert restarted.num_parsed == 0 and cached.outputs == expected.outputs and cached.input_ids == expected.input_ids
+
+      record = expected.outputs[-1][0]
+      lookup_ms = per_call_ms(lambda: restarted.get(trcode).output(record), args.repeat * 100)
+
+      # .enc 갱신 -> 그 TR만 다시 파싱
+      stat = os.stat(registry.enc_path(trcode))
+      os.utime(registry.enc_path(trcode), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+      refreshed = TRSchemaRegistry(cache_path, enc_dir)
+      refreshed.get(trcode)
+      assert refreshed.num_parsed == 1
+      os.utime(registry.enc_path(trcode), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+      print(f'{trcode}: read_enc+parse_dat {parse_ms:.3f}ms/request, registry cold {cold_ms:.3f}ms, restart from cache {restart_ms:.3f}ms, lookup {lookup_ms * 1e3:.2f}us/request')
+  print('ok')
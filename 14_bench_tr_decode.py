@@ -0,0 +1,171 @@
+from realtime_kiwoom.rt_kiwoom import RTKiwoom
+from realtime_kiwoom.tr_schema import TRSchema, convert_column
+from pykiwoom.kiwoom import Kiwoom
+from collections import Counter
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+'''
+ TR 응답 디코딩 확인 + 벤치마크 (키움 연결 없이, 호출 수를 세는 stand-in OCX로)
+ - 기존: 행 x 항목마다 GetCommData + strip, 행 단위 리스트 -> DataFrame, 이후 int/abs 변환
+ - 현재: 멀티데이터는 GetCommDataEx 한 번 + 컬럼 단위 형식 변환, 싱글데이터만 셀 단위
+ - Ex를 지원하지 않는 경우 (None)에는 셀 단위로 돌아가는지, pykiwoom Kiwoom.get_data도 같은 결과인지 확인
+ - 숫자가 아닌 값은 0으로 적재하지 않고 예외로 올리는지, 디코딩 중 예외가 나도 이벤트 루프를 끝내고 예외를 남기는지 확인
+'''
+
+minute_items = ['현재가', '거래량', '체결시간', '시가', '고가', '저가', '전일종가']
+minute_schema = TRSchema('opt10080', ['종목코드', '틱범위', '수정주가구분'], [('주식분봉차트', ['종목코드']), ('주식분봉차트조회', minute_items)])
+
+class StandInOCX:
+  """
+  KHOpenAPI 컨트롤 대역: dynamicCall을 메서드 이름별로 세고, 미리 만든 응답을 돌려준다.
+  - single: 싱글데이터 {항목: 값}, items/table: 멀티데이터 항목과 [[값, ...], ...] (키움처럼 앞뒤 공백 포함)
+  """
+  def __init__(self, single, items, table, support_ex=True):
+    self.single = single
+    self.items = items
+    self.table = table
+    self.support_ex = support_ex
+    self.calls = Counter()
+
+  def dynamicCall(self, signature, *args):
+    name = signature.split('(')[0]
+    self.calls[name] += 1
+    if name == 'GetRepeatCnt':
+      return len(self.table)
+    if name == 'GetCommData':
+      trcode, rqname, row, item = args
+      return self.single[item] if item in self.single else self.table[row][self.items.index(item)]
+    if name == 'GetCommDataEx':
+      return [list(row) for row in self.table] if self.support_ex else None
+    raise ValueError(signature)
+
+  def isRunning(self):
+    return False
+
+def minute_page(rows, seed=0):
+  rng = np.random.default_rng(seed)
+  close = 30000 + rng.integers(-500, 500, rows)
+  sign = np.where(rng.random(rows) < 0.5, '-', '+')
+  ts = pd.date_range('2022-10-17 09:00', periods=rows, freq='T').strftime('%Y%m%d%H%M%S')
+  return [
+    [f'{s}{c}'.rjust(12), f'{v:>10}', f'{t:<20}', f'{s}{c - 5}', f'{s}{c + 10}', f'{s}{c - 10}', f'{c - 100}   ']
+    for s, c, v, t in zip(sign, close, rng.integers(0, 100000, rows), ts)
+  ]
+
+class LoopOCX(StandInOCX):
+  """
+  이벤트 루프도 대신한다: 응답 처리 중 루프가 돌고 있고, exit() 호출을 센다.
+  """
+  def isRunning(self):
+    return True
+
+  def exit(self):
+    self.calls['exit'] += 1
+
+class BrokenOCX(LoopOCX):
+  def dynamicCall(self, signature, *args):
+    if signature.startswith('GetCommDataEx'):
+      raise RuntimeError('broken response')
+    return super().dynamicCall(signature, *args)
+
+def legacy_decode(ocx, trcode, rqname, items):
+  '''
+  기존 __slot_receive_tr_data (셀 단위) + 분봉 변환과 같은 처리
+  '''
+  rows = ocx.dynamicCall("GetRepeatCnt(QString, QString)", trcode, rqname)
+  data_list = []
+  for row in range(rows):
+    row_data = []
+    for item in items:
+      row_data.append(ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, row, item).strip())
+    data_list.append(row_data)
+  df = pd.DataFrame(data=data_list, columns=items)
+  for item in items:
+    if item != '체결시간':
+      df[item] = df[item].astype('int64').abs()
+  return df
+
+def make_kiwoom(ocx, schema, record, has_no_single=False):
+  kiwoom = RTKiwoom.__new__(RTKiwoom) # QAxWidget 없이: OCX와 이벤트 루프 자리에 stand-in
+  kiwoom.ocx = ocx
+  kiwoom.local_event_loop = ocx
+  kiwoom.tr_schema = schema
+  kiwoom.tr_output_index, kiwoom.tr_output_items = schema.output(record)
+  kiwoom.tr_has_no_single = has_no_single
+  return kiwoom
+
+def receive(kiwoom, trcode):
+  kiwoom._RTKiwoom__slot_receive_tr_data('0101', trcode, trcode, '', '2')
+  return kiwoom.tr_data
+
+def best_ms(func, repeat):
+  best = float('inf')
+  for _ in range(repeat):
+    ts_start = time.perf_counter()
+    func()
+    best = min(best, time.perf_counter() - ts_start)
+  return best * 1e3
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-n", "--rows", type=int, help="rows per page", default=900)
+  parser.add_argument("-r", "--repeat", type=int, help="repeat count", default=20)
+  args = parser.parse_args()
+
+  table = minute_page(args.rows)
+  expected = legacy_decode(StandInOCX({}, minute_items, table), 'opt10080', 'opt10080', minute_items)
+
+  # 멀티데이터: Ex 한 번
+  ocx = StandInOCX({}, minute_items, table)
+  df = receive(make_kiwoom(ocx, minute_schema, '주식분봉차트조회'), 'opt10080')
+  assert ocx.calls == Counter({'GetCommDataEx': 1}), ocx.calls
+  pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+  assert all(df[item].dtype == np.int64 for item in minute_items if item != '체결시간')
+
+  # Ex 미지원: 셀 단위로
+  fallback = StandInOCX({}, minute_items, table, support_ex=False)
+  pd.testing.assert_frame_equal(receive(make_kiwoom(fallback, minute_schema, '주식분봉차트조회'), 'opt10080'), df)
+  assert fallback.calls['GetCommData'] == args.rows * len(minute_items)
+
+  # 싱글데이터: 셀 단위 (Ex 호출 없음)
+  single = StandInOCX({'종목코드': ' 069500 '}, minute_items, table)
+  assert receive(make_kiwoom(single, minute_schema, '주식분봉차트'), 'opt10080')['종목코드'].tolist() == ['069500']
+  assert single.calls == Counter({'GetCommData': 1}), single.calls
+
+  # 숫자가 아닌 값: 0으로 바꾸지 않고 ValueError (빈 값만 0)
+  for values, kind in [(['1.5', '2'], 'int'), (['2', '1.5'], 'int'), (['1,234'], 'abs_int'), (['x', '1'], 'float')]:
+    try:
+      convert_column(values, kind)
+      assert False, (values, kind)
+    except ValueError:
+      pass
+  assert convert_column([' -3 ', ''], 'abs_int').tolist() == [3, 0]
+  assert convert_column(['1.5', '-2'], 'float').tolist() == [1.5, -2.0]
+
+  # 디코딩 중 예외: 이벤트 루프는 끝내고 예외는 tr_error로 (block_TR_request가 다시 올린다)
+  broken = BrokenOCX({}, minute_items, table)
+  kiwoom = make_kiwoom(broken, minute_schema, '주식분봉차트조회')
+  assert receive(kiwoom, 'opt10080') is None and isinstance(kiwoom.tr_error, RuntimeError) and broken.calls['exit'] == 1
+  bad_table = [list(row) for row in table]
+  bad_table[3][0] = '   +30,350'
+  bad = LoopOCX({}, minute_items, bad_table)
+  kiwoom = make_kiwoom(bad, minute_schema, '주식분봉차트조회')
+  assert receive(kiwoom, 'opt10080') is None and '현재가' in str(kiwoom.tr_error) and bad.calls['exit'] == 1
+
+  # pykiwoom: 문자열 그대로, Ex 한 번
+  pyk = Kiwoom.__new__(Kiwoom)
+  pyk.ocx = StandInOCX({}, minute_items, table)
+  pyk_df = pyk.get_data('opt10080', 'opt10080', ['체결시간', '현재가'], record_items=minute_items)
+  assert pyk.ocx.calls == Counter({'GetCommDataEx': 1}) and pyk_df['현재가'].tolist() == [row[0].strip() for row in table]
+
+  legacy_ms = best_ms(lambda: legacy_decode(ocx, 'opt10080', 'opt10080', minute_items), args.repeat)
+  ocx.calls.clear()
+  legacy_decode(ocx, 'opt10080', 'opt10080', minute_items)
+  legacy_calls = sum(ocx.calls.values())
+  kiwoom = make_kiwoom(ocx, minute_schema, '주식분봉차트조회')
+  bulk_ms = best_ms(lambda: receive(kiwoom, 'opt10080'), args.repeat)
+  print(f'{args.rows} rows x {len(minute_items)} items: per-cell {legacy_calls} calls, {legacy_ms:.2f}ms -> GetCommDataEx 1 call, {bulk_ms:.2f}ms (decode only, COM round trips not included)')
+  print('ok')
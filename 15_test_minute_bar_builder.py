@@ -0,0 +1,56 @@
+from realtime_kiwoom.minute_bar_builder import RealTimeMinuteBarBuilder
+from miscs.time_manager import TimeManager
+import pandas as pd
+
+'''
+ 실시간 분봉 빌더 점검 (키움 연결 없이)
+ - 분 경계에서 확정(seal_until)된 뒤 늦게 도착한 틱은 같은 분의 봉을 보정하고, 새 봉(중복 dt)을 만들지 않는다.
+ - 결과는 틱 전체를 한 번에 분 단위로 묶은 것과 같다.
+'''
+
+def reference_bars(ticks):
+  df = pd.DataFrame(ticks, columns=['st_code', 'hhmmss', 'price', 'volume']).sort_values(['st_code', 'hhmmss'], kind='stable')
+  df['minute'] = df['hhmmss'].str[:4]
+  g = df.groupby(['st_code', 'minute'], sort=True)
+  return pd.DataFrame({
+    'open': g['price'].first(), 'high': g['price'].max(), 'low': g['price'].min(), 'close': g['price'].last(), 'volume': g['volume'].sum(),
+    }).reset_index()
+
+def ts_at(hhmm):
+  return TimeManager.str_to_ts(TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d') + hhmm + '00')
+
+def test_late_tick_after_seal():
+  builder = RealTimeMinuteBarBuilder()
+  ticks = []
+  def feed(hhmmss, price, volume):
+    ticks.append(['069500', hhmmss, price, volume])
+    builder.update('069500', hhmmss, price, volume)
+
+  feed('090130', 100, 1)
+  first = builder.make_minute_chart_df(ts_end=ts_at('0902'))
+  assert first[['open', 'high', 'low', 'close', 'volume']].values.tolist() == [[100, 100, 100, 100, 1]], first
+  feed('090159', 105, 2) # 0901은 이미 확정됨
+  feed('090205', 110, 3)
+  df = builder.make_minute_chart_df(ts_end=ts_at('0903'))
+
+  assert not df['dt'].duplicated().any(), df
+  expected = reference_bars(ticks)
+  assert df['dt'].str[8:12].tolist() == expected['minute'].tolist(), df
+  assert df[['open', 'high', 'low', 'close', 'volume']].values.tolist() == expected[['open', 'high', 'low', 'close', 'volume']].values.tolist(), df
+  assert builder.last_sealed_bar('069500') == ('0902', [110, 110, 110, 110, 3])
+  print(f'late tick after seal: {len(df)} bars, no duplicate dt, late fixed #{builder.num_late_fixed}')
+
+def test_late_tick_after_override():
+  builder = RealTimeMinuteBarBuilder()
+  builder.update('069500', '090010', 100, 1)
+  dt = TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d') + '090000'
+  builder.override_bars('069500', pd.DataFrame([[dt, 99, 101, 98, 100, 10]], columns=['dt', 'open', 'high', 'low', 'close', 'volume']))
+  builder.update('069500', '090050', 120, 5) # TR로 대체된 봉은 보정하지 않는다.
+  df = builder.make_minute_chart_df()
+  assert df[['open', 'high', 'low', 'close', 'volume']].values.tolist() == [[99, 101, 98, 100, 10]], df
+  print('late tick after override: TR bar kept')
+
+if __name__ == "__main__":
+  test_late_tick_after_seal()
+  test_late_tick_after_override()
+  print('ok')
@@ -0,0 +1,79 @@
+from realtime_kiwoom.data_provider import *
+from realtime_kiwoom.history_cache import MinuteHistoryCache
+import tempfile
+
+'''
+ 프로세스 안 분봉 히스토리 캐시 점검 (MinuteHistoryCache, sqlite 임시 파일)
+ - refresh는 종목마다 마지막으로 읽은 dt 이후만 조회한다. (행이 없는 종목 때문에 다른 종목의 구간을 다시 읽지 않는다)
+ - 이미 읽은 구간 안 (중간의 빈 구간)에 적재되면 그 종목만 다시 읽고, 이미 반환한 데이터프레임은 바뀌지 않는다.
+'''
+
+def minute_rows(code, day, hhmm_list, base):
+  return pd.DataFrame({
+    'st_code': code, 'dt': [f'{day}{hhmm}00' for hhmm in hhmm_list],
+    'open': base, 'high': base + 5, 'low': base - 5, 'close': base + 1, 'volume': 10,
+  })
+
+def assert_matches_table(cache, provider, codes, ts_from):
+  history = cache.get_history()
+  table = provider.read_history_range(ts_from, codes=codes)
+  for code in codes:
+    assert list(history[code].index) == list(table[code].index), (code, len(history[code]), len(table[code]))
+    assert (history[code].to_numpy() == table[code].to_numpy()).all(), code
+
+if __name__ == "__main__":
+  with tempfile.TemporaryDirectory() as work_dir:
+    provider = MinuteChartDataProvider(None, os.path.join(work_dir, 'cache.db'), 'history_minute', drop_table=True)
+    codes = ['069500', '114800'] # 114800은 처음에 행이 없다.
+    day = TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d')
+    ts_all = TimeManager.ts_day_shift(TimeManager.get_now(), days=-3, floor=True)
+    provider.ingest_minute_dataframe(minute_rows('069500', day, ['0900', '0901', '0905', '0906'], 10000))
+
+    reads = [] # (시작, 종목, 읽은 행 수)
+    read_history_range = provider.read_history_range
+    def counting_read(ts_from, ts_end=None, codes=None):
+      history = read_history_range(ts_from, ts_end, codes=codes)
+      reads.append((ts_from, list(codes), sum(len(df) for df in history.values())))
+      return history
+    provider.read_history_range = counting_read
+
+    cache = MinuteHistoryCache(provider, lookback_days=3, codes=codes)
+    cache.refresh()
+    assert_matches_table(cache, provider, codes, ts_all)
+
+    # 뒤에 붙는 행만: 읽은 행 수 == 새 행 수 (행이 없는 종목은 lookback 시작부터 따로 조회)
+    provider.ingest_minute_dataframe(minute_rows('069500', day, ['0907', '0908'], 11000))
+    reads.clear()
+    assert cache.refresh() == 2
+    assert sum(num_rows for _, _, num_rows in reads) == 2, reads
+    assert [read_codes for _, read_codes, _ in reads] == [['069500'], ['114800']], reads
+    assert_matches_table(cache, provider, codes, ts_all)
+
+    # 중간의 빈 구간 채움: 그 종목만 비우고 다시 읽는다. 이미 반환한 데이터프레임은 그대로
+    before = cache.get_history()['069500']
+    snapshot = before.copy()
+    provider.ingest_minute_dataframe(minute_rows('069500', day, ['0902', '0903'], 12000))
+    cache.refresh()
+    assert_matches_table(cache, provider, codes, ts_all)
+    assert before.equals(snapshot) and len(cache.get_history()['069500']) == 8
+
+    # 아직 읽지 않은 뒤쪽 행과 겹치는 배치가 중간을 채운 경우 (건너뛴 행이 있어서 행 수로 확인)
+    provider.ingest_minute_dataframe(minute_rows('069500', day, ['0910'], 13000))
+    provider.ingest_minute_dataframe(minute_rows('069500', day, ['0904', '0910'], 14000))
+    cache.refresh()
+    assert_matches_table(cache, provider, codes, ts_all)
+    assert len(cache.get_history()['069500']) == 10
+
+    # 겹치기만 하고 새 행은 뒤쪽뿐: 다시 읽지 않는다.
+    cache.refresh()
+    provider.ingest_minute_dataframe(minute_rows('069500', day, ['0910', '0911', '0912'], 15000))
+    reads.clear()
+    assert cache.refresh() == 2
+    assert sum(num_rows for _, _, num_rows in reads) == 2, reads
+
+    # 행이 없던 종목에 나중에 행이 생긴 경우
+    provider.ingest_minute_dataframe(minute_rows('114800', day, ['0900'], 5000))
+    cache.refresh()
+    assert_matches_table(cache, provider, codes, ts_all)
+    provider.close()
+  print('ok')
@@ -0,0 +1,85 @@
+from realtime_kiwoom.rollup import MultiResolutionBars
+import numpy as np
+import pandas as pd
+
+'''
+ 상위 해상도 봉(MultiResolutionBars) 점검 (키움 연결 없이)
+ - seed() 후 실시간 분봉과 수정된 분봉(피봇 이전에 닫힌 버킷 포함)을 반영한 결과가 전체 1분봉을 한 번에 집계한 것과 같다.
+ - 결과 인덱스는 중복 없이 오름차순이다.
+'''
+
+value_columns = MultiResolutionBars.value_columns
+
+def minute_frame(minutes:dict, st_code='069500'):
+  index = pd.DatetimeIndex(sorted(minutes), name='dt')
+  df = pd.DataFrame([minutes[ts] for ts in index], columns=value_columns, index=index, dtype='int64')
+  df.insert(0, 'st_code', st_code)
+  return df
+
+def reference_frame(minutes:dict, resolution):
+  df = minute_frame(minutes)
+  key = [MultiResolutionBars.bucket_of(ts, MultiResolutionBars.resolutions[resolution]) for ts in df.index]
+  agg = df[value_columns].groupby(key, sort=True).agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+  return agg
+
+def assert_frames(bars:MultiResolutionBars, minutes:dict):
+  for res in MultiResolutionBars.resolutions:
+    frame = bars.get_frame(res)
+    assert frame.index.is_unique and frame.index.is_monotonic_increasing, (res, frame)
+    expected = reference_frame(minutes, res)
+    assert frame.index.tolist() == expected.index.tolist(), (res, frame, expected)
+    assert frame[value_columns].values.tolist() == expected.values.tolist(), (res, frame, expected)
+
+def random_bar(rng):
+  o, c = rng.integers(100, 110, size=2)
+  return (int(o), int(max(o, c) + rng.integers(0, 3)), int(min(o, c) - rng.integers(0, 3)), int(c), int(rng.integers(1, 100)))
+
+def ts_at(day, hhmm):
+  return pd.Timestamp(f'{day} {hhmm[:2]}:{hhmm[2:]}', tz='Asia/Seoul')
+
+def test_revise_closed_seed_bucket():
+  rng = np.random.default_rng(0)
+  minutes = {ts_at('2022-06-10', f'09{m:02d}'): random_bar(rng) for m in range(12)} # 09:00 ~ 09:11
+  bars = MultiResolutionBars('069500')
+  bars.seed(minute_frame(minutes))
+  assert_frames(bars, minutes)
+
+  # 09:02는 이미 닫힌 09:00 5분 버킷 (실시간 버킷 09:10이 아님)
+  ts = ts_at('2022-06-10', '0902')
+  assert not bars.apply(ts, *minutes[ts])
+  minutes[ts] = (105, 120, 90, 101, 1000)
+  assert bars.apply(ts, *minutes[ts])
+  assert_frames(bars, minutes)
+  assert bars.get_frame('5m').index.tolist().count(ts_at('2022-06-10', '0900')) == 1
+
+def test_random_revisions():
+  rng = np.random.default_rng(1)
+  seed_minutes = {}
+  for day in ['2022-06-09', '2022-06-10']:
+    for m in range(9 * 60, 15 * 60 + 30):
+      seed_minutes[ts_at(day, f'{m // 60:02d}{m % 60:02d}')] = random_bar(rng)
+  del seed_minutes[ts_at('2022-06-09', '1003')] # 피봇 이전 구간의 빈 분 (나중에 채워짐)
+  minutes = dict(seed_minutes)
+  bars = MultiResolutionBars('069500')
+  bars.seed(minute_frame(seed_minutes))
+
+  live = [ts_at('2022-06-13', f'{m // 60:02d}{m % 60:02d}') for m in range(9 * 60, 11 * 60)]
+  for i, ts in enumerate(live):
+    minutes[ts] = random_bar(rng)
+    assert bars.apply(ts, *minutes[ts])
+    if i % 10 == 0:
+      # 이미 반영한 분(피봇 이전 포함) 수정
+      for prev in rng.choice(np.array(sorted(minutes), dtype=object), size=3, replace=False):
+        minutes[prev] = random_bar(rng)
+        bars.apply(prev, *minutes[prev])
+      assert_frames(bars, minutes)
+
+  ts = ts_at('2022-06-09', '1003')
+  minutes[ts] = random_bar(rng)
+  assert bars.apply(ts, *minutes[ts])
+  assert_frames(bars, minutes)
+
+if __name__ == "__main__":
+  test_revise_closed_seed_bucket()
+  test_random_revisions()
+  print('ok')
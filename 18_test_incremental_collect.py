@@ -0,0 +1,113 @@
+from run_collect_etf_minute_charts import *
+import tempfile
+
+'''
+ 증분 수집(incremental_job) 점검 (키움 연결 없이)
+ - block_TR_request를 흉내내는 가짜 키움이 최신 분봉부터 페이지를 돌려준다. (14_bench_tr_decode.py의 StandInOCX와 같은 생각)
+ - 중단: 몇 페이지 적재 후 예외 -> 체크포인트에 적재한 범위가 남는다.
+ - 다른 날 재개: 끝난 종목만 버리고 floor를 그대로 이어서, 새로 생긴 분봉과 중단된 구간을 모두 채운다.
+ - floor에 닿으면 더 넘기지 않고, CSV에는 실제로 적재한 행만 한 번씩 들어간다.
+'''
+
+page_size = 300
+
+def make_raw_minutes(days):
+  '''
+  opt10080 형태의 분봉 원본 (최신 분이 먼저)
+  '''
+  ts = [day + pd.Timedelta(minutes=9 * 60 + i) for day in pd.to_datetime(days) for i in range(381)]
+  raw = pd.DataFrame({'체결시간': [t.strftime('%Y%m%d%H%M%S') for t in ts]})
+  for i, col in enumerate(['현재가', '시가', '고가', '저가']):
+    raw[col] = [f'-{30000 + (j + i) % 97}' for j in range(len(ts))]
+  raw['거래량'] = [str(10 + j) for j in range(len(ts))]
+  return raw.iloc[::-1].reset_index(drop=True)
+
+class Interrupted(Exception):
+  pass
+
+class FakeKiwoom:
+  def __init__(self, raw, fail_after=None):
+    self.raw = raw
+    self.fail_after = fail_after
+    self.calls = 0
+    self.pos = 0
+    self.tr_remained = False
+
+  def block_TR_request(self, tr_code, **kwargs):
+    if self.fail_after is not None and self.calls >= self.fail_after:
+      raise Interrupted()
+    assert kwargs['next'] == 0 or self.tr_remained, 'requested past the last page'
+    self.calls += 1
+    self.pos = 0 if kwargs['next'] == 0 else self.pos + page_size
+    self.tr_remained = self.pos + page_size < len(self.raw)
+    return self.raw.iloc[self.pos:self.pos + page_size]
+
+def new_state(provider, code):
+  return {'floor': TimeManager.ts_to_str(provider.get_ts_last_inserted(code), '%Y%m%d%H%M%S'), 'oldest': None, 'newest': None, 'pages': 0, 'done': False}
+
+def stored_dts(provider, code):
+  return provider.read_history_range(TimeManager.str_to_ts('20000101000000'), codes=[code])[code].index.strftime('%Y%m%d%H%M%S').tolist()
+
+def test_interrupt_and_resume(work_dir):
+  code, name = '069500', 'KODEX 200'
+  checkpoint_path = os.path.join(work_dir, 'collect_checkpoint.json')
+  csv_path = os.path.join(work_dir, f'{name}.csv')
+  provider = MinuteChartDataProvider(None, os.path.join(work_dir, 'minutes.sqlite3'), 'minute_history', drop_table=True)
+
+  # 이전 수집: 10/13 15:00까지 저장되어 있음
+  raw = make_raw_minutes(['2022-10-12', '2022-10-13', '2022-10-14', '2022-10-17'])
+  seed = raw[raw['체결시간'] <= '20221013150000']
+  provider.ingest_raw_dataframes({code: seed})
+  floor = seed['체결시간'].max()
+
+  # 첫날: 두 페이지 적재 후 중단
+  checkpoint = load_checkpoint(checkpoint_path, '20221017')
+  checkpoint['codes'][code] = new_state(provider, code)
+  checkpoint['codes']['114800'] = dict(new_state(provider, '114800'), done=True)
+  state = checkpoint['codes'][code]
+  assert state['floor'] == floor
+  try:
+    incremental_job(FakeKiwoom(raw, fail_after=2), provider, 'opt10080', code, name, state,
+      on_page=lambda _: save_checkpoint(checkpoint_path, checkpoint), csv_path=csv_path)
+    assert False, 'must be interrupted'
+  except Interrupted:
+    pass
+  saved = load_checkpoint(checkpoint_path, '20221017')
+  assert saved['codes'][code] == {'floor': floor, 'oldest': raw['체결시간'][2 * page_size - 1], 'newest': raw['체결시간'][0], 'pages': 2, 'done': False}, saved
+  assert len(stored_dts(provider, code)) == len(seed) + 2 * page_size
+  assert len(pd.read_csv(csv_path, dtype=str)) == 2 * page_size
+
+  # 다음 날 재개: 그 사이 하루치 분봉이 더 생겼다. (페이지 경계가 밀려서 적재한 범위에 걸치는 페이지가 생긴다)
+  raw = make_raw_minutes(['2022-10-12', '2022-10-13', '2022-10-14', '2022-10-17', '2022-10-18'])
+  checkpoint = load_checkpoint(checkpoint_path, '20221018')
+  assert checkpoint['day'] == '20221018' and list(checkpoint['codes']) == [code], checkpoint
+  state = checkpoint['codes'][code]
+  assert state['floor'] == floor and state['pages'] == 2
+  kiwoom = FakeKiwoom(raw)
+  counts = incremental_job(kiwoom, provider, 'opt10080', code, name, state,
+    on_page=lambda _: save_checkpoint(checkpoint_path, checkpoint), csv_path=csv_path)
+  assert state['done'] and load_checkpoint(checkpoint_path, '20221018')['codes'][code]['done']
+
+  # floor가 들어있는 페이지에서 멈춘다.
+  assert kiwoom.calls == int(np.flatnonzero(raw['체결시간'].values <= floor)[0]) // page_size + 1, kiwoom.calls
+  assert stored_dts(provider, code) == sorted(raw['체결시간'])
+  new_rows = len(raw) - len(seed) - 2 * page_size
+  assert counts['inserted'] == new_rows, counts
+
+  # CSV에는 적재한 행만 한 번씩
+  csv = pd.read_csv(csv_path, dtype=str)
+  assert not csv['체결시간'].duplicated().any()
+  assert sorted(csv['체결시간']) == sorted(raw['체결시간'][raw['체결시간'] > floor])
+
+  # 바로 다시 수집: 첫 페이지만 받고 아무것도 적재하지 않는다.
+  state = new_state(provider, code)
+  kiwoom = FakeKiwoom(raw)
+  counts = incremental_job(kiwoom, provider, 'opt10080', code, name, state, on_page=lambda _: None, csv_path=csv_path)
+  assert kiwoom.calls == 1 and counts['inserted'] == 0, (kiwoom.calls, counts)
+  assert len(pd.read_csv(csv_path, dtype=str)) == len(csv)
+  provider.close()
+
+if __name__ == "__main__":
+  with tempfile.TemporaryDirectory() as work_dir:
+    test_interrupt_and_resume(work_dir)
+  print('ok')
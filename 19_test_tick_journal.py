@@ -0,0 +1,70 @@
+from realtime_kiwoom.tick_journal import TickJournal
+from realtime_kiwoom.kiwoom_type import StockExecutionRecord
+import os
+import tempfile
+import numpy as np
+
+'''
+ 틱 저널 점검 (키움 연결 없이)
+ - N건 기록 후 레코드 중간에 죽은 것처럼 잘린 꼬리를 붙여도 load()는 완전한 N건만 돌려준다.
+ - 다시 열면 잘린 꼬리를 버리고, 이어서 기록한 레코드가 어긋나지 않는다.
+ - to_records()는 기록한 틱을 그대로 되돌린다.
+'''
+
+record_fields = ['code', 'hhmmss', 'open', 'high', 'low', 'close', 'volume']
+
+def make_records(n, seed=0):
+  rng = np.random.default_rng(seed)
+  codes = ['069500', '114800', '226490']
+  records = []
+  for i in range(n):
+    seconds = 9 * 3600 + i
+    close = int(rng.integers(10000, 40000))
+    records.append(StockExecutionRecord(
+      codes[i % len(codes)],
+      hhmmss=f'{seconds // 3600:02d}{seconds // 60 % 60:02d}{seconds % 60:02d}',
+      open=close - 50, high=close + 100, low=close - 100, close=close,
+      volume=int(rng.integers(1, 10 ** 10)), # i4를 넘는 거래량
+    ))
+  return records
+
+def as_tuples(records):
+  return [tuple(getattr(r, field) for field in record_fields) for r in records]
+
+def test_partial_tail(journal_dir, n=1000):
+  records = make_records(n + 1)
+  journal = TickJournal(journal_dir, '20221018', fsync_every=64)
+  for r in records[:n]:
+    journal.append(r)
+  journal.close()
+
+  # 레코드 중간에 죽은 경우: 다음 레코드의 앞부분만 기록됨
+  itemsize = TickJournal.JOURNAL_DTYPE.itemsize
+  with open(journal.path, 'ab') as f:
+    f.write(b'\x01' * (itemsize // 2))
+  assert os.path.getsize(journal.path) == n * itemsize + itemsize // 2
+
+  ticks = TickJournal.load(journal.path)
+  assert len(ticks) == n, len(ticks)
+  assert as_tuples(TickJournal.to_records(ticks)) == as_tuples(records[:n])
+
+  # 다시 열면 잘린 꼬리를 버리고 레코드 경계에서 이어서 기록
+  journal = TickJournal(journal_dir, '20221018')
+  assert os.path.getsize(journal.path) == n * itemsize
+  journal.append(records[n])
+  journal.close()
+  ticks = TickJournal.load(journal.path)
+  assert len(ticks) == n + 1, len(ticks)
+  assert as_tuples(TickJournal.to_records(ticks)) == as_tuples(records)
+
+def test_empty(journal_dir):
+  path = TickJournal.journal_file_path(journal_dir, '20221019')
+  assert len(TickJournal.load(path)) == 0
+  TickJournal(journal_dir, '20221019').close()
+  assert len(TickJournal.load(path)) == 0 and TickJournal.to_records(TickJournal.load(path)) == []
+
+if __name__ == "__main__":
+  with tempfile.TemporaryDirectory() as journal_dir:
+    test_partial_tail(journal_dir)
+    test_empty(journal_dir)
+  print('ok')
@@ -0,0 +1,77 @@
+from realtime_kiwoom.tick_journal import TickJournal
+from realtime_kiwoom.tick_archive import TickArchive
+import json
+import os
+import tempfile
+import numpy as np
+
+'''
+ 틱 아카이브 점검 (키움 연결 없이)
+ - 저널 형태의 하루치 틱을 종목별로 압축 저장한 뒤 읽으면 원래 틱과 같다. (종목별 시간순)
+ - 압축 파일은 폭 축소만 한 .npy보다 작다.
+ - 이전 형식 (컬럼별 .npy) 파티션도 읽는다.
+'''
+
+value_columns = ['t', 'open', 'high', 'low', 'close', 'volume']
+
+def make_ticks(n, seed=0):
+  rng = np.random.default_rng(seed)
+  ticks = np.zeros(n, dtype=TickJournal.JOURNAL_DTYPE)
+  ticks['code'] = rng.choice([b'069500', b'114800', b'226490'], size=n)
+  ticks['t'] = 9 * 3600 + np.sort(rng.integers(0, 6 * 3600 + 1800, size=n))
+  ticks['close'] = 30000 + np.cumsum(rng.choice([-5, 0, 5], size=n, p=[0.2, 0.6, 0.2]))
+  ticks['open'] = 30000
+  ticks['high'] = np.maximum.accumulate(ticks['close'])
+  ticks['low'] = np.minimum.accumulate(ticks['close'])
+  ticks['volume'] = rng.integers(1, 1000, size=n)
+  return ticks
+
+def assert_partitions(archive, yyyymmdd, ticks):
+  for code in np.unique(ticks['code']):
+    expected = ticks[ticks['code'] == code]
+    decoded = archive.read_partition(yyyymmdd, code.decode('ascii'))
+    for name in value_columns:
+      assert decoded[name].dtype == np.int64 and decoded[name].tolist() == expected[name].astype(np.int64).tolist(), name
+
+def test_round_trip(archive_dir):
+  archive = TickArchive(archive_dir)
+  ticks = make_ticks(100000)
+  num_written = archive.write_day('20221018', ticks)
+  assert sum(num_written.values()) == len(ticks)
+  assert_partitions(archive, '20221018', ticks)
+
+  path = archive.partition_path('20221018', '069500')
+  with open(os.path.join(path, 'meta.json')) as f:
+    meta = json.load(f)
+  narrowed = sum(np.dtype(info['dtype']).itemsize for info in meta['columns'].values()) * meta['num_ticks']
+  compressed = os.path.getsize(os.path.join(path, TickArchive.archive_file))
+  print(f'069500: {meta["num_ticks"]} ticks, narrowed {narrowed} bytes -> compressed {compressed} bytes')
+  assert compressed < narrowed
+
+  history = archive.read(['069500', '000000'], '20221001', '20221031')
+  assert len(history['069500']) == num_written['069500'] and history['069500'].index.is_monotonic_increasing
+  assert len(history['000000']) == 0
+
+def test_legacy_partition(archive_dir):
+  archive = TickArchive(archive_dir)
+  ticks = make_ticks(1000, seed=1)
+  archive.write_day('20221017', ticks)
+  # 이전 형식으로 바꾼다: 컬럼별 .npy, meta에 format 없음
+  for code in np.unique(ticks['code']):
+    path = archive.partition_path('20221017', code.decode('ascii'))
+    with open(os.path.join(path, 'meta.json')) as f:
+      meta = json.load(f)
+    with np.load(os.path.join(path, TickArchive.archive_file)) as columns:
+      for name in meta['columns']:
+        np.save(os.path.join(path, f'{name}.npy'), columns[name])
+    os.remove(os.path.join(path, TickArchive.archive_file))
+    del meta['format']
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+      json.dump(meta, f)
+  assert_partitions(archive, '20221017', ticks)
+
+if __name__ == "__main__":
+  with tempfile.TemporaryDirectory() as archive_dir:
+    test_round_trip(archive_dir)
+    test_legacy_partition(archive_dir)
+  print('ok')
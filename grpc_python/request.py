@@ -3,6 +3,7 @@ from realtime_kiwoom.rt_kiwoom import *
 from realtime_kiwoom.agent import *
 from miscs.time_manager import TimeManager
 from miscs.config_manager import ConfigManager
+from miscs.latency_tracker import LatencyTracker
 import grpc
 import grpc_python.prediction_pb2 as prediction_pb2
 import grpc_python.prediction_pb2_grpc as prediction_pb2_grpc
@@ -34,7 +35,11 @@ class RequestBuilder:
     return prediction_pb2.PredictRequest(x_history=prediction_pb2.History(items=x_history), y_history=prediction_pb2.History(items=y_history))
 
   def send_and_wait(self):
+    latency_tracker = getattr(self.agent, 'latency_tracker', None) or LatencyTracker()
+    with latency_tracker.span(LatencyTracker.REQUEST_BUILD):
+      predict_request = self.__build()
     with grpc.insecure_channel('localhost:50051') as channel:
       stub = prediction_pb2_grpc.PredictorStub(channel)
-      response = stub.Predict(self.__build())
+      with latency_tracker.span(LatencyTracker.RPC):
+        response = stub.Predict(predict_request)
     return dict(response.actions)
\ No newline at end of file
@@ -0,0 +1,19 @@
+import os
+import re
+
+'''
+ 분봉 수집 대상: 몇가지 ETF 종목과 업종 (TR 코드 -> {종목코드: 이름})
+ 이름은 수집기가 남기는 CSV 파일 이름이기도 하다. (data/<이름>.csv, 일별 수집은 data/<이름>_<YYYYMMDD>.csv)
+'''
+
+tr_dic = {
+  'opt20005': {'001': 'kospi', '201': 'kospi200'},
+  'opt10080': {'069500':'kodex_200', '114800':'kodex_inverse', '226490':'kodex_kospi'}
+}
+
+def code_of_csv(path):
+  '''
+  수집기 CSV 파일 경로 -> 종목코드 (수집 대상이 아니면 None)
+  '''
+  stem = re.sub(r'_\d{8}$', '', os.path.splitext(os.path.basename(path))[0])
+  return {name: code for dic in tr_dic.values() for code, name in dic.items()}.get(stem)
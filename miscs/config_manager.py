@@ -14,10 +14,33 @@ class ConfigManager:
   def get_path(self, tag):
     return self.root.find('./PATHS').find(tag).text
   
+  def get_tr_schema_cache_path(self):
+    """
+    컴파일된 TR 레이아웃 캐시 파일 (없으면 None: 프로세스마다 한 번씩 파싱)
+    """
+    node = self.root.find('./PATHS/tr_schema_cache')
+    return node.text if node is not None else None
+
   def get_database(self, dbtype='sqlite3'):
     node = self.root.find('./DBMS').find(dbtype)
     return {tag:node.find(tag).text for tag in ['database']}
 
+  def get_storage_backend(self):
+    """
+    분봉 테이블 저장소 백엔드: {'backend': 'sqlite' | 'duckdb' | 'numpy', 'database': 작업 폴더 기준 파일 경로 (numpy는 None)}
+    """
+    node = self.root.find('./DBMS/backend')
+    backend = node.text if node is not None else 'sqlite'
+    dbtype = {'sqlite': 'sqlite3', 'duckdb': 'duckdb'}.get(backend)
+    return {'backend': backend, 'database': self.get_database(dbtype)['database'] if dbtype is not None else None}
+
+  def get_sqlite_pragmas(self):
+    """
+    sqlite3 연결마다 적용할 PRAGMA: dict (설정 파일에 없는 항목은 SQLiteConnectionManager 기본값 사용)
+    """
+    pragmas = self.root.find('./DBMS/sqlite3/pragmas')
+    return {node.tag: node.text for node in pragmas} if pragmas is not None else {}
+
   def get_tables(self):
     """
     테이블 정보: dict
@@ -25,9 +48,16 @@ class ConfigManager:
     tables = self.root.find('./DBMS/tables')
     dic = {}
     for table in tables.findall('table'):
+      snapshot_path = table.find('snapshot_path')
+      coverage_path = table.find('coverage_path')
+      rollups = table.find('rollups')
       dic[table.attrib['type']] ={  
       'table_name':table.find('name').text, 
-      'drop_table':True if table.find('drop_table').text=='1' else False
+      'drop_table':True if table.find('drop_table').text=='1' else False,
+      'snapshot_path':snapshot_path.text if snapshot_path is not None else None, # 없으면 스냅샷 미사용
+      'coverage_path':coverage_path.text if coverage_path is not None else None, # 없으면 커버리지 인덱스 미사용
+      'rollups':rollups.text.split() if rollups is not None and rollups.text else [], # 롤업 해상도 (5m 15m 60m 1d), 없으면 미사용
+      'schema':table.find('schema').text if table.find('schema') is not None else 'v1', # 새로 만들 테이블의 스키마 (v1 | v2)
       }
     return dic
 
@@ -38,6 +68,46 @@ class ConfigManager:
       'description': model.find('description').text
     }
   
+  def get_realtime_info(self):
+    """
+    실시간 처리 설정: dict
+    (기존 설정 파일에 항목이 없으면 기본값 사용)
+    """
+    realtime = self.root.find('./Realtime')
+    def find_text(tag, default):
+      node = realtime.find(tag) if realtime is not None else None
+      return node.text if node is not None else default
+    capacity = realtime.find('real_data_capacity') if realtime is not None else None
+    return {
+      'real_data_capacity': {
+        'default': int(capacity.attrib.get('default', '2048')) if capacity is not None else 2048,
+        'codes': {code.text: int(code.attrib['capacity']) for code in capacity.findall('code')} if capacity is not None else {},
+      },
+      'tick_backend': find_text('tick_backend', 'sqlite'), # sqlite | duckdb | numpy
+      'tick_buffer_size': int(find_text('tick_buffer_size', '4096')),
+      'tick_flush_seconds': float(find_text('tick_flush_seconds', '1.0')),
+      'tick_journal_path': find_text('tick_journal_path', None), # 없으면 저널 미사용
+      'tick_archive_path': find_text('tick_archive_path', None), # 없으면 장 마감 후 아카이브 미사용
+      'history_lookback_days': int(find_text('history_lookback_days', '14')), # 에이전트가 유지하는 과거 분봉 기간
+    }
+
+  def get_tr_limits(self):
+    """
+    TR 요청 한도 (TRScheduler): dict
+    (기존 설정 파일에 항목이 없으면 기본값 사용)
+    """
+    limits = self.root.find('./TRLimits')
+    def find_node(tag):
+      return limits.find(tag) if limits is not None else None
+    per_second, per_hour, bulk_reserve = find_node('per_second'), find_node('per_hour'), find_node('bulk_reserve')
+    return {
+      'per_second': int(per_second.text) if per_second is not None else 5,
+      'per_second_burst': int(per_second.attrib.get('burst', '1')) if per_second is not None else 1,
+      'per_hour': int(per_hour.text) if per_hour is not None else 1000,
+      'per_hour_burst': int(per_hour.attrib.get('burst', '500')) if per_hour is not None else 500,
+      'bulk_reserve': int(bulk_reserve.text) if bulk_reserve is not None else 100, # 대량 수집이 남겨둘 시간당 토큰
+    }
+
   def retrieve_candidate_ETFs(self):
     """
     실전에 참여할 후보 ETF 종목 코드: list
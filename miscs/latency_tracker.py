@@ -0,0 +1,121 @@
+from __future__ import annotations
+from contextlib import contextmanager
+import math
+import time
+
+class LatencyHistogram:
+  """
+  로그 스케일 버킷 히스토그램 (나노초)
+  - 2의 거듭제곱 구간을 sub_buckets 개로 나누므로 백분위수의 상대 오차는 약 2^(1/sub_buckets) - 1 이내
+  - 관측값을 저장하지 않으므로 장중 내내 누적해도 메모리가 일정하다.
+  """
+  def __init__(self, sub_buckets=8):
+    self.sub_buckets = sub_buckets
+    self.buckets = {} # 버킷 번호 -> 건수
+    self.count = 0
+    self.total_ns = 0
+    self.max_ns = 0
+
+  def add(self, elapsed_ns:int):
+    i = int(math.log2(elapsed_ns) * self.sub_buckets) if elapsed_ns > 0 else 0
+    self.buckets[i] = self.buckets.get(i, 0) + 1
+    self.count += 1
+    self.total_ns += elapsed_ns
+    if elapsed_ns > self.max_ns:
+      self.max_ns = elapsed_ns
+
+  def percentile(self, q:float):
+    '''
+    q(0~100) 백분위수 근사값 (나노초): 해당 버킷의 기하 중앙값
+    '''
+    if self.count == 0:
+      return 0.0
+    rank = max(1, math.ceil(self.count * q / 100))
+    seen = 0
+    for i in sorted(self.buckets):
+      seen += self.buckets[i]
+      if seen >= rank:
+        return min(2 ** ((i + 0.5) / self.sub_buckets), self.max_ns)
+    return float(self.max_ns)
+
+class LatencyTracker:
+  """
+  에이전트 파이프라인 단계별 지연 시간 측정 (time.perf_counter_ns, 단조 시계)
+  - span(stage): with 블록 구간을 측정
+  - mark(name)/record_since(stage, name): 함수 경계를 넘는 구간 측정 (예: 분의 마지막 틱 -> 주문)
+  - 단계별 히스토그램을 p50/p95/p99로 요약하여 주기적으로, 그리고 장 종료시 로그로 남긴다.
+  """
+  TICK = 'tick' # 실시간 틱 수신 처리
+  BAR_SEAL = 'bar_seal' # 분봉 확정
+  COMBINED_UPDATE = 'combined_update' # 결합데이터 갱신
+  REQUEST_BUILD = 'request_build' # 예측 요청 생성
+  RPC = 'rpc' # 예측 서버 왕복
+  DECISION = 'decision' # 예측 결과 처리 (ActionManager 생성)
+  ORDER = 'order' # SendOrder
+  TICK_TO_DECISION = 'tick_to_decision' # 분의 마지막 틱 -> 결정
+  TICK_TO_ORDER = 'tick_to_order' # 분의 마지막 틱 -> 주문 제출
+  stages = [TICK, BAR_SEAL, COMBINED_UPDATE, REQUEST_BUILD, RPC, DECISION, ORDER, TICK_TO_DECISION, TICK_TO_ORDER]
+
+  def __init__(self, dump_interval_seconds=600):
+    self.dump_interval_seconds = dump_interval_seconds
+    self.histograms = {stage: LatencyHistogram() for stage in LatencyTracker.stages}
+    self.marks = {} # name -> perf_counter_ns
+    self.__last_dumped = time.monotonic()
+
+  @contextmanager
+  def span(self, stage):
+    ts_start = time.perf_counter_ns()
+    try:
+      yield
+    finally:
+      self.record(stage, time.perf_counter_ns() - ts_start)
+
+  def record(self, stage, elapsed_ns:int):
+    self.histograms.setdefault(stage, LatencyHistogram()).add(elapsed_ns)
+
+  def mark(self, name, ts_ns:int=None):
+    self.marks[name] = time.perf_counter_ns() if ts_ns is None else ts_ns
+
+  def get_mark(self, name):
+    return self.marks.get(name)
+
+  def record_since(self, stage, name):
+    '''
+    mark(name) 이후 경과 시간을 stage에 기록 (mark가 없으면 무시)
+    '''
+    ts_start = self.marks.get(name)
+    if ts_start is not None:
+      self.record(stage, time.perf_counter_ns() - ts_start)
+
+  def summary(self):
+    '''
+    stage -> {count, mean, p50, p95, p99, max} (ms)
+    '''
+    return {
+      stage: {
+        'count': hist.count,
+        'mean': hist.total_ns / hist.count / 1e6,
+        'p50': hist.percentile(50) / 1e6,
+        'p95': hist.percentile(95) / 1e6,
+        'p99': hist.percentile(99) / 1e6,
+        'max': hist.max_ns / 1e6,
+      }
+      for stage, hist in self.histograms.items() if hist.count > 0
+    }
+
+  def format_summary(self):
+    lines = [f"{'stage':<18}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10} (ms)"]
+    for stage, s in self.summary().items():
+      lines.append(f"{stage:<18}{s['count']:>8}{s['mean']:>10.3f}{s['p50']:>10.3f}{s['p95']:>10.3f}{s['p99']:>10.3f}{s['max']:>10.3f}")
+    return '\n'.join(lines)
+
+  def dump(self, logger):
+    logger.info(f"지연 시간 요약\n{self.format_summary()}")
+    self.__last_dumped = time.monotonic()
+
+  def dump_if_due(self, logger):
+    '''
+    dump_interval_seconds가 지났으면 dump
+    '''
+    if time.monotonic() - self.__last_dumped >= self.dump_interval_seconds:
+      self.dump(logger)
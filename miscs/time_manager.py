@@ -67,6 +67,20 @@ class TimeManager:
     '''
     return pd.Timestamp(str, tz='Asia/Seoul')
 
+  @staticmethod
+  def ts_to_epoch_minutes(ts:pd.Timestamp):
+    '''
+    시간을 UTC epoch 분(정수)으로 변환 (분 미만 내림)
+    '''
+    return ts.value // 60_000_000_000
+
+  @staticmethod
+  def epoch_minutes_to_ts(minutes:int):
+    '''
+    UTC epoch 분을 시간(서울시)으로 변환
+    '''
+    return pd.Timestamp(minutes * 60_000_000_000, tz='UTC').tz_convert('Asia/Seoul')
+
   @staticmethod
   def hhmmss_to_ts(hhmmss:str):
     '''
@@ -122,6 +136,23 @@ class TimeManager:
       raise '휴장일입니다.'    
     return self.__calendar.schedule.loc[pd.to_datetime(self.__date), 'close'].tz_convert(self.__calendar.tz)
 
+  def get_sessions(self, date_from, date_to):
+    '''
+    [date_from, date_to] 사이 개장일의 장 시작/종료 시간 (서울시): DataFrame(index=날짜, columns=['open', 'close'])
+    '''
+    date_from, date_to = pd.Timestamp(date_from).strftime('%Y-%m-%d'), pd.Timestamp(date_to).strftime('%Y-%m-%d')
+    if self.fast_debug:
+      days = pd.bdate_range(date_from, date_to)
+      return pd.DataFrame({
+        'open': (days + pd.Timedelta(hours=9)).tz_localize('Asia/Seoul'),
+        'close': (days + pd.Timedelta(hours=15, minutes=30)).tz_localize('Asia/Seoul'),
+      }, index=days)
+    schedule = self.__calendar.schedule.loc[date_from:date_to, ['open', 'close']]
+    return pd.DataFrame({
+      'open': schedule['open'].dt.tz_convert(self.__calendar.tz),
+      'close': schedule['close'].dt.tz_convert(self.__calendar.tz),
+    }, index=schedule.index)
+
   def set_timestamp(self, tag):
     '''
     진입 시점 기록
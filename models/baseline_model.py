@@ -92,12 +92,14 @@ class InputBuilder_BaselineModel:
     df['ts_end'] = ss.dt.shift(-1).apply(lambda x: x.hour == 9 and x.minute == 0).values
     df['ts_start'] = ss.dt.apply(lambda x: x.hour == 9 and x.minute == 0).values
 
-  def make_binary_close_indicators(self, df: pd.DataFrame):
+  def make_binary_close_indicators(self, df: pd.DataFrame, daily_prev_close: pd.Series=None):
     """
     df가 변형됨
+    daily_prev_close: 날짜(00:00, 서울시) -> 직전 거래일 종가 (MinuteChartDataProvider.get_daily_prev_closes), 없으면 df에서 일별 groupby
     """
-    daily_prev_close = df.groupby(df.index.strftime('%Y-%m-%d')).close.last().shift(1)
-    xx = pd.Series(df.index.strftime('%Y-%m-%d').map(daily_prev_close).values, index=df.index)
+    if daily_prev_close is None:
+      daily_prev_close = df.groupby(df.index.normalize()).close.last().shift(1)
+    xx = pd.Series(daily_prev_close.reindex(df.index.normalize()).values, index=df.index)
     df['is_higher'] = xx < df.close
     df.loc[xx.isna(), 'is_higher']=np.nan
 
@@ -100,7 +100,21 @@ class Kiwoom:
             }
             self.tr_cond_dqueue.put(output)
 
-    def get_data(self, trcode, rqname, items):
+    def get_data(self, trcode, rqname, items, record_items=None):
+        """TR 응답을 DataFrame으로 (값은 strip 한 문자열)
+
+        Args:
+            items (list): 가져올 항목
+            record_items (list): 출력 레코드의 전체 항목 (.enc 순서), 주어지면 멀티데이터를
+                GetCommDataEx 한 번으로 가져와서 컬럼을 고른다. (멀티데이터 레코드일 때만 줄 것)
+                Ex 결과가 비어 있거나 폭이 다르면 셀 단위로 가져온다.
+        """
+        if record_items is not None and all(item in record_items for item in items):
+            table = self.GetCommDataEx(trcode, rqname)
+            if table and all(len(row) == len(record_items) for row in table):
+                columns = list(zip(*table))
+                return pd.DataFrame({item: [value.strip() for value in columns[record_items.index(item)]] for item in items}, columns=items)
+
         rows = self.GetRepeatCnt(trcode, rqname)
         if rows == 0:
             rows = 1
@@ -154,27 +168,14 @@ class Kiwoom:
                 else:
                     self.tr_remained = False
 
-                for output in self.tr_items['output']:
+                for i, output in enumerate(self.tr_items['output']):
                     record = list(output.keys())[0]
                     items = list(output.values())[0]
                     if record == self.tr_record:
                         break
 
-                rows = self.GetRepeatCnt(trcode, rqname)
-                if rows == 0:
-                    rows = 1
-
-                data_list = []
-                for row in range(rows):
-                    row_data = []
-                    for item in items:
-                        data = self.GetCommData(trcode, rqname, row, item)
-                        row_data.append(data)
-                    data_list.append(row_data)
-
-                # data to DataFrame
-                df = pd.DataFrame(data=data_list, columns=items)
-                self.tr_data = df
+                # 첫 번째 출력(싱글데이터)은 GetCommDataEx 대상이 아니다.
+                self.tr_data = self.get_data(trcode, rqname, items, record_items=items if i > 0 else None)
                 self.received = True
 
             except:
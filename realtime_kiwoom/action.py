@@ -116,6 +116,7 @@ class ActionManager:
     self.__initilalize()
     self.__build_action_list(action_type)
     self.completion_info_dic = {}
+    self.decision_tick_ns = None # 이 결정의 근거가 된 틱 시각 (perf_counter_ns), TICK_TO_ORDER 기준
 
   def is_completed(self):
     return len(self.action_list) == 0
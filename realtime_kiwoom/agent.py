@@ -7,7 +7,14 @@ import time
 from enum import IntEnum
 from miscs.time_manager import TimeManager, ToggledMinutesChecker
 from miscs.config_manager import ConfigManager
+from miscs.latency_tracker import LatencyTracker
 from realtime_kiwoom.data_provider import *
+from realtime_kiwoom.minute_bar_builder import RealTimeMinuteBarBuilder
+from realtime_kiwoom.tick_journal import TickJournal
+from realtime_kiwoom.tick_archive import TickArchive
+from realtime_kiwoom.rollup import MultiResolutionBars
+from realtime_kiwoom.tick_sequencer import TickSequencer
+from realtime_kiwoom.history_cache import MinuteHistoryCache
 from PyQt5.QtCore import *
 from queue import Queue
 from config.log_class import *
@@ -47,12 +54,14 @@ class RecoveryState(IntEnum):
 #     pass
 
 class RecoveryManager():
-  def __init__(self, agent: RTAgent = None):
+  def __init__(self, agent: RTAgent = None, journal_span=None):
     self.__agent = agent
     self.state = RecoveryState.STANBY_TO_RECOVER
     self.requests_to_timer_callback = []
     self.__today_minute_data = {}
     self.__ts_pivot = None
+    # 틱 저널로 재적재한 구간 (첫 틱 HHMMSS, 마지막 틱 HHMMSS): 있으면 TR 분봉은 유실 구간만 사용
+    self.__journal_span = journal_span
 
     self.__when_state_entered = {
       RecoveryState.STANBY_TO_RECOVER: None,
@@ -76,12 +85,12 @@ class RecoveryManager():
       },
       RecoveryState.START_WARMUP_TR_MINUTE_DATA: {
       'ts_tag':RecoveryState.START_WARMUP_TR_MINUTE_DATA, 
-      'after_seconds': lambda: 10, 
+      'after_seconds': lambda: 0 if self.__journal_span else 10, 
       'func': []
       },
       RecoveryState.END_WARMUP_TR_MINUTE_DATA: {
       'ts_tag':RecoveryState.END_WARMUP_TR_MINUTE_DATA, 
-      'after_seconds': lambda: self.__seconds_to_finalize(RecoveryState.END_WARMUP_TR_MINUTE_DATA),
+      'after_seconds': lambda: 0 if self.__journal_span else self.__seconds_to_finalize(RecoveryState.END_WARMUP_TR_MINUTE_DATA),
       'func': []
       },
       RecoveryState.RECOVERED: {
@@ -118,14 +127,40 @@ class RecoveryManager():
       raw_df.to_csv(f"today_{code}_minute.csv", index=False)
 
   def __insert_today_minute_data_to_db(self):
+    if self.__journal_span:
+      self.__insert_today_minute_data_with_journal()
+      return
     self.get_time_manager().set_ts_pivot(self.get_time_manager().get_timestamp(RecoveryState.END_WARMUP_TR_MINUTE_DATA))
     self.__agent.get_logger().info(f"Recovery Pivot TS (floored to the minute) {self.get_time_manager().get_ts_pivot()=}")
-    for code, df in self.__today_minute_data.items():
-      self.__agent.minute_data_manager.today_minute_provider.insert_raw_dataframe_data(df, code, ts_end=self.get_time_manager().get_ts_pivot())
+    counts = self.__agent.minute_data_manager.today_minute_provider.ingest_raw_dataframes(self.__today_minute_data, ts_end=self.get_time_manager().get_ts_pivot())
+    self.__agent.get_logger().info(f"오늘 TR 분봉 삽입: {counts}")
     self.__agent.minute_data_manager.set_static_today_minute_data()
     self.__agent.minute_data_manager.finalize_pre_pivot_data()
     # self.__agent.combined_minute_data.hhmmssdic['static_minute_end'] = TimeManager.ts_to_str(self.get_time_manager().get_ts_pivot(), format="%H%M%S")
 
+  def __insert_today_minute_data_with_journal(self):
+    """
+    저널 재적재 후 복구
+    - 피봇: 저널 첫 틱의 분 (이후 분봉은 저널 + 실시간 틱으로 생성되므로 틱 단위로 정확)
+    - [장시작, 피봇): TR 분봉을 오늘 분봉 테이블에 삽입
+    - [저널 마지막 틱의 분, 실시간 재등록 시점의 분]: 틱이 유실된 구간이므로 TR 분봉으로 대체
+    """
+    first_hhmmss, last_hhmmss = self.__journal_span
+    self.get_time_manager().set_ts_pivot(TimeManager.hhmmss_to_ts(first_hhmmss))
+    ts_pivot = self.get_time_manager().get_ts_pivot()
+    ts_gap_from = TimeManager.ts_floor_time(TimeManager.hhmmss_to_ts(last_hhmmss))
+    ts_gap_end = TimeManager.ts_min_shift(self.get_time_manager().get_timestamp(RecoveryState.START_WARMUP_RT_EXECUTION), minutes=1, floor=True)
+    self.__agent.get_logger().info(f"Recovery with tick journal: {ts_pivot=}, gap=[{ts_gap_from}, {ts_gap_end})")
+
+    today_minute_provider = self.__agent.minute_data_manager.today_minute_provider
+    counts = today_minute_provider.ingest_raw_dataframes(self.__today_minute_data, ts_end=ts_pivot)
+    self.__agent.get_logger().info(f"오늘 TR 분봉 삽입: {counts}")
+    for code, df in self.__today_minute_data.items():
+      gap_df = today_minute_provider.filter_from_raw_data(df, code, ts_from=TimeManager.ts_min_shift(ts_gap_from, minutes=-1), ts_end=ts_gap_end)
+      self.__agent.minute_bar_builder.override_bars(code, gap_df)
+    self.__agent.minute_data_manager.set_static_today_minute_data()
+    self.__agent.minute_data_manager.finalize_pre_pivot_data()
+
   def get_effective_real_minutes_str(self):
     """
     dt = YmdHM00 형식의 문자열
@@ -383,22 +418,17 @@ class Account:
 
   def how_many_to_sell(self, code):
     """"매도가능수량"""
-    best_ask_price = self.__bid_ask_dict[code]['(최우선)매도호가'] # 최우선 매수호가가 곧 best_ask_price
+    best_ask_price = self.__bid_ask_dict[code].ask # (최우선)매도호가: 최우선 매수호가가 곧 best_ask_price
     return best_ask_price, self.__individual_asset_dict[code]['매매가능수량']
 
   def how_many_to_buy(self, code):
     """매수가능수량"""
-    best_bid_price = self.__bid_ask_dict[code]['(최우선)매도호가'] # 최우선 매도호가 가 곧 best_bid_price
+    best_bid_price = self.__bid_ask_dict[code].ask # (최우선)매도호가: 최우선 매도호가 가 곧 best_bid_price
     return best_bid_price, int(self.__d2deposit / (best_bid_price * (1+0.00015))) # TODO: 수수료 하드코딩 제거할 것
 
-  def update_real_time_bid_ask_price(self, real_data):
-    field_dic = RealType.REALTYPE['주식체결']
-    transform_dic = RealType.PostProcessing['주식체결']
-
-    code = real_data['code']
-    items = {tag:transform_dic[tag](real_data[fid]) for tag, fid in field_dic.items() if fid in real_data}
-
-    self.__bid_ask_dict[code] = items
+  def update_real_time_bid_ask_price(self, real_data:StockExecutionRecord):
+    # 디코딩된 레코드를 그대로 공유 (ask: (최우선)매도호가, bid: (최우선)매수호가)
+    self.__bid_ask_dict[real_data.code] = real_data
 
 class AgentState(IntEnum):
   INIT = 0 # 최초 상태
@@ -461,10 +491,14 @@ class CombinedMinuteData:
     self.__agent = agent
     self.__history_minute_provider = history_minute_provider # 어제까지 분봉데이터 (정적)
     self.__today_minute_provider = today_minute_provider # 오늘 분봉데이터 (정적)
+    # 재호출시 마지막으로 읽은 이후의 행만 조회하는 캐시
+    self.__history_cache = MinuteHistoryCache(history_minute_provider, lookback_days=agent.config_manager.get_realtime_info()['history_lookback_days'])
+    self.__today_cache = MinuteHistoryCache(today_minute_provider, lookback_days=0)
     self.__static_history_minute_data = None
     self.__static_today_minute_data = None
     self.__pre_pivot_data = {} # 피봇 전까지 정적 데이터
     self.__combined_data = {} # 결합데이터
+    self.__rollups = {} # 종목별 상위 해상도(5/15/60분, 일봉) 봉
     self.__ts_last_updated = None
     self.hhmmssdic = {
       'static_minute_end': '090000', # 정적 분봉데이터 마지막 시간 (미만)
@@ -484,16 +518,30 @@ class CombinedMinuteData:
   def combined_data(self):
     return self.__combined_data
 
+  def get_combined_data(self, st_code, resolution='1m'):
+    '''
+    resolution 해상도의 결합데이터: '1m' 또는 MultiResolutionBars.resolutions의 키 ('5m', '15m', '60m', '1d')
+    피봇 이전 데이터가 준비되기 전(finalize_pre_pivot_data 전)에는 ValueError
+    '''
+    if resolution != '1m' and resolution not in MultiResolutionBars.resolutions:
+      raise ValueError(f'Invalid resolution: {resolution}')
+    if st_code not in self.__pre_pivot_data:
+      raise ValueError(f'결합데이터가 아직 없음 (finalize_pre_pivot_data 전이거나 후보 종목이 아님): {st_code=}')
+    if resolution == '1m':
+      return self.__combined_data.get(st_code, self.__pre_pivot_data[st_code])
+    return self.__rollups[st_code].get_frame(resolution)
+
   def __get_last_inserted_ts(self):
     return max([v.index[-1] for k, v in self.__pre_pivot_data.items()])
       
   def set_static_history_minute_data(self):
-    # TODO: 기간 하드 코딩 수정 필요
-    self.__static_history_minute_data = self.__history_minute_provider.get_history_from_ndays_ago()
+    self.__history_cache.refresh()
+    self.__static_history_minute_data = self.__history_cache.get_history()
 
   def set_static_today_minute_data(self):
     # 수집한 분봉 데이터중 오늘 것만 로딩
-    self.__static_today_minute_data = self.__today_minute_provider.get_history_from_ndays_ago(n_days=0)
+    self.__today_cache.refresh()
+    self.__static_today_minute_data = self.__today_cache.get_history()
 
   def finalize_pre_pivot_data(self):
     '''
@@ -506,6 +554,9 @@ class CombinedMinuteData:
         self.__pre_pivot_data[st_code] = self.__static_history_minute_data[st_code]
       else:
         self.__pre_pivot_data[st_code] = pd.concat((self.__static_history_minute_data[st_code], self.__static_today_minute_data[st_code]), axis=0)
+      # 상위 해상도 봉은 여기서 한 번만 집계하고, 이후에는 확정된 1분봉으로 점진 갱신
+      self.__rollups[st_code] = MultiResolutionBars(st_code)
+      self.__rollups[st_code].seed(self.__pre_pivot_data[st_code])
     for st_code in map(lambda x: x[0], self.__agent.config_manager.retrieve_candidate_ETFs()):
       self.__agent.get_logger().info(f'PIVOT 이전 데이터 (실시간 반영 전 정적 데이터): {st_code=} {len(self.__pre_pivot_data[st_code])} / {self.__pre_pivot_data[st_code].index[-1]}')
 
@@ -517,6 +568,8 @@ class CombinedMinuteData:
       real_df = real_data.query(f"st_code == '{st_code}'").set_index('dt')
       if len(real_df) > 0:
         self.__combined_data[st_code] = pd.concat((self.__pre_pivot_data[st_code], real_df), axis=0)
+        if st_code in self.__rollups:
+          self.__rollups[st_code].update(real_df)
         self.__agent.get_logger().info(f'분봉데이터 실시간 업데이트 완료: {st_code=}, {len(self.__pre_pivot_data[st_code])} / {self.__pre_pivot_data[st_code].index[-1]} / {real_df.index[-1]}')
   
 class RTAgent:
@@ -527,6 +580,10 @@ class RTAgent:
     self.__timer = None
     self.__config_manager = config_manager
     self.__rt_data_provider = RealTimeTickDataPrivder.Factory(config_manager)
+    self.__minute_bar_builder = RealTimeMinuteBarBuilder()
+    self.__tick_journal = TickJournal.Factory(config_manager)
+    self.__latency_tracker = LatencyTracker()
+    self.__tick_sequencer = TickSequencer()
     self.__time_manager = TimeManager(fast_debug=False) 
     self.__market_state = MarketState.NOT_OPERATIONAL
     self.__launched_state = LaunchedTimingState.LAUNCHED_BEFORE_OPEN
@@ -567,11 +624,11 @@ class RTAgent:
     # TODO: 테스트 후 지울 것
     self.__test_is_done = False
 
-  def apply_real_time_market_status(self, real_data):
+  def apply_real_time_market_status(self, real_data:MarketStatusRecord):
     """
     실시간 '장시작시간' 처리
     """
-    status = real_data['215'].strip()
+    status = real_data.status
     if status == '0':
       self.__market_state = MarketState.BEFORE_OPEN
     elif status == '3':
@@ -585,15 +642,24 @@ class RTAgent:
 
     self.get_logger().info(real_data)
 
-  def apply_real_time_stock_price(self, real_data):
+  def apply_real_time_stock_price(self, real_data:StockExecutionRecord):
     """
     실시간 '주식체결' 처리
     """
     # self.get_logger().info(real_data)
-    self.__rt_data_provider.insert_by_dataframe(real_data)
+    ts_received = time.perf_counter_ns()
+    # 중복 틱은 버리고, 늦게 도착한 틱은 각 저장소의 slow path에서 해당 분봉만 보정된다.
+    if self.__tick_sequencer.classify(real_data) == TickSequencer.DUPLICATE:
+      return
+    if self.__tick_journal:
+      self.__tick_journal.append(real_data)
+    self.__rt_data_provider.insert_by_buffer(real_data)
+    self.__minute_bar_builder.update_by_real_data(real_data)
     self.__account.update_real_time_bid_ask_price(real_data)
+    self.__latency_tracker.mark('last_tick', ts_received)
+    self.__latency_tracker.record(LatencyTracker.TICK, time.perf_counter_ns() - ts_received)
 
-  def apply_real_time_index_price(self, real_data):
+  def apply_real_time_index_price(self, real_data:IndexPriceRecord):
     """
     실시간 '업종지수' 처리
     """
@@ -643,6 +709,18 @@ class RTAgent:
   def rt_data_provider(self):
     return self.__rt_data_provider
 
+  @property
+  def minute_bar_builder(self):
+    return self.__minute_bar_builder
+
+  @property
+  def latency_tracker(self):
+    return self.__latency_tracker
+
+  @property
+  def tick_sequencer(self):
+    return self.__tick_sequencer
+
   @property
   def market_state(self):
     return self.__market_state
@@ -685,7 +763,7 @@ class RTAgent:
     return str(self.__account)
 
   def get_today_etf_minute_data(self, code):
-    dic = {'종목코드': code, 'output': "주식분봉차트조회", '수정주가구분': "1", '틱범위': "1", 'next':0}
+    dic = {'종목코드': code, 'output': "주식분봉차트조회", '수정주가구분': "1", '틱범위': "1", 'next':0, 'priority': TRScheduler.RECOVERY}
     df = self.__rt.block_TR_request("opt10080", **dic)
     return df
 
@@ -697,7 +775,9 @@ class RTAgent:
 
     _, ask_quantity = ask_request_info
 
-    ret_code = self.__rt.SendOrder("시장가매도", "0301", self.__account.acc_no, 2, code, ask_quantity, 0, "03", "")
+    with self.__latency_tracker.span(LatencyTracker.ORDER):
+      ret_code = self.__rt.SendOrder("시장가매도", "0301", self.__account.acc_no, 2, code, ask_quantity, 0, "03", "")
+    self.__record_tick_to_order()
     self.get_logger().info(f"매도주문: {code} {ask_quantity=} => f{self.__rt.kiwoom_errors[ret_code]=}")
 
   def try_to_buy(self, code, bid_request_info):
@@ -707,9 +787,19 @@ class RTAgent:
     """
     bid_price, bid_quantity = bid_request_info
 
-    ret_code = self.__rt.SendOrder("지정가매수", "0301", self.__account.acc_no, 1, code, bid_quantity, bid_price, "00", "")
+    with self.__latency_tracker.span(LatencyTracker.ORDER):
+      ret_code = self.__rt.SendOrder("지정가매수", "0301", self.__account.acc_no, 1, code, bid_quantity, bid_price, "00", "")
+    self.__record_tick_to_order()
     self.get_logger().info(f"매수주문: {code} {self.account.d2deposit=}, {bid_price=}, {bid_quantity=} => f{self.__rt.kiwoom_errors[ret_code]=}")
 
+  def __record_tick_to_order(self):
+    """
+    주문을 낸 ActionManager의 결정 시점 틱부터 주문까지 (decision_tick 마크는 매분 갱신되므로 쓰지 않는다)
+    """
+    decision_tick_ns = self.__action_manager.decision_tick_ns if self.__action_manager else None
+    if decision_tick_ns is not None:
+      self.__latency_tracker.record(LatencyTracker.TICK_TO_ORDER, time.perf_counter_ns() - decision_tick_ns)
+
   def __test_buy_and_sell(self):
     """
     매수-매도 테스트
@@ -721,12 +811,15 @@ class RTAgent:
     """
     grpc 서버로부터 받은 예측 결과를 처리
     """
-    tag, prob = sorted(prediction_dic.items(), key=lambda x: x[1])[-1]
-    if not self.__action_manager:
-      self.get_logger().info(f"Decision from Server: {tag=}, {prob=}")
-      self.__action_manager = ActionManager(self, tag)
-    else:
-      self.get_logger().info(f"이미 ActionManager가 존재!!! 이번 응답 무시함. ")
+    with self.__latency_tracker.span(LatencyTracker.DECISION):
+      tag, prob = sorted(prediction_dic.items(), key=lambda x: x[1])[-1]
+      if not self.__action_manager:
+        self.get_logger().info(f"Decision from Server: {tag=}, {prob=}")
+        self.__action_manager = ActionManager(self, tag)
+        self.__action_manager.decision_tick_ns = self.__latency_tracker.get_mark('decision_tick')
+      else:
+        self.get_logger().info(f"이미 ActionManager가 존재!!! 이번 응답 무시함. ")
+    self.__latency_tracker.record_since(LatencyTracker.TICK_TO_DECISION, 'decision_tick')
 
   def update_deposit(self):
     dic = {"계좌번호":self.login_info['account_nos'][0], "비밀번호":"0000", "비밀번호입력매체구분":"00", "조회구분":1}
@@ -756,7 +849,6 @@ class RTAgent:
 
     while self.__rt.tr_remained:
       dic['next'] = 2
-      time.sleep(1)
       df = self.__rt.block_TR_request("opw00018", **dic)
       dfs.append(df)
     
@@ -781,8 +873,16 @@ class RTAgent:
     # 프로그램 강제 종료 조건
     if self.__market_state == MarketState.AFTER_CLOSE:
       self.get_logger().info(f"장 마감으로 인한 프로그램 종료: {TimeManager.get_now()}")
+      self.__latency_tracker.dump(self.get_logger())
+      self.get_logger().info(self.__tick_sequencer.format_summary())
+      self.get_logger().info(self.__rt.tr_scheduler.format_summary())
+      if self.__tick_journal:
+        self.__tick_journal.close()
+        self.archive_today_ticks()
       sys.exit(0)
 
+    self.__latency_tracker.dump_if_due(self.get_logger())
+
     # 복구 매니저가 필요하면 이에 대한 디스패치 수행
     if self.__recovery_manager:
       self.__recovery_manager.dispatch_request()
@@ -812,8 +912,14 @@ class RTAgent:
         # self.get_logger().info(f"{df.iloc[0]['cnt']} real tick rows are inserted.")
         if ts_end - ts_from >= pd.Timedelta(1, unimt='m'):
           self.get_logger().info(f"[실시간 분봉 계산 범위: {ts_from}, {ts_end})")
-          from_pivot_df = self.__rt_data_provider.make_minute_chart_df(ts_from, ts_end)
-          self.minute_data_manager.update_minute_data_realtime(from_pivot_df)
+          # 이번 분의 결정은 분봉 확정 직전에 받은 마지막 틱부터 측정
+          if self.__latency_tracker.get_mark('last_tick') is not None:
+            self.__latency_tracker.mark('decision_tick', self.__latency_tracker.get_mark('last_tick'))
+          # 틱 테이블을 다시 스캔하지 않고, 실시간으로 확정된 분봉을 사용
+          with self.__latency_tracker.span(LatencyTracker.BAR_SEAL):
+            from_pivot_df = self.__minute_bar_builder.make_minute_chart_df(ts_from, ts_end)
+          with self.__latency_tracker.span(LatencyTracker.COMBINED_UPDATE):
+            self.minute_data_manager.update_minute_data_realtime(from_pivot_df)
           # self.minute_data_manager.get_combined_data('069500')[-400:].to_csv('probe_realtime_minute.csv')
           # self.get_logger().info(from_pivot_df)
 
@@ -824,6 +930,36 @@ class RTAgent:
             response = request.send_and_wait()
             self.treat_response(response)
 
+  def archive_today_ticks(self):
+    """
+    장 마감 후 오늘 틱 저널을 일자/종목별 컬럼형 아카이브로 압축 저장
+    """
+    tick_archive = TickArchive.Factory(self.__config_manager)
+    if not self.__tick_journal or not tick_archive:
+      return
+    yyyymmdd = TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d')
+    num_written = tick_archive.write_day(yyyymmdd, TickJournal.load(self.__tick_journal.path))
+    self.get_logger().info(f"틱 아카이브 저장: {yyyymmdd=} {num_written}")
+
+  def __replay_tick_journal(self):
+    """
+    장중 재기동: 오늘 틱 저널을 실시간 저장소/분봉 생성기에 재적재
+    재적재한 구간 (첫 틱 HHMMSS, 마지막 틱 HHMMSS) 반환 (없으면 None)
+    """
+    if not self.__tick_journal:
+      return None
+    records = TickJournal.to_records(TickJournal.load(self.__tick_journal.path))
+    if not records:
+      return None
+    for record in records:
+      self.__tick_sequencer.classify(record)
+      self.__rt_data_provider.insert_by_buffer(record)
+      self.__minute_bar_builder.update_by_real_data(record)
+    self.__rt_data_provider.flush()
+    journal_span = (min(r.hhmmss for r in records), max(r.hhmmss for r in records))
+    self.get_logger().info(f"틱 저널 재적재: {len(records)} ticks, {journal_span=}")
+    return journal_span
+
   ## 콜백 함수들
   ## TODO: 필요한 콜백만 추가
   def on_ready(self):
@@ -865,7 +1001,6 @@ class RTAgent:
 
     while self.__rt.tr_remained:
       dic['next'] = 2
-      time.sleep(1)
       df = self.__rt.block_TR_request("opw00018", **dic)
       dfs.append(df)
     
@@ -883,7 +1018,6 @@ class RTAgent:
 
     while self.__rt.tr_remained:
       dic['next'] = 2
-      time.sleep(1)
       df = self.__rt.block_TR_request("opt10075", **dic)
       dfs.append(df)
 
@@ -901,12 +1035,12 @@ class RTAgent:
       # TODO: 디버깅 목적으로 남겨둠; 제거 필요
       # 임의 때나 실행시켜도 정상 실행인 것처럼 취급하기 위함: 
       self.__launched_state = LaunchedTimingState.LAUNCHED_BEFORE_OPEN
-      self.apply_real_time_market_status({'215':'3'})
+      self.apply_real_time_market_status(MarketStatusRecord(RealtimeRequestItem.dummy_code, status='3'))
     elif self.__time_manager.get_timestamp('MainStageEntered') > self.__time_manager.when_to_open():
       self.get_logger().warning(f"Recovery needed...{self.__time_manager.get_timestamp('MainStageEntered')} / {self.__time_manager.when_to_open()}")
       self.__market_state = MarketState.OPEN
       self.__launched_state = LaunchedTimingState.LAUNCHED_AFTER_OPEN
-      self.__recovery_manager = RecoveryManager(self)
+      self.__recovery_manager = RecoveryManager(self, journal_span=self.__replay_tick_journal())
     else:
       self.__launched_state = LaunchedTimingState.LAUNCHED_BEFORE_OPEN
       # self.apply_real_time_market_status({'215':'3'})
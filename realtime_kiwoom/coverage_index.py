@@ -0,0 +1,244 @@
+from __future__ import annotations
+import os
+import numpy as np
+import pandas as pd
+from miscs.time_manager import TimeManager
+from realtime_kiwoom.storage_backend import epoch_minutes_to_index, kst_day_numbers, day_number_to_ts
+
+minutes_per_day = 1440
+
+def session_grid(opens, closes, closing_auction_minutes=10):
+  '''
+  개장일별 기대 분 격자 (UTC epoch 분, 분 시작 시간 기준)
+  - [장 시작, 장 종료] 1분 간격, 장 마감 동시호가 [종료 - closing_auction_minutes, 종료)는 체결이 없으므로 제외
+  opens, closes: 개장일별 UTC epoch 분 배열
+  반환: (grid, session, position) - 격자 분, 격자가 속한 개장일 순번, 개장일 안에서의 비트 위치
+  '''
+  opens, closes = np.asarray(opens, dtype=np.int64), np.asarray(closes, dtype=np.int64)
+  lengths = closes - opens + 1
+  session = np.repeat(np.arange(len(opens)), lengths)
+  grid = np.repeat(opens, lengths) + (np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+  if closing_auction_minutes > 0:
+    close = np.repeat(closes, lengths)
+    keep = (grid < close - closing_auction_minutes) | (grid >= close)
+    grid, session = grid[keep], session[keep]
+  starts = np.searchsorted(session, np.arange(len(opens)), side='left')
+  return grid, session, np.arange(len(grid)) - starts[session]
+
+class CoverageIndex:
+  """
+  분봉 테이블의 종목별/개장일별 커버리지 비트맵 (XKRX 거래 분 격자 기준)
+  - 격자는 TimeManager의 거래소 달력(exchange_calendars)에서 만든다. (session_grid 참고)
+  - 저장된 dt와 격자를 집합 연산(np.isin)으로 비교하여 (종목, 날짜)마다 비트맵(np.packbits, 격자 순서) + 기대/보유/중복/격자 밖 행 수를 남긴다.
+    격자 밖 행은 개장일이 아닌 날의 행, 동시호가 구간의 행, 초 단위가 0이 아닌 행이다. (개장일이 아닌 날은 expected=0인 행으로 남긴다)
+  - 파일: .npz 하나 (쓰기는 임시 파일 + os.replace), update()는 다시 계산한 날짜의 행만 교체한다.
+  - 사용처: 수집기의 빈 구간 백필 (missing_ranges), 학습 전 점검 (preflight)
+  """
+  count_columns = ['expected', 'present', 'duplicates', 'extra']
+
+  def __init__(self, path, time_manager:TimeManager=None, closing_auction_minutes=10):
+    self.path = path
+    self.closing_auction_minutes = closing_auction_minutes
+    self.__time_manager = time_manager
+    self.__records = None # DataFrame: st_code, day, open, close, expected, present, duplicates, extra
+    self.__bits = None # (행 수, 바이트 수) uint8
+
+  @property
+  def time_manager(self):
+    # 달력 초기화가 느리므로 필요할 때 만든다.
+    if self.__time_manager is None:
+      self.__time_manager = TimeManager()
+    return self.__time_manager
+
+  def sessions(self, day_from, day_to):
+    '''
+    [day_from, day_to] 날짜 번호 사이 개장일: (날짜 번호, 장 시작 분, 장 종료 분) 배열
+    '''
+    schedule = self.time_manager.get_sessions(day_number_to_ts(day_from).tz_localize(None), day_number_to_ts(day_to).tz_localize(None))
+    opens = schedule['open'].values.astype('datetime64[m]').astype('int64')
+    closes = schedule['close'].values.astype('datetime64[m]').astype('int64')
+    return kst_day_numbers(opens), opens, closes
+
+  def load(self):
+    '''
+    파일에서 읽기 (없으면 빈 인덱스), 동시호가 설정이 다르면 버린다.
+    '''
+    self.__records = pd.DataFrame({
+      'st_code': pd.Series(dtype=object), 'day': pd.Series(dtype='int64'), 'open': pd.Series(dtype='int64'), 'close': pd.Series(dtype='int64'),
+      **{col: pd.Series(dtype='int64') for col in CoverageIndex.count_columns},
+    })
+    self.__bits = np.zeros((0, 0), dtype=np.uint8)
+    if os.path.exists(self.path):
+      with np.load(self.path) as npz:
+        if int(npz['closing_auction_minutes']) == self.closing_auction_minutes:
+          self.__records = pd.DataFrame({col: npz[col] if col != 'st_code' else npz[col].astype(object) for col in self.__records.columns})
+          self.__bits = npz['bits']
+    return self
+
+  def records(self):
+    if self.__records is None:
+      self.load()
+    return self.__records
+
+  def save(self):
+    records = self.records()
+    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+    tmp_path = f'{self.path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+      np.savez(f,
+        closing_auction_minutes=np.int64(self.closing_auction_minutes), bits=self.__bits,
+        **{col: records[col].to_numpy(dtype=str if col == 'st_code' else np.int64) for col in records.columns})
+    os.replace(tmp_path, self.path)
+
+  def compute(self, code, minutes, aligned, day_numbers, opens, closes):
+    '''
+    종목 하나: 저장된 dt와 개장일 격자 비교
+    minutes: 정렬된 UTC epoch 분 (분 미만 내림), aligned: 분 미만이 0인지 (아니면 격자 밖), day_numbers/opens/closes: 비교할 개장일
+    반환: (records DataFrame, bits)
+    '''
+    grid, session, position = session_grid(opens, closes, self.closing_auction_minutes)
+    # 중복: 정렬된 분에서 앞 행과 같은 분
+    duplicated = np.r_[False, minutes[1:] == minutes[:-1]]
+    unique = minutes[~duplicated & aligned]
+    present = np.isin(grid, unique, assume_unique=True)
+    extra = np.r_[~np.isin(unique, grid, assume_unique=True), np.ones((~aligned).sum(), dtype=bool)]
+    extra_days = kst_day_numbers(np.r_[unique, minutes[~aligned]][extra])
+    dup_days = kst_day_numbers(minutes[duplicated & aligned])
+
+    lengths = np.bincount(session, minlength=len(opens))
+    matrix = np.zeros((len(opens), max(int(lengths.max()) if len(lengths) else 0, 1)), dtype=bool)
+    matrix[session, position] = present
+    # 개장일이 아닌 날의 격자 밖 행도 남긴다.
+    other_days = np.setdiff1d(np.unique(np.r_[extra_days, dup_days]), day_numbers)
+    days = np.r_[day_numbers, other_days]
+    records = pd.DataFrame({
+      'st_code': code, 'day': days,
+      'open': np.r_[opens, np.zeros(len(other_days), dtype=np.int64)], 'close': np.r_[closes, np.zeros(len(other_days), dtype=np.int64)],
+      'expected': np.r_[lengths, np.zeros(len(other_days), dtype=np.int64)],
+      'present': np.r_[np.bincount(session, weights=present, minlength=len(opens)).astype(np.int64), np.zeros(len(other_days), dtype=np.int64)],
+    })
+    order = np.argsort(days, kind='stable')
+    records['duplicates'] = np.bincount(np.searchsorted(days[order], dup_days), minlength=len(days))[np.argsort(order)] if len(days) else []
+    records['extra'] = np.bincount(np.searchsorted(days[order], extra_days), minlength=len(days))[np.argsort(order)] if len(days) else []
+    bits = np.packbits(np.r_[matrix, np.zeros((len(other_days), matrix.shape[1]), dtype=bool)], axis=1)
+    return records, bits
+
+  def update(self, provider, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None, read_days=30, save=True):
+    '''
+    [ts_from, ts_end)에 걸친 날짜들을 테이블에서 다시 읽어서 (read_days 일씩) 해당 (종목, 날짜) 행을 교체
+    provider: MinuteChartDataProvider, ts_end가 None이면 오늘까지
+    반환: 다시 계산한 행 (report 형태)
+    '''
+    ts_end = TimeManager.ts_day_shift(TimeManager.get_now(), days=1, floor=True) if ts_end is None else ts_end
+    day_from = int(kst_day_numbers(TimeManager.ts_to_epoch_minutes(ts_from)))
+    day_end = int(kst_day_numbers(TimeManager.ts_to_epoch_minutes(ts_end) - 1)) + 1 # [day_from, day_end)
+    frames, bit_frames = [], []
+    for w_from in range(day_from, day_end, read_days):
+      w_end = min(w_from + read_days, day_end)
+      day_numbers, opens, closes = self.sessions(w_from, w_end - 1)
+      history = provider.read_history_range(day_number_to_ts(w_from), day_number_to_ts(w_end), codes=codes)
+      for code in codes:
+        ns = history[code].index.asi8
+        records, bits = self.compute(code, ns // 60_000_000_000, ns % 60_000_000_000 == 0, day_numbers, opens, closes)
+        frames.append(records)
+        bit_frames.append(bits)
+    if not frames:
+      return self.report(codes, ts_from, ts_end)
+    self.merge(pd.concat(frames, ignore_index=True), bit_frames, codes, day_from, day_end)
+    if save:
+      self.save()
+    return self.report(codes, day_number_to_ts(day_from), day_number_to_ts(day_end))
+
+  def merge(self, new_records, bit_frames, codes, day_from, day_end):
+    '''
+    codes의 [day_from, day_end) 행을 새로 계산한 행으로 교체 (비트맵 폭은 넓은 쪽에 맞춘다)
+    '''
+    records = self.records()
+    keep = ~(records['st_code'].isin(codes) & (records['day'] >= day_from) & (records['day'] < day_end)).values
+    width = max([self.__bits.shape[1]] + [bits.shape[1] for bits in bit_frames])
+    pad = lambda bits: np.pad(bits, ((0, 0), (0, width - bits.shape[1])))
+    merged = pd.concat((records[keep], new_records), ignore_index=True)
+    bits = np.concatenate([pad(self.__bits[keep])] + [pad(bits) for bits in bit_frames])
+    order = np.lexsort((merged['day'].values, merged['st_code'].values.astype(str)))
+    self.__records = merged.iloc[order].reset_index(drop=True)
+    self.__bits = bits[order]
+
+  def report(self, codes=None, ts_from:pd.Timestamp=None, ts_end:pd.Timestamp=None):
+    '''
+    (종목, 날짜)별 커버리지: st_code, date, expected, present, missing, duplicates, extra, ratio
+    '''
+    records = self.records()
+    ii = np.ones(len(records), dtype=bool)
+    if codes is not None:
+      ii &= records['st_code'].isin(codes).values
+    if ts_from is not None:
+      ii &= (records['day'] >= kst_day_numbers(TimeManager.ts_to_epoch_minutes(ts_from))).values
+    if ts_end is not None:
+      ii &= (records['day'] < kst_day_numbers(TimeManager.ts_to_epoch_minutes(ts_end) - 1) + 1).values
+    df = records[ii].drop(columns=['open', 'close']).reset_index(drop=True)
+    df.insert(1, 'date', pd.to_datetime(df.pop('day').values * minutes_per_day, unit='m').date)
+    df.insert(df.columns.get_loc('present') + 1, 'missing', df['expected'] - df['present'])
+    df['ratio'] = (df['present'] / df['expected'].where(df['expected'] > 0)).fillna(1.0)
+    return df
+
+  def missing_minutes(self, code, date):
+    '''
+    (종목, 날짜)의 빠진 분 (DatetimeIndex, 서울시), 인덱스에 없는 개장일이면 격자 전체
+    '''
+    return epoch_minutes_to_index(self.__missing_grid(code, date)[0])
+
+  def __missing_grid(self, code, date):
+    '''
+    (빠진 분, 격자 위치): 격자 위치가 이어지면 동시호가 구간을 사이에 두어도 연속 구간이다.
+    '''
+    day = int(kst_day_numbers(TimeManager.ts_to_epoch_minutes(pd.Timestamp(date).tz_localize('Asia/Seoul'))))
+    records = self.records()
+    ii = np.flatnonzero(((records['st_code'] == code) & (records['day'] == day)).values)
+    if len(ii) > 0:
+      opens, closes = records['open'].values[ii], records['close'].values[ii]
+      present = np.unpackbits(self.__bits[ii[0]])
+    else:
+      _, opens, closes = self.sessions(day, day)
+      present = np.zeros(0, dtype=np.uint8)
+    grid, _, position = session_grid(opens, closes, self.closing_auction_minutes)
+    missing = np.pad(present, (0, max(len(grid) - len(present), 0)))[position] == 0
+    return grid[missing], position[missing]
+
+  def missing_ranges(self, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    '''
+    [ts_from, ts_end) 개장일 중 빠진 분을 연속 구간으로 묶어서: DataFrame(st_code, ts_from, ts_end) ([ts_from, ts_end))
+    인덱스에 없는 개장일은 하루 전체가 빠진 것으로 본다.
+    '''
+    ranges = []
+    for row in self.preflight(codes, ts_from, ts_end).itertuples():
+      minutes, position = self.__missing_grid(row.st_code, row.date)
+      if len(minutes) == 0:
+        continue
+      breaks = np.flatnonzero(np.diff(position) != 1)
+      for begin, end in zip(np.r_[0, breaks + 1], np.r_[breaks, len(minutes) - 1]):
+        ranges.append((row.st_code, TimeManager.epoch_minutes_to_ts(int(minutes[begin])), TimeManager.epoch_minutes_to_ts(int(minutes[end]) + 1)))
+    return pd.DataFrame(ranges, columns=['st_code', 'ts_from', 'ts_end'])
+
+  def preflight(self, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None, max_missing_ratio=0.0, allow_duplicates=False):
+    '''
+    학습 전 점검: [ts_from, ts_end) 개장일 중 기준을 넘는 (종목, 날짜) 목록 (비어 있으면 통과)
+    - 빠진 분 비율 > max_missing_ratio 또는 (allow_duplicates가 아니면) 중복 분이 있는 날
+    - 인덱스에 없는 개장일은 하루 전체가 빠진 것으로 본다. (update()를 먼저 호출할 것)
+    '''
+    ts_end = TimeManager.ts_day_shift(TimeManager.get_now(), days=1, floor=True) if ts_end is None else ts_end
+    day_from = int(kst_day_numbers(TimeManager.ts_to_epoch_minutes(ts_from)))
+    day_end = int(kst_day_numbers(TimeManager.ts_to_epoch_minutes(ts_end) - 1)) + 1
+    day_numbers, opens, closes = self.sessions(day_from, day_end - 1)
+    lengths = np.bincount(session_grid(opens, closes, self.closing_auction_minutes)[1], minlength=len(opens))
+    expected = pd.DataFrame({
+      'st_code': np.repeat(list(codes), len(day_numbers)), 'day': np.tile(day_numbers, len(codes)), 'grid': np.tile(lengths, len(codes)),
+    })
+    records = self.records()
+    df = expected.merge(records[['st_code', 'day'] + CoverageIndex.count_columns], on=['st_code', 'day'], how='left')
+    df['expected'] = df['expected'].fillna(df.pop('grid')).astype('int64')
+    df[['present', 'duplicates', 'extra']] = df[['present', 'duplicates', 'extra']].fillna(0).astype('int64')
+    df.insert(1, 'date', pd.to_datetime(df.pop('day').values * minutes_per_day, unit='m').date)
+    df.insert(df.columns.get_loc('present') + 1, 'missing', df['expected'] - df['present'])
+    df['ratio'] = (df['present'] / df['expected'].where(df['expected'] > 0)).fillna(1.0)
+    bad = (df['missing'] > max_missing_ratio * df['expected']) | ((df['duplicates'] > 0) if not allow_duplicates else False)
+    return df[bad].reset_index(drop=True)
@@ -1,104 +1,127 @@
 from __future__ import annotations
-# from abc import *
+from abc import *
 from sqlite3 import Time
+import numpy as np
 import pandas as pd
 import os
-from sqlalchemy import create_engine
+import time
 from miscs.config_manager import ConfigManager
 from miscs.time_manager import TimeManager
+from realtime_kiwoom.history_snapshot import HistorySnapshotCache
+from realtime_kiwoom.coverage_index import CoverageIndex
+from realtime_kiwoom.storage_backend import StorageBackend, SQLiteStorageBackend, QueryBaseStrings, dt_str_to_epoch_minutes, kst_day_numbers
+from realtime_kiwoom.rollup import rollup_resolutions
+from realtime_kiwoom.kiwoom_type import StockExecutionRecord
 
-class QueryBaseStrings:
-  table_create_query = '''
-  CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
-    st_code TEXT not NULL,
-    dt TEXT not NULL,
-    open INTEGER,
-    high INTEGER,
-    low INTEGER,
-    close INTEGER,
-    volume INTEGER
-  )
-  '''
-  index_create_query = '''
-  CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {TABLE_NAME} (st_code ASC, dt ASC)
-  '''
-
-  insert_query = '''
-  INSERT INTO {TABLE_NAME} (st_code, dt, open, high, low, close, volume)
-  VALUES (?, ?, ?, ?, ?, ?, ?)
-  '''
-
-  drop_table_query = '''
-  DROP TABLE IF EXISTS {TABLE_NAME}
-  '''
-
-  drop_index_query = '''
-  DROP INDEX IF EXISTS {INDEX_NAME}
-  '''
-
-class DataProviderBase():
-
-  def __init__(self, config_manager:ConfigManager, db_path, table_name, index_name=None, drop_table=False):
+class DataProviderBase(metaclass=ABCMeta):
+
+  def __init__(self, config_manager:ConfigManager, db_path, table_name, drop_table=False, backend='sqlite'):
+    """
+    backend: 'sqlite' | 'duckdb' | 'numpy' 또는 StorageBackend 객체
+    """
     self.config_manager = config_manager
     self.db_name = db_path
     self.table_name = table_name
-    self.index_name = index_name
-    self.table_create_query = QueryBaseStrings.table_create_query.format(TABLE_NAME=table_name)
-    self.index_create_query = QueryBaseStrings.index_create_query.format(INDEX_NAME=index_name, TABLE_NAME=table_name)
-    self.insert_query = QueryBaseStrings.insert_query.format(TABLE_NAME=table_name)
-    self.drop_table_query = QueryBaseStrings.drop_table_query.format(TABLE_NAME=table_name)
-    self.drop_index_query = QueryBaseStrings.drop_index_query.format(INDEX_NAME=index_name)
+    if isinstance(backend, StorageBackend):
+      self.backend = backend
+    else:
+      self.backend = StorageBackend.Factory(backend, db_path, pragmas=config_manager.get_sqlite_pragmas() if config_manager is not None else None)
 
-    self.with_index = False if self.index_name is None or self.index_name == '' else True
+    # SQLite: 스레드마다 오래 유지하는 연결 (PRAGMA + 문장 캐시), engine은 같은 연결을 쓴다. (to_sql, 노트북 호환용)
+    self.connections = self.backend.connections if isinstance(self.backend, SQLiteStorageBackend) else None
+    self.engine = self.backend.engine if isinstance(self.backend, SQLiteStorageBackend) else None
 
-    self.engine = self.get_engine()
-
-    if drop_table:
-      self.clear_table()
-    self.create_table()
+    self.create_table(drop_table)
 
     self.today = pd.Timestamp.today(tz='Asia/Seoul').date()
 
   def is_in_memory_db(self, db_name):
     return db_name == ':memory:'
 
-  def get_engine(self):
-    return create_engine("sqlite://") if self.is_in_memory_db(self.db_name) else create_engine("sqlite:///" + self.db_name)
+  @abstractmethod
+  def create_table(self, drop_table=False):
+    pass
 
-  def create_table(self):
-    with self.engine.connect() as connection:
-      connection.execute(self.table_create_query)
-      if self.with_index:
-        connection.execute(self.index_create_query)   
+  def query(self, query_string, params=()):
+    '''
+    params: ? 자리에 들어갈 값 (SQL 문자열이 같으면 캐시된 문장을 다시 쓴다), SQL 백엔드(sqlite, duckdb)만 지원
+    '''
+    return self.backend.query(query_string, params)
 
-  def clear_table(self):
-    with self.engine.connect() as connection:
-      connection.execute(self.drop_table_query)
-      if self.with_index:
-        connection.execute(self.drop_index_query) 
+  def close(self):
+    self.backend.close()
 
-  def query(self, query_string):
-    with self.engine.connect() as connection:
-      return pd.read_sql_query(query_string, connection) 
+class HistoryChunk:
+  """
+  MinuteChartDataProvider.iter_history_range가 내주는 조각
+  - df: 앞의 num_lookback 행은 같은 종목의 직전 조각에서 이어 붙인 행 (롤링 지표 계산용), 나머지가 이번 조각
+  """
+  __slots__ = ('code', 'df', 'num_lookback')
 
+  def __init__(self, code, df:pd.DataFrame, num_lookback=0):
+    self.code = code
+    self.df = df
+    self.num_lookback = num_lookback
+
+  @property
+  def body(self):
+    '''
+    이어 붙인 행을 뺀 이번 조각
+    '''
+    return self.df.iloc[self.num_lookback:]
+
+  def __repr__(self):
+    return f'HistoryChunk(code={self.code!r}, rows={len(self.df) - self.num_lookback}, num_lookback={self.num_lookback})'
 
 class MinuteChartDataProvider(DataProviderBase):
+  raw_columns = {'체결시간': 'dt', '시가': 'open', '고가': 'high', '저가': 'low', '현재가': 'close', '거래량': 'volume'}
 
   @staticmethod
   def Factory(config_manager: ConfigManager, tag='history'):
     """
-    Factory method: MinuteChartDataProvider 객체 생성
+    Factory method: MinuteChartDataProvider 객체 생성 (저장소 백엔드는 설정의 DBMS/backend)
     """
     table_info = config_manager.get_tables()
-    return MinuteChartDataProvider(
+    storage = config_manager.get_storage_backend()
+    provider = MinuteChartDataProvider(
       config_manager,
-      db_path=os.path.join(config_manager.get_work_path(), config_manager.get_database()['database']), 
+      db_path=os.path.join(config_manager.get_work_path(), storage['database']) if storage['database'] else ':memory:',
       table_name=table_info[tag]['table_name'], 
-      drop_table=table_info[tag]['drop_table']
+      drop_table=table_info[tag]['drop_table'],
+      schema_version=table_info[tag]['schema'],
+      backend=storage['backend'],
+      rollups=table_info[tag]['rollups'],
     )
+    if table_info[tag]['snapshot_path']:
+      provider.snapshot_cache = HistorySnapshotCache(provider, os.path.join(config_manager.get_work_path(), table_info[tag]['snapshot_path']))
+    if table_info[tag]['coverage_path']:
+      provider.coverage_index = CoverageIndex(os.path.join(config_manager.get_work_path(), table_info[tag]['coverage_path']))
+    return provider
+
+  def __init__(self, config_manager, db_path, table_name, drop_table=True, schema_version='v1', backend='sqlite', rollups=None):
+    """
+    schema_version: (sqlite) 테이블이 없을 때 만들 스키마 ('v1': TEXT dt + 유일 인덱스, 'v2': 정수 키 WITHOUT ROWID)
+    이미 있는 테이블은 실제 스키마를 감지해서 읽고 쓴다.
+    rollups: 분봉 테이블 옆에 유지할 롤업 해상도 ('5m', '15m', '60m', '1d' 중), 삽입할 때마다 영향받은 날짜의 버킷만 다시 집계
+    """
+    self.preferred_schema_version = schema_version
+    self.rollups = [res for res in rollup_resolutions if res in (rollups or [])]
+    super().__init__(config_manager, db_path, table_name, drop_table=drop_table, backend=backend)
+    self.snapshot_cache = None # 설정되어 있으면 히스토리 조회는 스냅샷에서 읽는다.
+    self.ingest_listeners = [] # 적재 후 on_minutes_ingested(df, counts, changed)를 호출할 캐시 (MinuteHistoryCache)
+    self.coverage_index = None # 설정되어 있으면 수집기가 적재 후 갱신한다. (빈 구간 백필, 학습 전 점검)
+
+  @property
+  def schema_version(self):
+    '''
+    sqlite: 'v1' | 'v2', 그 외: 백엔드 이름
+    '''
+    return self.backend.minute_schema_version(self.table_name)
 
-  def __init__(self, config_manager, db_path, table_name, drop_table=True):
-    super().__init__(config_manager, db_path, table_name, index_name=f'idx_{table_name}', drop_table=drop_table)
+  def create_table(self, drop_table=False):
+    self.backend.create_minute_table(self.table_name, drop=drop_table, schema_version=self.preferred_schema_version)
+    if self.rollups:
+      self.backend.create_rollup_tables(self.table_name, self.rollups, drop=drop_table)
 
   def filter_from_raw_data(self, raw_df, code, ts_from:pd.Timestamp=None, ts_end:pd.Timestamp=None):
     """
@@ -127,66 +150,270 @@ class MinuteChartDataProvider(DataProviderBase):
     """
     마지막으로 입력된 시간을 반환
     """
-    last_dt = self.query(f"SELECT dt FROM {self.table_name} WHERE st_code='{code}' ORDER BY dt DESC LIMIT 1")
-    return TimeManager.str_to_ts(last_dt['dt'].values[0] if len(last_dt) != 0 else '19700101000000')
+    ts_last = self.backend.last_minute_ts(self.table_name, code)
+    return ts_last if ts_last is not None else TimeManager.str_to_ts('19700101000000')
+
+  @staticmethod
+  def convert_raw_dataframes(raw_frames:dict, ts_from:pd.Timestamp=None, ts_end:pd.Timestamp=None):
+    """
+    여러 종목의 TR 분봉 원본 {code: raw_df}을 한 번에 변환: 부호 붙은 문자열 컬럼을 한 번의 astype/abs로 정수화
+    [ts_from, ts_end) 구간만 남긴다. (dt 문자열 비교)
+    반환: st_code, dt('YYYYMMDDHHMMSS'), open, high, low, close, volume
+    """
+    frames = [raw_df[list(MinuteChartDataProvider.raw_columns)].assign(st_code=code) for code, raw_df in raw_frames.items() if len(raw_df) > 0]
+    if not frames:
+      return pd.DataFrame(columns=['st_code'] + list(MinuteChartDataProvider.raw_columns.values()))
+    raw = pd.concat(frames, ignore_index=True).rename(columns=MinuteChartDataProvider.raw_columns)
+    df = raw[['open', 'high', 'low', 'close', 'volume']].astype('int64').abs()
+    df.insert(0, 'dt', raw['dt'].values)
+    df.insert(0, 'st_code', raw['st_code'].values)
+    ii = np.ones(len(df), dtype=bool)
+    if ts_from is not None:
+      ii &= (df['dt'] >= TimeManager.ts_to_str(ts_from, '%Y%m%d%H%M%S')).values
+    if ts_end is not None:
+      ii &= (df['dt'] < TimeManager.ts_to_str(ts_end, '%Y%m%d%H%M%S')).values
+    return df[ii]
+
+  def ingest_minute_dataframe(self, df:pd.DataFrame):
+    """
+    분봉 (st_code, dt 'YYYYMMDDHHMMSS', open, high, low, close, volume)을 한 번에 삽입 (sqlite: 한 트랜잭션에서 종목별 executemany)
+    이미 있는 (종목, 시간)은 건너뛴다. 반환: {code: {'inserted': n, 'skipped': m}}
+    롤업이 설정되어 있으면 새 행이 들어간 종목의 해당 날짜 버킷만 다시 집계한다.
+    스냅샷/캐시 (ingest_listeners)에는 새 행이 들어간 종목을 알려서, 중간의 빈 구간이 채워진 종목을 무효화하게 한다.
+    """
+    counts = self.backend.append_minutes(self.table_name, df)
+    changed = [code for code, count in counts.items() if count['inserted'] > 0]
+    if self.rollups and changed:
+      ii = df['st_code'].isin(changed).values
+      days = kst_day_numbers(dt_str_to_epoch_minutes(df['dt'][ii]))
+      st_codes = df['st_code'].values[ii]
+      self.backend.update_rollups(self.table_name, self.rollups, {code: days[st_codes == code] for code in changed})
+    if changed:
+      for listener in ([self.snapshot_cache] if self.snapshot_cache is not None else []) + self.ingest_listeners:
+        listener.on_minutes_ingested(df, counts, changed)
+    return counts
+
+  def ingest_raw_dataframes(self, raw_frames:dict, ts_from:pd.Timestamp=None, ts_end:pd.Timestamp=None):
+    """
+    여러 종목의 TR 분봉 원본 {code: raw_df}을 [ts_from, ts_end) 구간만 일괄 삽입 (겹치는 페이지를 다시 넣어도 안전)
+    반환: {code: {'inserted': n, 'skipped': m}} (원본이 비어 있는 종목은 0/0)
+    """
+    counts = {code: {'inserted': 0, 'skipped': 0} for code in raw_frames}
+    counts.update(self.ingest_minute_dataframe(MinuteChartDataProvider.convert_raw_dataframes(raw_frames, ts_from, ts_end)))
+    return counts
+
+  def insert_minute_dataframe(self, df:pd.DataFrame):
+    """
+    filter_from_raw_data 형태의 분봉 삽입: 삽입된 행 수 반환
+    """
+    return sum(count['inserted'] for count in self.ingest_minute_dataframe(df).values())
 
   def insert_raw_dataframe_data(self, raw_df:pd.DatFame, code:str, ts_end:pd.Timestamp=None):
     """
-    [ts_after_last_inserted, ts_end): 날 것의 데이터프레임 데이터를 삽입
+    [, ts_end): 날 것의 데이터프레임 데이터를 삽입 (이미 있는 분은 건너뜀), 삽입된 행 수 반환
     """
-    num_inserted = 0
-    if len(raw_df) != 0:
-      ts_after_last_inserted=TimeManager.ts_min_shift(self.get_ts_last_inserted(code), minutes=1, floor=True)
-      num_inserted = self.filter_from_raw_data(raw_df, code, ts_from=ts_after_last_inserted, ts_end=ts_end).to_sql(self.table_name, self.engine, if_exists='append', index=False)
-    return num_inserted
+    return self.ingest_raw_dataframes({code: raw_df}, ts_end=ts_end)[code]['inserted']
 
-  def get_history_from_ndays_ago(self, n_days=14):
+  def get_history_from_ndays_ago(self, n_days=14, codes=None):
     '''
     과거 n일치 데이터를 가져온다.
     '''
     from_ts = TimeManager.ts_day_shift(TimeManager.get_now(), days=-n_days, floor=True)
-    df = self.query(f'''
-    SELECT * FROM {self.table_name} 
-    WHERE dt >= '{TimeManager.ts_to_str(from_ts)}'
-    ORDER BY st_code ASC, dt ASC
-    ''')
-    df['dt'] = pd.to_datetime(df['dt']).dt.tz_localize('Asia/Seoul')
-    return {st_code: df.query(f"st_code=='{st_code}'").set_index('dt') for st_code in map(lambda x: x[0], self.config_manager.retrieve_candidate_ETFs())}
+    return self.get_history_range(from_ts, codes=codes)
+
+  def get_history_range(self, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None, codes=None):
+    '''
+    [ts_from, ts_end) 구간의 분봉을 종목별 데이터프레임(dt 인덱스)으로 가져온다. 데이터가 없는 종목은 빈 데이터프레임
+    codes가 None이면 후보 ETF 전체
+    '''
+    codes = [x[0] for x in self.config_manager.retrieve_candidate_ETFs()] if codes is None else list(codes)
+    if self.snapshot_cache is not None:
+      return self.snapshot_cache.get_history_range(ts_from, ts_end, codes=codes)
+    return self.read_history_range(ts_from, ts_end, codes=codes)
+
+  def iter_history_range(self, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None, codes=None, chunk='day', lookback=0, read_days=30):
+    '''
+    [ts_from, ts_end) 구간을 read_days 일씩 나눠 읽고, 종목별 조각(HistoryChunk)을 시간순으로 내주는 제너레이터
+    전체 구간을 한 번에 올리지 않으므로 메모리는 읽기 구간(read_days) 하나 + 조각 크기로 제한된다.
+    - chunk='day': 종목별 하루치 (읽기 구간 안에서는 날짜 -> 종목 순서), 정수: 종목별 chunk 행씩 (마지막 조각은 짧을 수 있다)
+    - lookback: 같은 종목의 직전 행을 최대 lookback개 조각 앞에 이어 붙인다. (첫 조각에는 붙일 행이 없다)
+    codes가 None이면 후보 ETF 전체
+    '''
+    codes = [x[0] for x in self.config_manager.retrieve_candidate_ETFs()] if codes is None else list(codes)
+    stats = self.get_code_stats(codes)
+    if not stats:
+      return
+    # 데이터가 있는 구간만 읽는다.
+    ts_start = max(ts_from, TimeManager.str_to_ts(min(min_dt for min_dt, _ in stats.values())))
+    ts_stop = TimeManager.ts_min_shift(TimeManager.str_to_ts(max(max_dt for _, max_dt in stats.values())), minutes=1, floor=True)
+    ts_stop = min(ts_stop, ts_end) if ts_end is not None else ts_stop
+    carry = {} # code -> 직전 조각의 마지막 lookback 행
+    pending = {code: None for code in codes} # chunk가 정수일 때 아직 내주지 않은 행
+
+    def make_chunk(code, body):
+      prev = carry.get(code)
+      df = pd.concat((prev, body)) if prev is not None and len(prev) > 0 else body
+      if lookback > 0:
+        carry[code] = df.iloc[-lookback:].copy()
+      return HistoryChunk(code, df, len(df) - len(body))
+
+    w_start = ts_start
+    while w_start < ts_stop:
+      w_end = min(TimeManager.ts_day_shift(w_start, days=read_days, floor=True), ts_stop)
+      frames = self.get_history_range(w_start, w_end, codes=codes)
+      if chunk == 'day':
+        pieces = []
+        for i, code in enumerate(codes):
+          # 서울시 날짜 번호 (UTC+9 고정)
+          days = (frames[code].index.asi8 + 9 * 3600 * 10**9) // (86400 * 10**9)
+          boundaries = np.flatnonzero(np.r_[True, days[1:] != days[:-1], True]) if len(days) > 0 else []
+          pieces.extend((days[begin], i, begin, end) for begin, end in zip(boundaries[:-1], boundaries[1:]))
+        for _, i, begin, end in sorted(pieces):
+          yield make_chunk(codes[i], frames[codes[i]].iloc[begin:end])
+      else:
+        for code in codes:
+          df = frames[code] if pending[code] is None else pd.concat((pending[code], frames[code]))
+          begin = 0
+          while len(df) - begin >= chunk:
+            yield make_chunk(code, df.iloc[begin:begin + chunk])
+            begin += chunk
+          pending[code] = df.iloc[begin:].copy()
+      del frames
+      w_start = w_end
+    for code in codes:
+      if pending[code] is not None and len(pending[code]) > 0:
+        yield make_chunk(code, pending[code])
+
+  def read_history_range(self, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None, codes=None):
+    '''
+    get_history_range와 같으나 스냅샷을 거치지 않고 테이블에서 직접 읽는다.
+    '''
+    return self.backend.read_minutes(self.table_name, codes, ts_from, ts_end)
+
+  def get_code_stats(self, codes):
+    '''
+    종목별 (min(dt), max(dt)): 행이 없는 종목은 빠진다.
+    '''
+    return self.backend.minute_stats(self.table_name, codes)
+
+  def rebuild_rollups(self, codes=None):
+    '''
+    기존 분봉 전체에서 롤업을 다시 집계 (롤업을 처음 켰을 때), 반환: {resolution: 버킷 수}
+    '''
+    codes = [x[0] for x in self.config_manager.retrieve_candidate_ETFs()] if codes is None else list(codes)
+    code_days = {}
+    for code, (min_dt, max_dt) in self.get_code_stats(codes).items():
+      first, last = kst_day_numbers(dt_str_to_epoch_minutes(pd.Series([min_dt, max_dt])))
+      code_days[code] = np.arange(first, last + 1)
+    return self.backend.update_rollups(self.table_name, self.rollups, code_days)
+
+  def read_rollup(self, resolution, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None, codes=None):
+    '''
+    resolution('5m', '15m', '60m', '1d') 롤업 봉: 버킷 시작이 [ts_from, ts_end)인 봉을 종목별 데이터프레임(dt: 버킷 시작)으로
+    분 버킷은 09:00 기준 (MultiResolutionBars와 같은 정렬), 일봉 dt는 그 날 00:00
+    '''
+    assert resolution in self.rollups, f'rollup {resolution} is not maintained: {self.rollups}'
+    codes = [x[0] for x in self.config_manager.retrieve_candidate_ETFs()] if codes is None else list(codes)
+    return self.backend.read_rollups(self.table_name, resolution, codes, ts_from, ts_end)
+
+  def get_prev_close(self, code, ts:pd.Timestamp):
+    '''
+    ts가 속한 날의 직전 거래일 종가 (일봉 롤업의 인덱스 한 번 조회), 없으면 None
+    '''
+    assert '1d' in self.rollups, f'rollup 1d is not maintained: {self.rollups}'
+    bar = self.backend.rollup_before(self.table_name, '1d', code, TimeManager.ts_floor_time(ts, freq='D'))
+    return bar[1][3] if bar is not None else None
+
+  def get_daily_prev_closes(self, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None, codes=None):
+    '''
+    [ts_from, ts_end)의 거래일별 직전 거래일 종가: {code: Series(index: 날짜 00:00 (서울시), 직전 종가)}
+    구간 첫 날의 직전 종가도 구간 밖 일봉에서 가져온다. (분봉 전체 groupby 대신 일봉 롤업 읽기)
+    '''
+    ts_from = TimeManager.ts_floor_time(ts_from, freq='D')
+    daily = self.read_rollup('1d', ts_from, ts_end, codes=codes)
+    prev_closes = {}
+    for code, df in daily.items():
+      first = self.backend.rollup_before(self.table_name, '1d', code, ts_from)
+      prev_closes[code] = df['close'].shift(1, fill_value=first[1][3] if first is not None else np.nan).rename('prev_close') if len(df) > 0 else df['close'].rename('prev_close')
+    return prev_closes
+
+  def migrate_schema(self, to_version='v2', vacuum=True):
+    '''
+    (sqlite) 테이블을 to_version 스키마로 제자리 변환, 반환값: (변환 전 행 수, 변환 후 행 수)
+    '''
+    num_before, num_after = self.backend.migrate_minute_table(self.table_name, to_version, vacuum=vacuum)
+    # 스냅샷 키(min/max dt)는 스키마와 무관하지만, 중복 행이 정리되었으면 내용이 달라진다.
+    if self.snapshot_cache is not None and num_before != num_after:
+      self.snapshot_cache.invalidate_all()
+    return num_before, num_after
+
+class BufferedTickWriter:
+  """
+  틱 튜플을 미리 할당한 버퍼에 모아 두었다가, 저장소 백엔드에 일괄 삽입 (sqlite: 한 트랜잭션 안에서 executemany)
+  - 버퍼가 가득 차거나, 마지막 flush 이후 flush_seconds가 지나면 flush
+  - 읽기 전에는 반드시 flush 해야 한다. (RealTimeTickDataPrivder가 처리)
+  """
+  def __init__(self, backend:StorageBackend, table_name, capacity=4096, flush_seconds=1.0):
+    self.backend = backend
+    self.table_name = table_name
+    self.capacity = capacity
+    self.flush_seconds = flush_seconds
+    self.__buffer = [None] * capacity
+    self.__size = 0
+    self.__last_flushed = time.monotonic()
+
+  def __len__(self):
+    return self.__size
+
+  def append(self, row):
+    self.__buffer[self.__size] = row
+    self.__size += 1
+    if self.__size >= self.capacity or time.monotonic() - self.__last_flushed >= self.flush_seconds:
+      self.flush()
+
+  def flush(self):
+    """
+    버퍼의 틱을 일괄 삽입하고 삽입한 건수를 반환
+    """
+    num_flushed = self.__size
+    if num_flushed > 0:
+      self.backend.append_ticks(self.table_name, self.__buffer[:num_flushed])
+      self.__size = 0
+    self.__last_flushed = time.monotonic()
+    return num_flushed
 
 class RealTimeTickDataPrivder(DataProviderBase):
-  make_minute_chart_query = '''
-  select DISTINCT t.st_code, {YYYYMMDD}||t.minute||'00' as dt,
-  first_value(t.close) over (partition by t.st_code, t.minute order by t.dt ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as open,
-  max(t.close) over (partition by t.st_code, t.minute order by t.dt ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as high,
-  min(t.close) over (partition by t.st_code, t.minute order by t.dt ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as low,
-  last_value(t.close) over (partition by t.st_code, t.minute order by t.dt ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as close,
-  sum(t.volume) over (partition by t.st_code, t.minute order by t.dt ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as volume
-  from (
-    select *, substr(dt, 0, 5) as minute
-    from today_in_ticks
-    where dt >= '{FROM_HHMMSS}' and dt < '{END_HHMMSS}'
-    ) as t
-  '''
 
   @staticmethod
   def Factory(config_manager: ConfigManager):
     """
     Factory method: RealTimeTickDataPrivder 객체 생성
+    설정의 tick_backend로 저장소 선택: sqlite | duckdb (메모리 DB) | numpy (종목별 컬럼 배열)
     """
-    return RealTimeTickDataPrivder(config_manager)
+    realtime_info = config_manager.get_realtime_info()
+    return RealTimeTickDataPrivder(
+      config_manager,
+      buffer_size=realtime_info['tick_buffer_size'],
+      flush_seconds=realtime_info['tick_flush_seconds'],
+      backend=realtime_info['tick_backend'],
+    )
+
+  def __init__(self, coonfig_manager:ConfigManager, buffer_size=4096, flush_seconds=1.0, backend='sqlite'):
+      super().__init__(coonfig_manager, ':memory:', table_name='today_in_ticks', drop_table=True, backend=backend)
+      self.tick_writer = BufferedTickWriter(self.backend, self.table_name, capacity=buffer_size, flush_seconds=flush_seconds)
 
-  def __init__(self, coonfig_manager:ConfigManager):
-      super().__init__(coonfig_manager, ':memory:', table_name='today_in_ticks', index_name='idx_today_in_ticks', drop_table=True)
+  def create_table(self, drop_table=False):
+    self.backend.create_tick_table(self.table_name, drop=drop_table)
 
-  def __build_data(self, real_data):
+  def __build_data(self, real_data:StockExecutionRecord):
     return (
-      real_data['code'],
-      real_data['20'], # 체결시간 (HHMMSS)
-      abs(int(real_data['16'])), # 시가 +-
-      abs(int(real_data['17'])), # 고가 +-
-      abs(int(real_data['18'])), # 저가 +-
-      abs(int(real_data['10'])), # 현재가 +-
-      abs(int(real_data['15'])), # 거래량 +-
+      real_data.code,
+      real_data.hhmmss, # 체결시간 (HHMMSS)
+      real_data.open, # 시가
+      real_data.high, # 고가
+      real_data.low, # 저가
+      real_data.close, # 현재가
+      real_data.volume, # 거래량
     )
 
   def __build_dataframe(self, real_data):
@@ -196,34 +423,44 @@ class RealTimeTickDataPrivder(DataProviderBase):
     )
 
   def insert_by_query(self, real_data):
-    with self.engine.begin() as connection:
-      connection.execute(self.insert_query, self.__build_data(real_data))
+    self.backend.append_ticks(self.table_name, [self.__build_data(real_data)])
 
   def insert_by_dataframe(self, real_data):
+    """
+    (기존 방식) 1행 데이터프레임을 to_sql로 삽입: sqlite 전용
+    """
     self.__build_dataframe(real_data).to_sql(self.table_name, self.engine, if_exists='append', index=False)
 
+  def insert_by_buffer(self, real_data):
+    """
+    버퍼에 모아 두었다가 일괄 삽입 (BufferedTickWriter)
+    """
+    self.tick_writer.append(self.__build_data(real_data))
+
+  def flush(self):
+    return self.tick_writer.flush()
+
   def recent_inserted_ts(self):
+    self.flush()
     # 실시간 체결이라서 HHMMSS 형식이다.
-    query_string = f'''
-    SELECT dt FROM {self.table_name} ORDER BY dt DESC LIMIT 1
-    '''
-    with self.engine.connect() as connection:
-      hhmmss = connection.execute(query_string).fetchall()[0][0]
-    return TimeManager.hhmmss_to_ts(hhmmss)
+    hhmmss = self.backend.last_tick_hhmmss(self.table_name)
+    return TimeManager.hhmmss_to_ts(hhmmss) if hhmmss is not None else None
 
   def make_minute_chart_df(self, ts_from:pd.Timestamp=None, ts_end:pd.Timestamp=None):
     """
     [ts_from, ts_end)
     """
-    query_string = RealTimeTickDataPrivder.make_minute_chart_query.format(
-      YYYYMMDD=TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d'), 
-      FROM_HHMMSS=TimeManager.ts_to_str(TimeManager.ts_floor_time(ts_from, freq='T'), '%H%M00') if ts_from is not None else '090000',
-      END_HHMMSS=TimeManager.ts_to_str(TimeManager.ts_floor_time(ts_end, freq='T'), '%H%M00') if ts_end is not None else '153001'
-      )
-    return self.query(query_string=query_string)
+    self.flush()
+    return self.backend.aggregate_ticks_to_minute(
+      self.table_name,
+      TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d'),
+      TimeManager.ts_to_str(TimeManager.ts_floor_time(ts_from, freq='T'), '%H%M00') if ts_from is not None else '090000',
+      TimeManager.ts_to_str(TimeManager.ts_floor_time(ts_end, freq='T'), '%H%M00') if ts_end is not None else '153001',
+    )
 
   def retrieve_all(self):
-    return self.query(f'SELECT * FROM {self.table_name}')
+    self.flush()
+    return self.backend.read_ticks(self.table_name)
 
 
   if __name__ == '__main__':
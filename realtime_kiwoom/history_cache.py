@@ -0,0 +1,147 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from miscs.time_manager import TimeManager
+from realtime_kiwoom.storage_backend import filled_minute_range
+
+class MinuteHistoryCache:
+  """
+  프로세스 안에서 오래 유지하는 분봉 히스토리 캐시 (종목별로 미리 할당한 배열)
+  - refresh(): 종목별로 마지막으로 읽은 dt 이후의 행만 조회하여 뒤에 붙이고, lookback_days 밖으로 나간 행은 앞에서 버린다.
+    (첫 refresh만 lookback 구간 전체를 읽으며, 스냅샷이 설정되어 있으면 스냅샷에서 읽는다. 행이 없는 종목은 lookback 시작부터 조회)
+  - 같은 provider로 이미 읽은 구간 안 (중간의 빈 구간)에 행이 적재되면 그 종목만 비우고 다음 refresh에서 다시 읽는다. (on_minutes_ingested)
+  - 배열이 가득 차면 살아있는 행만 새 배열로 옮기므로(2배 여유), 이미 반환한 데이터프레임은 바뀌지 않는다.
+  - get_history(): MinuteChartDataProvider.get_history_from_ndays_ago와 같은 형태이며, 캐시 배열의 읽기 전용 뷰다.
+  """
+  value_columns = ['open', 'high', 'low', 'close', 'volume']
+
+  def __init__(self, provider, lookback_days=14, codes=None, initial_capacity=1 << 14):
+    self.provider = provider # MinuteChartDataProvider
+    self.lookback_days = lookback_days
+    self.codes = list(codes) if codes is not None else [x[0] for x in provider.config_manager.retrieve_candidate_ETFs()]
+    self.initial_capacity = initial_capacity
+    self.__dt = {} # code -> int64 배열 (UTC epoch ns)
+    self.__values = {} # code -> (capacity, 5) int64 배열
+    self.__begin = {code: 0 for code in self.codes}
+    self.__end = {code: 0 for code in self.codes}
+    self.__last_dt = None # code -> 마지막으로 읽은 dt (epoch ns, 읽은 행이 없으면 -1), 첫 refresh 전에는 None
+    self.__frames = {} # code -> get_history() 캐시
+    provider.ingest_listeners.append(self)
+
+  def __cutoff(self):
+    return TimeManager.ts_day_shift(TimeManager.get_now(), days=-self.lookback_days, floor=True)
+
+  def __append(self, code, dt, values):
+    n = len(dt)
+    begin, end = self.__begin[code], self.__end[code]
+    if code not in self.__dt or end + n > len(self.__dt[code]):
+      live = end - begin
+      capacity = max(self.initial_capacity, 2 * (live + n))
+      new_dt = np.zeros(capacity, dtype=np.int64)
+      new_values = np.zeros((capacity, len(MinuteHistoryCache.value_columns)), dtype=np.int64)
+      if live > 0:
+        new_dt[:live] = self.__dt[code][begin:end]
+        new_values[:live] = self.__values[code][begin:end]
+      self.__dt[code], self.__values[code] = new_dt, new_values
+      begin, end = 0, live
+    self.__dt[code][end:end + n] = dt
+    self.__values[code][end:end + n] = values
+    self.__begin[code], self.__end[code] = begin, end + n
+
+  def __evict(self, code, cutoff_ns):
+    begin, end = self.__begin[code], self.__end[code]
+    if code in self.__dt and begin < end and self.__dt[code][begin] < cutoff_ns:
+      self.__begin[code] = begin + int(np.searchsorted(self.__dt[code][begin:end], cutoff_ns, side='left'))
+      return True
+    return False
+
+  def refresh(self):
+    '''
+    새 행만 읽어 붙이고 lookback 밖의 행을 버린다. 반환값: 새로 붙인 행 수
+    '''
+    cutoff = self.__cutoff()
+    if self.__last_dt is None:
+      history = self.provider.get_history_range(cutoff, codes=self.codes)
+      self.__last_dt = {code: -1 for code in self.codes}
+    else:
+      # 종목마다 자기 마지막 dt 이후부터 (같은 시작 시간끼리 묶어서 조회)
+      groups = {}
+      for code in self.codes:
+        ts_from = cutoff if self.__last_dt[code] < cutoff.value else TimeManager.ts_min_shift(MinuteHistoryCache.ns_to_ts(self.__last_dt[code]), minutes=1, floor=True)
+        groups.setdefault(ts_from, []).append(code)
+      history = {}
+      for ts_from, codes in groups.items():
+        history.update(self.provider.read_history_range(ts_from, codes=codes))
+
+    num_appended = 0
+    for code in self.codes:
+      changed = False
+      df = history[code]
+      if len(df) > 0:
+        dt = df.index.asi8
+        begin = int(np.searchsorted(dt, self.__last_dt[code], side='right'))
+        if begin < len(dt):
+          self.__append(code, dt[begin:], df[MinuteHistoryCache.value_columns].to_numpy(dtype='int64')[begin:])
+          self.__last_dt[code] = int(dt[-1])
+          num_appended += len(dt) - begin
+          changed = True
+      if self.__evict(code, cutoff.value) or changed:
+        self.__frames.pop(code, None)
+    return num_appended
+
+  @staticmethod
+  def ns_to_ts(ns):
+    return pd.Timestamp(ns, tz='UTC').tz_convert('Asia/Seoul')
+
+  def __reset(self, code):
+    '''
+    종목 하나를 비운다: 이미 반환한 데이터프레임이 보는 배열은 그대로 두고 새 배열을 쓴다.
+    '''
+    self.__dt.pop(code, None)
+    self.__values.pop(code, None)
+    self.__begin[code], self.__end[code] = 0, 0
+    self.__last_dt[code] = -1
+    self.__frames.pop(code, None)
+
+  def on_minutes_ingested(self, df:pd.DataFrame, counts:dict, changed:list):
+    '''
+    provider에 분봉이 적재된 뒤 호출: 마지막으로 읽은 dt 이하에 행이 들어간 종목은 비운다. (그 뒤의 행은 refresh가 읽는다)
+    확실하지 않은 경우는 그 구간의 테이블 행 수와 캐시 행 수를 비교한다.
+    '''
+    if self.__last_dt is None:
+      return
+    for code in changed:
+      last_dt = self.__last_dt.get(code, -1)
+      if last_dt < 0: # 아직 읽은 행이 없으면 다음 refresh가 lookback 시작부터 읽는다.
+        continue
+      filled = filled_minute_range(df, counts, code, TimeManager.ts_to_str(MinuteHistoryCache.ns_to_ts(last_dt), '%Y%m%d%H%M%S'))
+      if filled is None:
+        continue
+      dt_from, certain = filled
+      if not certain:
+        dt = self.__dt[code][self.__begin[code]:self.__end[code]] if code in self.__dt else np.zeros(0, dtype=np.int64)
+        ts_from = max(TimeManager.str_to_ts(dt_from), self.__cutoff())
+        ts_end = TimeManager.ts_min_shift(MinuteHistoryCache.ns_to_ts(last_dt), minutes=1, floor=True)
+        num_cached = int(np.searchsorted(dt, ts_end.value) - np.searchsorted(dt, ts_from.value))
+        certain = len(self.provider.read_history_range(ts_from, ts_end, codes=[code])[code]) != num_cached
+      if certain:
+        self.__reset(code)
+
+  def get_history(self):
+    '''
+    code -> 분봉 데이터프레임 (dt 인덱스, 읽기 전용)
+    '''
+    for code in self.codes:
+      if code in self.__frames:
+        continue
+      begin, end = self.__begin[code], self.__end[code]
+      if code in self.__dt:
+        dt, values = self.__dt[code][begin:end], self.__values[code][begin:end]
+      else:
+        dt, values = np.zeros(0, dtype=np.int64), np.zeros((0, len(MinuteHistoryCache.value_columns)), dtype=np.int64)
+      values.flags.writeable = False
+      df = pd.DataFrame(values, columns=MinuteHistoryCache.value_columns, copy=False)
+      df.index = pd.DatetimeIndex(dt.view('datetime64[ns]'), name='dt').tz_localize('UTC').tz_convert('Asia/Seoul')
+      df.insert(0, 'st_code', code)
+      self.__frames[code] = df
+    return {code: self.__frames[code] for code in self.codes}
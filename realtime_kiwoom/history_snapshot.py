@@ -0,0 +1,159 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from miscs.time_manager import TimeManager
+from realtime_kiwoom.storage_backend import filled_minute_range
+
+class HistorySnapshotCache:
+  """
+  분봉 히스토리 테이블의 종목별 컬럼형 스냅샷 (.npy, 메모리 맵 로딩)
+  - 경로: <snapshot_dir>/<종목코드>/<min_dt>_<max_dt>_<num_rows>/{dt.npy, values.npy} + <종목코드>/current.json
+  - dt: UTC 기준 epoch ns (int64), values: (n, 5) int64 [open, high, low, close, volume]
+  - 캐시 키는 테이블의 종목별 (min(dt), max(dt))이며 인덱스 양 끝만 읽으므로 매 조회마다 확인해도 싸다.
+    새 행이 있을 때만 새 스냅샷을 쓴다. (max 이후 행만 늘었으면 그 행만 읽어서 이어 붙이고, 앞쪽 백필은 전체를 다시 만든다)
+  - 중간의 빈 구간만 채운 경우는 키가 바뀌지 않으므로 무효화해야 한다. (MinuteChartDataProvider.ingest_minute_dataframe -> on_minutes_ingested)
+  - 로딩은 copy-on-write 메모리 맵이므로 같은 호스트의 여러 프로세스가 페이지를 공유한다.
+  """
+  value_columns = ['open', 'high', 'low', 'close', 'volume']
+
+  def __init__(self, provider, snapshot_dir):
+    self.provider = provider # MinuteChartDataProvider
+    self.snapshot_dir = snapshot_dir
+
+  def __code_dir(self, code):
+    return os.path.join(self.snapshot_dir, code)
+
+  def read_current(self, code):
+    '''
+    현재 스냅샷 정보 {'version', 'min_dt', 'max_dt', 'num_rows'} (없으면 None)
+    '''
+    path = os.path.join(self.__code_dir(code), 'current.json')
+    if not os.path.exists(path):
+      return None
+    with open(path) as f:
+      return json.load(f)
+
+  def invalidate(self, code):
+    '''
+    스냅샷 무효화: 다음 조회시 전체를 다시 만든다.
+    '''
+    code_dir = self.__code_dir(code)
+    if not os.path.isdir(code_dir):
+      return
+    if os.path.exists(os.path.join(code_dir, 'current.json')):
+      os.remove(os.path.join(code_dir, 'current.json'))
+    for name in os.listdir(code_dir):
+      if os.path.isdir(os.path.join(code_dir, name)):
+        shutil.rmtree(os.path.join(code_dir, name), ignore_errors=True)
+
+  def on_minutes_ingested(self, df:pd.DataFrame, counts:dict, changed:list):
+    '''
+    분봉 적재 후 호출: 스냅샷의 max_dt 이하 (중간의 빈 구간)에 행이 들어간 종목의 스냅샷 무효화
+    확실하지 않은 경우 (스냅샷 이후에 쌓인 행과 겹친 배치)는 그 구간의 테이블 행 수와 스냅샷 행 수를 비교한다.
+    '''
+    for code in changed:
+      current = self.read_current(code)
+      if current is None:
+        continue
+      filled = filled_minute_range(df, counts, code, current['max_dt'])
+      if filled is None:
+        continue
+      dt_from, certain = filled
+      if not certain:
+        ts_from = TimeManager.str_to_ts(dt_from)
+        ts_end = TimeManager.ts_min_shift(TimeManager.str_to_ts(current['max_dt']), minutes=1, floor=True)
+        dt, _ = self.load_arrays(code, current)
+        num_cached = int(np.searchsorted(dt, ts_end.value) - np.searchsorted(dt, ts_from.value))
+        certain = len(self.provider.read_history_range(ts_from, ts_end, codes=[code])[code]) != num_cached
+      if certain:
+        self.invalidate(code)
+
+  def invalidate_all(self):
+    if os.path.isdir(self.snapshot_dir):
+      for code in os.listdir(self.snapshot_dir):
+        self.invalidate(code)
+
+  def load_arrays(self, code, current):
+    version_dir = os.path.join(self.__code_dir(code), current['version'])
+    return (
+      np.load(os.path.join(version_dir, 'dt.npy'), mmap_mode='c'),
+      np.load(os.path.join(version_dir, 'values.npy'), mmap_mode='c'),
+    )
+
+  def __write(self, code, dt, values, min_dt, max_dt):
+    code_dir = self.__code_dir(code)
+    version = f'{min_dt}_{max_dt}_{len(dt)}'
+    version_dir = os.path.join(code_dir, version)
+    if not os.path.exists(version_dir):
+      tmp_dir = f'{version_dir}.tmp{os.getpid()}'
+      os.makedirs(tmp_dir, exist_ok=True)
+      np.save(os.path.join(tmp_dir, 'dt.npy'), dt)
+      np.save(os.path.join(tmp_dir, 'values.npy'), values)
+      try:
+        os.rename(tmp_dir, version_dir)
+      except OSError:
+        # 다른 프로세스가 같은 스냅샷을 먼저 만든 경우
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    current = {'version': version, 'min_dt': min_dt, 'max_dt': max_dt, 'num_rows': len(dt)}
+    tmp_path = os.path.join(code_dir, f'current.json.tmp{os.getpid()}')
+    with open(tmp_path, 'w') as f:
+      json.dump(current, f)
+    os.replace(tmp_path, os.path.join(code_dir, 'current.json'))
+    # 이전 스냅샷 정리 (다른 프로세스가 메모리 맵 중이면 지워지지 않으므로 무시)
+    for name in os.listdir(code_dir):
+      if name != version and os.path.isdir(os.path.join(code_dir, name)) and '.tmp' not in name:
+        shutil.rmtree(os.path.join(code_dir, name), ignore_errors=True)
+    return current
+
+  @staticmethod
+  def frame_to_arrays(df:pd.DataFrame):
+    return df.index.asi8.copy(), df[HistorySnapshotCache.value_columns].to_numpy(dtype='int64')
+
+  def refresh(self, codes):
+    '''
+    테이블 통계와 스냅샷 키를 비교하여 필요한 종목만 스냅샷 갱신
+    반환값: code -> 현재 스냅샷 정보 (행이 없는 종목은 None)
+    '''
+    stats = self.provider.get_code_stats(codes)
+    currents = {}
+    for code in codes:
+      if code not in stats:
+        currents[code] = None
+        continue
+      min_dt, max_dt = stats[code]
+      current = self.read_current(code)
+      if current is not None and current['min_dt'] == min_dt and current['max_dt'] == max_dt:
+        currents[code] = current
+        continue
+      if current is not None and current['min_dt'] == min_dt and current['max_dt'] < max_dt:
+        # max 이후 행만 읽어 이어 붙인다.
+        ts_after = TimeManager.ts_min_shift(TimeManager.str_to_ts(current['max_dt']), minutes=1, floor=True)
+        delta = self.provider.read_history_range(ts_after, codes=[code])[code]
+        dt, values = self.load_arrays(code, current)
+        delta_dt, delta_values = HistorySnapshotCache.frame_to_arrays(delta)
+        currents[code] = self.__write(code, np.concatenate((dt, delta_dt)), np.concatenate((values, delta_values)), min_dt, max_dt)
+        continue
+      df = self.provider.read_history_range(TimeManager.str_to_ts('19700101000000'), codes=[code])[code]
+      currents[code] = self.__write(code, *HistorySnapshotCache.frame_to_arrays(df), min_dt, max_dt)
+    return currents
+
+  def get_history_range(self, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None, codes=None):
+    '''
+    [ts_from, ts_end) 구간의 분봉을 종목별 데이터프레임(dt 인덱스)으로 반환 (MinuteChartDataProvider.read_history_range와 같은 형태)
+    '''
+    history = {}
+    for code, current in self.refresh(codes).items():
+      if current is None:
+        dt, values = np.zeros(0, dtype=np.int64), np.zeros((0, len(HistorySnapshotCache.value_columns)), dtype=np.int64)
+      else:
+        dt, values = self.load_arrays(code, current)
+      begin = np.searchsorted(dt, ts_from.value, side='left')
+      end = np.searchsorted(dt, ts_end.value, side='left') if ts_end is not None else len(dt)
+      df = pd.DataFrame(values[begin:end], columns=HistorySnapshotCache.value_columns, copy=False)
+      df.index = pd.DatetimeIndex(dt[begin:end].view('datetime64[ns]'), name='dt').tz_localize('UTC').tz_convert('Asia/Seoul')
+      df.insert(0, 'st_code', code)
+      history[code] = df
+    return history
@@ -194,4 +194,115 @@ class RealType(object):
     fid_to_tag_dic = {}
     for theme, dic in RealType.REALTYPE.items():
       fid_to_tag_dic[theme] = {fid:tag for tag, fid in dic.items()}
-    return fid_to_tag_dic
\ No newline at end of file
+    return fid_to_tag_dic
+
+def abs_int(x):
+  return abs(int(x))
+
+def abs_float(x):
+  return abs(float(x))
+
+class RealRecord:
+  """
+  실시간 데이터 레코드 (한번 디코딩한 값을 모든 소비자가 공유)
+  - fields: 하위 클래스의 슬롯 이름
+  """
+  __slots__ = ('code',)
+  fields = ()
+
+  def __init__(self, code, **values):
+    self.code = code
+    for field in self.fields:
+      setattr(self, field, values.get(field))
+
+  def __repr__(self):
+    values = ', '.join(f'{field}={getattr(self, field)!r}' for field in self.fields)
+    return f'{type(self).__name__}(code={self.code!r}, {values})'
+
+class StockExecutionRecord(RealRecord):
+  """
+  실시간 '주식체결' 레코드
+  """
+  fields = ('hhmmss', 'close', 'change', 'change_rate', 'acc_volume', 'volume', 'open', 'high', 'low', 'ask', 'bid')
+  __slots__ = fields
+
+class MarketStatusRecord(RealRecord):
+  """
+  실시간 '장시작시간' 레코드
+  """
+  fields = ('status', 'hhmmss', 'remained')
+  __slots__ = fields
+
+class IndexPriceRecord(RealRecord):
+  """
+  실시간 '업종지수' 레코드
+  """
+  fields = ('hhmmss', 'close', 'change', 'change_rate', 'volume', 'acc_volume', 'open', 'high', 'low')
+  __slots__ = fields
+
+class RealDataDecoder:
+  """
+  RealtimeRequestItem 등록 시 한번 컴파일되는 실시간 데이터 디코더
+  - 실시간 타입 -> (레코드 클래스, 고정된 FID 순서, 변환 함수 벡터)
+  - 틱마다 GetCommRealData 결과를 한번씩만 변환하여 레코드 하나를 만든다.
+  """
+  # 실시간 타입: (레코드 클래스, {FID: (슬롯, 변환 함수)})
+  DECODE_SPEC = {
+    '주식체결': (StockExecutionRecord, {
+      '20': ('hhmmss', str), # 체결시간 (HHMMSS)
+      '10': ('close', abs_int), # 현재가 +-
+      '11': ('change', int), # 전일대비
+      '12': ('change_rate', float), # 등락율
+      '13': ('acc_volume', abs_int), # 누적거래량
+      '15': ('volume', abs_int), # 거래량 +-
+      '16': ('open', abs_int), # 시가 +-
+      '17': ('high', abs_int), # 고가 +-
+      '18': ('low', abs_int), # 저가 +-
+      '27': ('ask', abs_int), # (최우선)매도호가
+      '28': ('bid', abs_int), # (최우선)매수호가
+    }),
+    '장시작시간': (MarketStatusRecord, {
+      '215': ('status', str.strip), # 장운영구분
+      '20': ('hhmmss', str), # 시간 (HHMMSS)
+      '214': ('remained', str), # 장시작예상잔여시간
+    }),
+    '업종지수': (IndexPriceRecord, {
+      '20': ('hhmmss', str),
+      '10': ('close', abs_float),
+      '11': ('change', float),
+      '12': ('change_rate', float),
+      '15': ('volume', abs_int),
+      '13': ('acc_volume', abs_int),
+      '16': ('open', abs_float),
+      '17': ('high', abs_float),
+      '18': ('low', abs_float),
+    }),
+  }
+
+  def __init__(self, fid_list):
+    self.fid_list = list(fid_list)
+    self.plans = {}
+    for real_type, (record_class, spec) in RealDataDecoder.DECODE_SPEC.items():
+      plan = tuple((fid, spec[fid][0], spec[fid][1]) for fid in self.fid_list if fid in spec)
+      if not plan:
+        continue
+      decoded_fields = {field for _, field, _ in plan}
+      missing = tuple(field for field in record_class.fields if field not in decoded_fields)
+      self.plans[real_type] = (record_class, plan, missing)
+
+  def decode(self, real_type, code, get_com_real_data):
+    """
+    실시간 데이터를 레코드로 디코딩 (등록되지 않은 실시간 타입이면 None)
+    get_com_real_data: (code, fid) -> str
+    """
+    compiled = self.plans.get(real_type)
+    if compiled is None:
+      return None
+    record_class, plan, missing = compiled
+    record = record_class.__new__(record_class)
+    record.code = code
+    for fid, field, convert in plan:
+      setattr(record, field, convert(get_com_real_data(code, fid)))
+    for field in missing:
+      setattr(record, field, None)
+    return record
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from bisect import bisect_left
+import pandas as pd
+from miscs.time_manager import TimeManager
+from realtime_kiwoom.kiwoom_type import StockExecutionRecord
+
+class RealTimeMinuteBarBuilder:
+  """
+  실시간 '주식체결' 틱으로부터 1분봉을 점진적으로 생성
+  - 종목별로 현재 분의 OHLCV만 유지하고, 분이 바뀌면 봉을 확정(seal)한다.
+  - 확정된 봉은 종목별 리스트에 누적되며, RealTimeTickDataPrivder.make_minute_chart_df와 같은 형태로 반환한다.
+  - 시가/고가/저가/종가는 모두 체결가(현재가) 기준이다. (make_minute_chart_query와 동일)
+  - 종목별 시간순 도착을 가정한 fast path로 처리하고, 늦게 도착한 틱만 slow path에서 해당 분봉 하나를 보정한다.
+    (봉마다 첫/마지막 체결시간을 유지하므로 시가/종가도 체결시간 기준으로 보정된다.)
+  """
+  columns = ['st_code', 'dt', 'open', 'high', 'low', 'close', 'volume']
+
+  def __init__(self):
+    self.__current_bars = {} # code -> [HHMM, open, high, low, close, volume, 첫 체결시간, 마지막 체결시간] (진행중인 분봉)
+    self.__sealed_minutes = {} # code -> [HHMM, ...] (확정된 분봉의 분, 오름차순)
+    self.__sealed_bars = {} # code -> [[open, high, low, close, volume, 첫 체결시간, 마지막 체결시간], ...]
+    self.__last_sealed = {} # code -> 마지막으로 확정된 분 (HHMM), 이 분 이하의 틱은 진행중인 봉이 없어도 확정 봉을 보정
+    self.num_late_fixed = 0 # slow path로 보정한 틱 수
+
+  def update_by_real_data(self, real_data:StockExecutionRecord):
+    """
+    실시간 '주식체결' 레코드 반영
+    """
+    self.update(real_data.code, real_data.hhmmss, real_data.close, real_data.volume)
+
+  def update(self, code, hhmmss, price, volume):
+    """
+    틱 하나를 반영: 분이 바뀌면 진행중인 봉을 확정하고 새 봉을 연다.
+    """
+    minute = hhmmss[:4]
+    bar = self.__current_bars.get(code)
+    last_sealed = self.__last_sealed.get(code)
+    if last_sealed is not None and minute <= last_sealed:
+      # 이미 확정된 분의 틱이 늦게 도착한 경우 (seal_until로 분 경계에서 확정된 뒤 포함)
+      self.__patch_sealed(code, minute, hhmmss, price, volume)
+    elif bar is None or bar[0] < minute:
+      if bar is not None:
+        self.__seal(code, bar)
+      self.__current_bars[code] = [minute, price, price, price, price, volume, hhmmss, hhmmss]
+    elif bar[0] == minute and hhmmss >= bar[7]:
+      if price > bar[2]:
+        bar[2] = price
+      if price < bar[3]:
+        bar[3] = price
+      bar[4] = price
+      bar[5] += volume
+      bar[7] = hhmmss
+    elif bar[0] == minute:
+      # 진행중인 분 안에서 순서가 뒤바뀐 경우
+      self.__fix_bar(bar, 1, hhmmss, price, volume)
+    else:
+      # 진행중인 봉보다 이전 분인데 확정된 적 없는 분 (틱 유실 구간)
+      self.__patch_sealed(code, minute, hhmmss, price, volume)
+
+  def __seal(self, code, bar):
+    self.__sealed_minutes.setdefault(code, []).append(bar[0])
+    self.__sealed_bars.setdefault(code, []).append(bar[1:])
+    self.__mark_sealed(code, bar[0])
+
+  def __mark_sealed(self, code, minute):
+    last_sealed = self.__last_sealed.get(code)
+    if last_sealed is None or last_sealed < minute:
+      self.__last_sealed[code] = minute
+
+  def __fix_bar(self, bar, base, hhmmss, price, volume):
+    '''
+    slow path: bar[base:base+7] = [open, high, low, close, volume, 첫 체결시간, 마지막 체결시간]
+    체결시간이 없는 봉(TR로 대체된 확정 분봉)은 이미 완성된 봉이므로 보정하지 않는다.
+    '''
+    if bar[base + 5] is None:
+      return
+    self.num_late_fixed += 1
+    bar[base + 1] = max(bar[base + 1], price)
+    bar[base + 2] = min(bar[base + 2], price)
+    bar[base + 4] += volume
+    if hhmmss < bar[base + 5]:
+      bar[base] = price
+      bar[base + 5] = hhmmss
+    if hhmmss >= bar[base + 6]:
+      bar[base + 3] = price
+      bar[base + 6] = hhmmss
+
+  def __patch_sealed(self, code, minute, hhmmss, price, volume):
+    minutes = self.__sealed_minutes.setdefault(code, [])
+    i = bisect_left(minutes, minute)
+    if i < len(minutes) and minutes[i] == minute:
+      self.__fix_bar(self.__sealed_bars[code][i], 0, hhmmss, price, volume)
+    else:
+      self.num_late_fixed += 1
+      minutes.insert(i, minute)
+      self.__sealed_bars.setdefault(code, []).insert(i, [price, price, price, price, volume, hhmmss, hhmmss])
+
+  def override_bars(self, code, minute_df:pd.DataFrame):
+    """
+    확정된 봉을 외부(TR) 분봉으로 대체: 틱이 유실된 구간 복구용
+    minute_df: dt(YmdHMS), open, high, low, close, volume
+    """
+    minutes = self.__sealed_minutes.setdefault(code, [])
+    bars = self.__sealed_bars.setdefault(code, [])
+    for dt, open, high, low, close, volume in minute_df[['dt', 'open', 'high', 'low', 'close', 'volume']].itertuples(index=False):
+      minute = dt[8:12]
+      bar = [int(open), int(high), int(low), int(close), int(volume), None, None]
+      current = self.__current_bars.get(code)
+      if current is not None and current[0] == minute:
+        del self.__current_bars[code]
+      self.__mark_sealed(code, minute)
+      i = bisect_left(minutes, minute)
+      if i < len(minutes) and minutes[i] == minute:
+        bars[i] = bar
+      else:
+        minutes.insert(i, minute)
+        bars.insert(i, bar)
+
+  def seal_until(self, end_hhmm):
+    """
+    end_hhmm(HHMM) 이전 분의 진행중인 봉을 모두 확정
+    """
+    for code, bar in list(self.__current_bars.items()):
+      if bar[0] < end_hhmm:
+        self.__seal(code, bar)
+        del self.__current_bars[code]
+
+  def last_sealed_bar(self, code):
+    """
+    가장 최근에 확정된 봉 (HHMM, [open, high, low, close, volume]): O(1)
+    """
+    if not self.__sealed_minutes.get(code):
+      return None
+    return self.__sealed_minutes[code][-1], self.__sealed_bars[code][-1][:5]
+
+  def make_minute_chart_df(self, ts_from:pd.Timestamp=None, ts_end:pd.Timestamp=None):
+    """
+    [ts_from, ts_end)
+    ts_end 이전 분의 봉을 확정한 뒤, 범위내 확정된 봉만 반환한다.
+    ts_end가 None이면 진행중인 봉까지 포함한다. (make_minute_chart_query와 동일)
+    """
+    from_hhmm = TimeManager.ts_to_str(TimeManager.ts_floor_time(ts_from, freq='T'), '%H%M') if ts_from is not None else '0900'
+    if ts_end is not None:
+      end_hhmm = TimeManager.ts_to_str(TimeManager.ts_floor_time(ts_end, freq='T'), '%H%M')
+      self.seal_until(end_hhmm)
+    else:
+      end_hhmm = '1531'
+    yyyymmdd = TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d')
+
+    rows = []
+    for code in sorted(set(self.__sealed_minutes) | set(self.__current_bars)):
+      minutes = self.__sealed_minutes.get(code, [])
+      bars = self.__sealed_bars.get(code, [])
+      for i in range(bisect_left(minutes, from_hhmm), bisect_left(minutes, end_hhmm)):
+        rows.append([code, yyyymmdd + minutes[i] + '00', *bars[i][:5]])
+      bar = self.__current_bars.get(code)
+      if ts_end is None and bar is not None and from_hhmm <= bar[0] < end_hhmm:
+        rows.append([code, yyyymmdd + bar[0] + '00', *bar[1:6]])
+    return pd.DataFrame(rows, columns=RealTimeMinuteBarBuilder.columns).astype(
+      {'open': 'int64', 'high': 'int64', 'low': 'int64', 'close': 'int64', 'volume': 'int64'}
+      )
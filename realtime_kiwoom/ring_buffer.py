@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+class RealDataRingBuffer:
+  """
+  고정 용량 링 버퍼: 한 종목의 최근 N개 실시간 레코드만 유지
+  """
+  def __init__(self, capacity=2048):
+    assert capacity > 0, 'capacity must be positive'
+    self.capacity = capacity
+    self.__records = [None] * capacity
+    self.__next = 0 # 다음에 쓸 위치
+    self.__size = 0
+    self.num_appended = 0 # 누적 수신 건수 (버려진 것 포함)
+
+  def __len__(self):
+    return self.__size
+
+  def append(self, record):
+    self.__records[self.__next] = record
+    self.__next = (self.__next + 1) % self.capacity
+    if self.__size < self.capacity:
+      self.__size += 1
+    self.num_appended += 1
+
+  def __iter_newest_first(self):
+    for i in range(1, self.__size + 1):
+      yield self.__records[(self.__next - i) % self.capacity]
+
+  def last(self, k=1):
+    """
+    최근 k개 레코드 (오래된 것 -> 최신 순)
+    """
+    records = []
+    for record in self.__iter_newest_first():
+      if len(records) >= k:
+        break
+      records.append(record)
+    return records[::-1]
+
+  def since(self, hhmmss:str):
+    """
+    hhmmss(HHMMSS) 이후(이상) 수신한 레코드 (오래된 것 -> 최신 순)
+    수신 순서가 시간순이라고 가정하고, 최신부터 거슬러 올라가다 더 이른 시간을 만나면 멈춘다.
+    """
+    records = []
+    for record in self.__iter_newest_first():
+      if record.hhmmss is not None and record.hhmmss < hhmmss:
+        break
+      records.append(record)
+    return records[::-1]
+
+class RealCodeDataBuffers(dict):
+  """
+  종목코드 -> RealDataRingBuffer
+  - 종목별 용량은 설정에서 지정하며, 지정이 없으면 default_capacity 사용
+  """
+  def __init__(self, default_capacity=2048, code_capacities=None):
+    super().__init__()
+    self.configure(default_capacity, code_capacities)
+
+  def configure(self, default_capacity=2048, code_capacities=None):
+    """
+    용량 설정 (이미 만들어진 버퍼는 최근 레코드만 옮겨 담는다)
+    """
+    self.default_capacity = default_capacity
+    self.code_capacities = dict(code_capacities or {})
+    for code, buffer in list(self.items()):
+      resized = RealDataRingBuffer(self.capacity_of(code))
+      for record in buffer.last(resized.capacity):
+        resized.append(record)
+      self[code] = resized
+
+  def capacity_of(self, code):
+    return self.code_capacities.get(code, self.default_capacity)
+
+  def __missing__(self, code):
+    buffer = RealDataRingBuffer(self.capacity_of(code))
+    self[code] = buffer
+    return buffer
+
+  def last(self, code, k=1):
+    return self[code].last(k) if code in self else []
+
+  def since(self, code, hhmmss:str):
+    return self[code].since(hhmmss) if code in self else []
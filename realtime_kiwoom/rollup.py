@@ -0,0 +1,213 @@
+from __future__ import annotations
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+
+# 분봉 테이블 옆에 저장하는 롤업 해상도 (분, None은 일봉)
+rollup_resolutions = {'5m': 5, '15m': 15, '60m': 60, '1d': None}
+
+def rollup_bucket_minutes(dt_minutes, minutes):
+  '''
+  UTC epoch 분 배열 -> 버킷 시작 (UTC epoch 분): 분 버킷은 장 시작(09:00) 기준, minutes가 None이면 일자(서울시 00:00)
+  MultiResolutionBars.bucket_of와 같은 정렬
+  '''
+  local = np.asarray(dt_minutes, dtype=np.int64) + 9 * 60
+  day = local - local % 1440
+  if minutes is None:
+    return day - 9 * 60
+  offset = local % 1440 - MultiResolutionBars.session_start_minutes
+  return day + MultiResolutionBars.session_start_minutes + (offset // minutes) * minutes - 9 * 60
+
+def rollup_minute_arrays(dt_minutes, values, minutes):
+  '''
+  시간순 1분봉 (dt: UTC epoch 분, values: (n, 5) open, high, low, close, volume) -> (버킷 시작, (m, 5) 집계값)
+  버킷 경계에서 reduceat 한 번씩 (groupby 없음)
+  '''
+  values = np.asarray(values, dtype=np.int64)
+  if len(values) == 0:
+    return np.zeros(0, dtype=np.int64), np.zeros((0, 5), dtype=np.int64)
+  buckets = rollup_bucket_minutes(dt_minutes, minutes)
+  starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+  ends = np.r_[starts[1:], len(buckets)]
+  return buckets[starts], np.column_stack((
+    values[starts, 0],
+    np.maximum.reduceat(values[:, 1], starts),
+    np.minimum.reduceat(values[:, 2], starts),
+    values[ends - 1, 3],
+    np.add.reduceat(values[:, 4], starts),
+  ))
+
+class MultiResolutionBars:
+  """
+  한 종목의 1분봉으로부터 상위 해상도(5/15/60분, 일봉) 봉을 점진적으로 유지
+  - 피봇 이전의 정적 분봉은 seed()에서 한 번만 집계한다.
+  - 이후에는 확정된 1분봉이 들어올 때마다 해당 버킷 하나만 갱신한다. (매 분 전체 resample 없음)
+  - 분 버킷은 장 시작(09:00) 기준으로 정렬하고, 인덱스 dt는 버킷 시작 시간이다. 일봉은 일자(00:00) 기준.
+  - 해상도 키는 롤업 테이블(rollup_resolutions)과 같다.
+  """
+  resolutions = rollup_resolutions
+  value_columns = ['open', 'high', 'low', 'close', 'volume']
+  session_start_minutes = 9 * 60
+
+  def __init__(self, st_code):
+    self.st_code = st_code
+    self.__columns = ['st_code'] + MultiResolutionBars.value_columns
+    self.__seed_frames = {} # res -> 피봇 이전에 닫힌 버킷 (DataFrame)
+    self.__seed_minutes = None # 피봇 이전 1분봉 (DataFrame, int64), 닫힌 버킷이 수정될 때 다시 집계하는 데 쓴다.
+    self.__seed_keys = {} # res -> 피봇 이전 1분봉별 버킷 시작 시간
+    self.__seed_end = {} # res -> 실시간 버킷 시작 (이보다 앞선 버킷은 __seed_frames에 있다.)
+    self.__live_keys = {res: [] for res in MultiResolutionBars.resolutions} # res -> [버킷 시작 시간, ...] (오름차순)
+    self.__live_bars = {res: [] for res in MultiResolutionBars.resolutions} # res -> [[open, high, low, close, volume], ...]
+    self.__members = {res: {} for res in MultiResolutionBars.resolutions} # res -> 버킷 -> {분: (open, high, low, close, volume)}
+    self.__minutes = {} # 반영된 1분봉: 분 -> (open, high, low, close, volume)
+    self.__last_minute = None
+    self.__frames = {} # res -> get_frame() 캐시
+
+  @staticmethod
+  def bucket_of(ts:pd.Timestamp, minutes):
+    '''
+    1분봉 시간 ts가 속하는 버킷 시작 시간 (minutes가 None이면 일자)
+    '''
+    day = ts.normalize()
+    if minutes is None:
+      return day
+    offset = (ts.hour * 60 + ts.minute) - MultiResolutionBars.session_start_minutes
+    return day + pd.Timedelta(minutes=MultiResolutionBars.session_start_minutes + (offset // minutes) * minutes)
+
+  @staticmethod
+  def aggregate(members:dict):
+    '''
+    버킷 구성 1분봉 {분: (o, h, l, c, v)} -> [o, h, l, c, v]
+    '''
+    bars = [members[ts] for ts in sorted(members)]
+    return [bars[0][0], max(b[1] for b in bars), min(b[2] for b in bars), bars[-1][3], sum(b[4] for b in bars)]
+
+  def seed(self, minute_df:pd.DataFrame):
+    """
+    피봇 이전 1분봉 (index: dt, columns: st_code, open, high, low, close, volume)을 한 번에 집계
+    마지막 버킷은 오늘 실시간 분봉으로 이어질 수 있으므로 구성 분봉과 함께 실시간 버킷으로 옮긴다.
+    """
+    self.__columns = [col for col in minute_df.columns if col == 'st_code' or col in MultiResolutionBars.value_columns]
+    self.__frames = {}
+    self.__seed_minutes = None
+    self.__seed_keys = {}
+    self.__seed_end = {}
+    if len(minute_df) == 0:
+      self.__seed_frames = {res: minute_df[self.__columns] for res in MultiResolutionBars.resolutions}
+      return
+
+    values = minute_df[MultiResolutionBars.value_columns].astype('int64')
+    dt = minute_df.index
+    day = dt.normalize()
+    offset = np.asarray(dt.hour * 60 + dt.minute) - MultiResolutionBars.session_start_minutes
+    self.__last_minute = dt[-1]
+    self.__seed_minutes = values
+    for res, minutes in MultiResolutionBars.resolutions.items():
+      key = day if minutes is None else day + pd.to_timedelta(MultiResolutionBars.session_start_minutes + (offset // minutes) * minutes, unit='m')
+      self.__seed_keys[res] = key
+      agg = values.groupby(key, sort=True).agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+      agg.index.name = 'dt'
+      agg.insert(0, 'st_code', self.st_code)
+      self.__seed_frames[res] = agg.iloc[:-1][self.__columns]
+
+      last_key = agg.index[-1]
+      self.__seed_end[res] = last_key
+      in_last = np.asarray(key == last_key)
+      self.__live_keys[res] = [last_key]
+      self.__live_bars[res] = [agg.iloc[-1][MultiResolutionBars.value_columns].astype('int64').tolist()]
+      self.__members[res] = {last_key: {ts: tuple(bar) for ts, bar in zip(dt[in_last], values[in_last].itertuples(index=False))}}
+
+  def apply(self, ts:pd.Timestamp, open, high, low, close, volume):
+    """
+    확정된 1분봉 하나 반영. 이미 같은 값으로 반영된 분이면 무시하고 False 반환
+    - 시간순으로 들어오면 진행중인 버킷만 O(1)로 갱신
+    - 이미 반영한 분이 수정된 경우(지연 틱, 복구)에는 해당 버킷만 구성 분봉으로 다시 집계
+    - 피봇 이전에 닫힌 버킷의 분이면 피봇 이전 1분봉에서 그 버킷만 다시 집계하여 교체
+    """
+    bar = (int(open), int(high), int(low), int(close), int(volume))
+    prev = self.__minutes.get(ts)
+    if prev is None:
+      prev = self.__seed_minute(ts)
+    if prev == bar:
+      return False
+    self.__minutes[ts] = bar
+    in_order = prev is None and (self.__last_minute is None or ts > self.__last_minute)
+    if in_order:
+      self.__last_minute = ts
+
+    for res, minutes in MultiResolutionBars.resolutions.items():
+      key = MultiResolutionBars.bucket_of(ts, minutes)
+      if res in self.__seed_end and key < self.__seed_end[res]:
+        self.__apply_seeded(res, key, ts, bar)
+        continue
+      keys = self.__live_keys[res]
+      bars = self.__live_bars[res]
+      members = self.__members[res].setdefault(key, {})
+      members[ts] = bar
+      if not keys or keys[-1] < key:
+        keys.append(key)
+        bars.append(list(bar))
+      elif keys[-1] == key and in_order:
+        current = bars[-1]
+        current[1] = max(current[1], bar[1])
+        current[2] = min(current[2], bar[2])
+        current[3] = bar[3]
+        current[4] += bar[4]
+      else:
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+          bars[i] = MultiResolutionBars.aggregate(members)
+        else:
+          keys.insert(i, key)
+          bars.insert(i, list(bar))
+      self.__frames.pop(res, None)
+    return True
+
+  def __seed_minute(self, ts):
+    '''
+    피봇 이전 1분봉 ts의 (o, h, l, c, v), 없으면 None
+    '''
+    if self.__seed_minutes is None or ts > self.__seed_minutes.index[-1]:
+      return None
+    i = self.__seed_minutes.index.searchsorted(ts)
+    if i == len(self.__seed_minutes) or self.__seed_minutes.index[i] != ts:
+      return None
+    return tuple(int(v) for v in self.__seed_minutes.iloc[i])
+
+  def __apply_seeded(self, res, key, ts, bar):
+    '''
+    피봇 이전에 닫힌 버킷 key의 분 ts가 수정(또는 추가)된 경우: 구성 분봉을 처음 한 번 피봇 이전 1분봉에서 가져와 다시 집계하고 그 행만 교체
+    '''
+    members = self.__members[res].get(key)
+    if members is None:
+      in_bucket = np.asarray(self.__seed_keys[res] == key)
+      members = {t: tuple(b) for t, b in zip(self.__seed_minutes.index[in_bucket], self.__seed_minutes[in_bucket].itertuples(index=False))}
+      self.__members[res][key] = members
+    members[ts] = bar
+    row = pd.DataFrame([MultiResolutionBars.aggregate(members)], columns=MultiResolutionBars.value_columns, index=pd.DatetimeIndex([key], name='dt'), dtype='int64')
+    row.insert(0, 'st_code', self.st_code)
+    frame = self.__seed_frames[res]
+    self.__seed_frames[res] = pd.concat((frame.drop(key, errors='ignore'), row[self.__columns]), axis=0).sort_index(kind='stable')
+    self.__frames.pop(res, None)
+
+  def update(self, minute_df:pd.DataFrame):
+    """
+    실시간 1분봉 (index: dt) 반영: 새로 확정되었거나 바뀐 분만 적용한다.
+    반환값: 적용된 분봉 수
+    """
+    num_applied = 0
+    for ts, open, high, low, close, volume in zip(minute_df.index, *(minute_df[col].values for col in MultiResolutionBars.value_columns)):
+      num_applied += self.apply(ts, open, high, low, close, volume)
+    return num_applied
+
+  def get_frame(self, resolution):
+    """
+    resolution('5m', '15m', '60m', '1d') 해상도의 결합 데이터 (피봇 이전 + 실시간)
+    """
+    if resolution not in self.__frames:
+      live = pd.DataFrame(self.__live_bars[resolution], columns=MultiResolutionBars.value_columns, dtype='int64')
+      live.index = pd.DatetimeIndex(self.__live_keys[resolution], name='dt')
+      live.insert(0, 'st_code', self.st_code)
+      seed = self.__seed_frames.get(resolution)
+      self.__frames[resolution] = live[self.__columns] if seed is None or len(seed) == 0 else pd.concat((seed, live[self.__columns]), axis=0)
+    return self.__frames[resolution]
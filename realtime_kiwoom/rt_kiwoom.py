@@ -4,11 +4,14 @@ from PyQt5.QtWidgets import *
 from PyQt5.QAxContainer import *
 from PyQt5.QtCore import *
 import datetime
-from pykiwoom import parser
 import pandas as pd
 from collections import defaultdict
 from config.log_class import *
 from realtime_kiwoom.kiwoom_errors import KiwoomErrors
+from realtime_kiwoom.kiwoom_type import RealDataDecoder
+from realtime_kiwoom.ring_buffer import RealCodeDataBuffers
+from realtime_kiwoom.tr_scheduler import TRScheduler
+from realtime_kiwoom.tr_schema import TRSchemaRegistry
 
 class RealtimeRequestItem:
   dummy_code='dummy_code'
@@ -26,11 +29,13 @@ class RealtimeRequestItem:
           "opt_type": self.opt_type
       }
   
-  def update_code_fids(self, real_code_fid_dict):
+  def effective_code_list(self):
     #예외: "장시작시간"
     # - 빈 리스트를 입력받기 때문에 dummy_code를 붙인다.
-    code_list = [RealtimeRequestItem.dummy_code] if len(self.code_list) == 0 else self.code_list
-    for code in code_list:
+    return [RealtimeRequestItem.dummy_code] if len(self.code_list) == 0 else self.code_list
+
+  def update_code_fids(self, real_code_fid_dict):
+    for code in self.effective_code_list():
       if self.opt_type == "0":
         real_code_fid_dict[code] = self.fid_list
       else:
@@ -38,6 +43,15 @@ class RealtimeRequestItem:
 
 
 class RTKiwoom:
+  # 실시간 타입 -> 콜백 이름
+  real_type_callbacks = {
+    '장시작시간': '장시작시간',
+    '주식체결': '주식체결',
+    '업종지수': '업종지수',
+  }
+  err_sise_overflow = -200 # OP_ERR_SISE_OVERFLOW
+  max_overflow_retries = 5
+
   def __init__(self, outside_callback_dict = None):
 
     self.__log_instance=Logging()
@@ -56,7 +70,10 @@ class RTKiwoom:
 
     self.local_event_loop = QEventLoop()
     self.real_code_fid_dict = defaultdict(list)
-    self.real_code_data = defaultdict(list)
+    self.real_code_decoders = {} # code -> RealDataDecoder (등록시 컴파일)
+    self.real_code_data = RealCodeDataBuffers() # code -> 최근 N개 실시간 레코드 (링 버퍼)
+    self.tr_scheduler = TRScheduler() # TR 요청 한도 (모든 호출자 공유, 주문은 제외)
+    self.tr_schemas = TRSchemaRegistry() # TR 코드 -> 컴파일된 레이아웃
 
     self.connected = False
 
@@ -64,6 +81,17 @@ class RTKiwoom:
 
   def set_rt_agent(self, agent):
     self.__rt_agent = agent
+    if agent.config_manager is not None:
+      self.configure(agent.config_manager)
+
+  def configure(self, config_manager):
+    '''
+    설정 반영: 실시간 링 버퍼 크기, TR 요청 한도, TR 레이아웃 캐시
+    '''
+    capacity = config_manager.get_realtime_info()['real_data_capacity']
+    self.real_code_data.configure(capacity['default'], capacity['codes'])
+    self.tr_scheduler.configure(**config_manager.get_tr_limits())
+    self.tr_schemas.configure(config_manager.get_tr_schema_cache_path())
     
   def get_logger(self):
     return self.__log_instance.logger
@@ -125,6 +153,24 @@ class RTKiwoom:
     data = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, index, item)
     return data.strip()
 
+  def GetCommDataEx(self, trcode, rqname):
+    """
+    멀티데이터 전체를 한 번에 가져오는 메서드
+    :return: [[값, ...], ...] (행 x 출력 항목, .enc 항목 순서), 없으면 빈 리스트 (또는 None)
+    """
+    return self.ocx.dynamicCall("GetCommDataEx(QString, QString)", trcode, rqname)
+
+  def get_multi_data_columns(self, trcode, rqname, items):
+    '''
+    멀티데이터를 컬럼별 문자열 목록으로: GetCommDataEx 한 번으로 가져오고,
+    비어 있거나 폭이 항목 수와 다르면 GetRepeatCnt + 셀 단위 GetCommData로 가져온다.
+    '''
+    table = self.GetCommDataEx(trcode, rqname)
+    if table and all(len(row) == len(items) for row in table):
+      return [list(column) for column in zip(*table)]
+    rows = self.GetRepeatCnt(trcode, rqname)
+    return [[self.GetCommData(trcode, rqname, row, item) for row in range(rows)] for item in items]
+
   def __slot_connect(self, err_code):
     '''
     슬롯: 로그인 이벤트
@@ -145,33 +191,45 @@ class RTKiwoom:
     '''
     서버에 데이터 요청 TR 요청 비동기
     '''
-    self.ocx.dynamicCall("CommRqData(QString, QString, int, QString)", rqname, trcode, next, screen_no)
+    return self.ocx.dynamicCall("CommRqData(QString, QString, int, QString)", rqname, trcode, next, screen_no)
 
   def block_TR_request(self, trcode, **kwargs):
     '''
     TR 요청을 블록킹
+    priority: TRScheduler 우선순위 (기본값: TRScheduler.ACCOUNT), 요청 한도 안에서 바로 보낸다.
     '''
-    self.tr_items = parser.parse_dat(trcode, parser.read_enc(trcode))
+    self.tr_schema = self.tr_schemas.get(trcode)
     self.tr_record = kwargs["output"]
+    self.tr_output_index, self.tr_output_items = self.tr_schema.output(self.tr_record)
+    assert self.tr_output_index != -1, 'invalid output name'
     next = kwargs["next"]
 
     # set input
-    assert len(self.tr_items['input']) == 1
-    for key, ids in self.tr_items['input'][0].items():
-      for id in ids:
-        self.SetInputValue(id, kwargs[id])
+    for id in self.tr_schema.input_ids:
+      self.SetInputValue(id, kwargs[id])
 
     # initialize
     # TODO: 밖으로 빼기
     self.received = False
+    self.tr_error = None
     self.tr_remained = False
     self.tr_has_no_single = True if "has_no_single" in kwargs and kwargs["has_no_single"] else False
 
-    # request
-    self.CommRqData(trcode, trcode, next, "0101")
+    # request: 서버 과부하(-200)로 거절되면 초당 버킷을 비우고 다시 요청
+    priority = kwargs.get("priority", TRScheduler.ACCOUNT)
+    for _ in range(RTKiwoom.max_overflow_retries):
+      self.tr_scheduler.acquire(priority)
+      ret_code = self.CommRqData(trcode, trcode, next, "0101")
+      if ret_code != RTKiwoom.err_sise_overflow:
+        break
+      self.tr_scheduler.penalize()
+      self.get_logger().warning(f"TR 요청 과부하: {trcode=} => {self.kiwoom_errors[ret_code]}")
+    assert ret_code == 0, f"TR 요청 실패: {trcode=} => {self.kiwoom_errors[ret_code]}"
     assert not self.__is_local_event_loop_running()
     self.local_event_loop.exec_()
 
+    if self.tr_error is not None:
+      raise self.tr_error
     return self.tr_data
 
   def RegisterRealtimeRequest(self, rqItem: RealtimeRequestItem):
@@ -179,6 +237,8 @@ class RTKiwoom:
     실시간 데이터 요청 등록
     '''
     rqItem.update_code_fids(self.real_code_fid_dict)
+    for code in rqItem.effective_code_list():
+      self.real_code_decoders[code] = RealDataDecoder(self.real_code_fid_dict[code])
     self.__set_real_reg(**rqItem.build())
 
   def __set_real_reg(self, screen_no, code_list, fid_list, opt_type):
@@ -187,34 +247,22 @@ class RTKiwoom:
   def __slot_receive_real_data(self, sCode, sRealType, sRealData):
     '''
     슬롯: 실시간 데이터 수신 이벤트
+    등록시 컴파일된 디코더로 레코드 하나를 만들어 콜백에 전달한다.
     '''
-    real_data = {"code": sCode, "type": sRealType}
-    if sRealType == '장시작시간':
-      # sCode가 '09'로 입수. 하지만 요청시 지정하지 않았기 때문에
-      # RealtimeRequestItem.dummy_code로 구분한다.
-      if RealtimeRequestItem.dummy_code in self.real_code_fid_dict: 
-        for fid in self.real_code_fid_dict[RealtimeRequestItem.dummy_code]:
-          val = self.__get_com_real_data(sCode, fid)
-          real_data[fid] = val
-          self.real_code_data[sCode].append(real_data)
-        self.__rt_agent.realtime_callbacks["장시작시간"].apply(real_data)
-    elif sRealType == '주식체결':
-      if sCode in self.real_code_fid_dict:
-        for fid in self.real_code_fid_dict[sCode]:
-          val = self.__get_com_real_data(sCode, fid)
-          real_data[fid] = val
-          self.real_code_data[sCode].append(real_data)
-        self.__rt_agent.realtime_callbacks["주식체결"].apply(real_data)
-    elif sRealType == '업종지수':
-      if sCode in self.real_code_fid_dict:
-        for fid in self.real_code_fid_dict[sCode]:
-          val = self.__get_com_real_data(sCode, fid)
-          real_data[fid] = val
-          self.real_code_data[sCode].append(real_data)
-        self.__rt_agent.realtime_callbacks["업종지수"].apply(real_data)
-    else:
+    callback_name = RTKiwoom.real_type_callbacks.get(sRealType)
+    if callback_name is None:
+      return
+    # '장시작시간'은 sCode가 '09'로 입수. 하지만 요청시 지정하지 않았기 때문에
+    # RealtimeRequestItem.dummy_code로 구분한다.
+    decoder = self.real_code_decoders.get(RealtimeRequestItem.dummy_code if sRealType == '장시작시간' else sCode)
+    if decoder is None:
       return
-    # self.get_logger().debug(real_data)
+    record = decoder.decode(sRealType, sCode, self.__get_com_real_data)
+    if record is None:
+      return
+    self.real_code_data[sCode].append(record)
+    self.__rt_agent.realtime_callbacks[callback_name].apply(record)
+    # self.get_logger().debug(record)
 
   def __get_com_real_data(self, sCode, fid):
     '''
@@ -227,14 +275,6 @@ class RTKiwoom:
     ret = self.ocx.dynamicCall("GetChejanData(int)", fid)
     return ret
 
-  def __determine_output_type(self, output_name):
-    for i, output in enumerate(self.tr_items['output']):
-      key = list(output.keys())[0]
-      items = list(output.values())[0]
-      if key == output_name:
-        return i, items
-    return -1, None
-
   def __slot_receive_chejan_data(self, gubun, item_cnt, fid_list):
     """
     슬롯: 체결잔고 데이터 수신 이벤트
@@ -256,10 +296,8 @@ class RTKiwoom:
   def __slot_receive_tr_data(self, screen, rqname, trcode, record, next):
     '''
     슬롯: TR 데이터 수신 이벤트
-    tr_items['output']
+    출력 레코드와 항목은 요청시 TR 레이아웃에서 찾아 둔다. (tr_output_index, tr_output_items)
     '''
-    record = None
-    items = None
 
     # remained data
     if next == '2':
@@ -268,31 +306,26 @@ class RTKiwoom:
       self.tr_remained = False
 
     # i == 0 일때는 싱글 데이터 요청에 대한 응답이다.
-    i, items = self.__determine_output_type(self.tr_record)
-    assert i != -1, 'invalid output name'
+    i, items = self.tr_output_index, self.tr_output_items
     is_single_data = True if i == 0 and not self.tr_has_no_single else False
 
-    if is_single_data:
-      rows = 1
-    else:
-      rows = self.GetRepeatCnt(trcode, rqname)
-
-    data_list = []
-    for row in range(rows):
-      row_data = []
-      for item in items:
-        data = self.GetCommData(trcode, rqname, row, item)
-        row_data.append(data)
-      data_list.append(row_data)
-
-    # data to DataFrame
-    df = pd.DataFrame(data=data_list, columns=items)
-    self.tr_data = df
-    self.received = True
-
-    # 블록킹 종료
-    if self.local_event_loop.isRunning():
-      self.local_event_loop.exit()
+    # 컬럼 단위로 가져와서 형식 변환 (TRSchema.to_frame)
+    # 예외가 나도 이벤트 루프는 끝내고, 예외는 block_TR_request에서 다시 올린다.
+    try:
+      if is_single_data:
+        columns = [[self.GetCommData(trcode, rqname, 0, item)] for item in items]
+      else:
+        columns = self.get_multi_data_columns(trcode, rqname, items)
+      self.tr_data = self.tr_schema.to_frame(i, columns)
+    except Exception as e:
+      self.tr_data = None
+      self.tr_error = e
+    finally:
+      self.received = True
+
+      # 블록킹 종료
+      if self.local_event_loop.isRunning():
+        self.local_event_loop.exit()
 
   def SendOrder(self, rqname, screen, accno, order_type, code, quantity, price, hoga, order_no):
     """
@@ -313,6 +346,7 @@ class RTKiwoom:
     :param order_no: 원주문번호로 신규 주문시 공백, 정정이나 취소 주문시에는 원주문번호를 입력
     :return:
     """
+    # 주문은 TR 한도와 따로 집계되므로 TR 스케줄러를 거치지 않는다. (Qt 스레드에서 토큰을 기다리지 않음)
     ret = self.ocx.dynamicCall("SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)",
                                 [rqname, screen, accno, order_type, code, quantity, price, hoga, order_no])
     return ret
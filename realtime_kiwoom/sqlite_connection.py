@@ -0,0 +1,110 @@
+from __future__ import annotations
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.pool import SingletonThreadPool
+
+class _UnclosableConnection:
+  """
+  엔진 풀에 넘겨주는 연결 래퍼: 풀이 반납/정리하면서 close()해도 실제 연결은 닫지 않는다. (닫는 것은 SQLiteConnectionManager.close)
+  """
+  def __init__(self, connection):
+    self.__connection = connection
+
+  def close(self):
+    pass
+
+  def __getattr__(self, name):
+    return getattr(self.__connection, name)
+
+class SQLiteConnectionManager:
+  """
+  DB 파일 하나에 대해 스레드마다 오래 유지하는 sqlite3 연결
+  - 연결을 만들 때 한 번만 PRAGMA 적용 (파일 DB는 WAL: 수집기가 쓰는 동안 노트북/백테스트가 읽을 수 있다)
+  - 연결은 만든 스레드에서만 쓴다. (close()만 다른 스레드에서 할 수 있도록 check_same_thread=False)
+  - sqlite3 모듈의 문장 캐시(cached_statements)를 쓰므로, SQL 문자열은 고정하고 값은 ? 파라미터로 넘겨야 재컴파일하지 않는다.
+  - engine: 같은 연결을 쓰는 SQLAlchemy 엔진 (to_sql, 노트북 호환용)
+  """
+  default_pragmas = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 2**20,
+    'cache_size': -64 * 2**10, # 음수: KiB 단위 (64MiB)
+    'temp_store': 'MEMORY',
+  }
+  file_only_pragmas = ['journal_mode', 'mmap_size']
+
+  def __init__(self, db_path, pragmas:dict=None, cached_statements=256, timeout=30.0):
+    self.db_path = db_path
+    self.pragmas = dict(SQLiteConnectionManager.default_pragmas, **(pragmas or {}))
+    self.cached_statements = cached_statements
+    self.timeout = timeout
+    self.__local = threading.local()
+    self.__lock = threading.Lock()
+    self.__connections = []
+    self.__generation = 0 # close() 후에는 스레드별 연결을 새로 만든다.
+    self.engine = create_engine('sqlite://', creator=lambda: _UnclosableConnection(self.connection()), poolclass=SingletonThreadPool, pool_size=64)
+
+  def is_in_memory_db(self):
+    return self.db_path == ':memory:'
+
+  def __connect(self):
+    connection = sqlite3.connect(self.db_path, timeout=self.timeout, cached_statements=self.cached_statements, check_same_thread=False)
+    for name, value in self.pragmas.items():
+      if value is None or (self.is_in_memory_db() and name in SQLiteConnectionManager.file_only_pragmas):
+        continue
+      connection.execute(f'PRAGMA {name}={value}')
+    return connection
+
+  def connection(self):
+    '''
+    현재 스레드의 연결 (없으면 생성)
+    '''
+    local = self.__local
+    if getattr(local, 'generation', None) != self.__generation:
+      local.connection = self.__connect()
+      local.generation = self.__generation
+      with self.__lock:
+        self.__connections.append(local.connection)
+    return local.connection
+
+  @contextmanager
+  def transaction(self):
+    '''
+    BEGIN ... COMMIT (예외시 ROLLBACK), 이미 트랜잭션 안이면 바깥 트랜잭션에 합류
+    '''
+    connection = self.connection()
+    if connection.in_transaction:
+      yield connection
+      return
+    connection.execute('BEGIN')
+    try:
+      yield connection
+    except BaseException:
+      connection.rollback()
+      raise
+    connection.commit()
+
+  def execute(self, query_string, params=()):
+    return self.connection().execute(query_string, params)
+
+  def query(self, query_string, params=()):
+    '''
+    SELECT 결과를 데이터프레임으로 (pd.read_sql_query와 같은 형태)
+    '''
+    cursor = self.connection().execute(query_string, params)
+    columns = [col[0] for col in cursor.description]
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
+
+  def close(self):
+    '''
+    모든 스레드의 연결을 닫는다. (마지막 연결이 닫히면 WAL 파일이 체크포인트되어 정리된다)
+    '''
+    self.engine.dispose()
+    with self.__lock:
+      connections, self.__connections = self.__connections, []
+      self.__generation += 1
+    for connection in connections:
+      connection.close()
@@ -0,0 +1,901 @@
+from __future__ import annotations
+from abc import *
+import threading
+import numpy as np
+import pandas as pd
+from miscs.time_manager import TimeManager
+from realtime_kiwoom.sqlite_connection import SQLiteConnectionManager
+from realtime_kiwoom.tick_store import TickColumns, hhmmss_to_seconds, seconds_to_hhmmss, minute_chart_frame, tick_frame, tick_frame_columns
+from realtime_kiwoom.rollup import rollup_resolutions, rollup_minute_arrays
+
+minute_value_columns = ['open', 'high', 'low', 'close', 'volume']
+
+def dt_str_to_epoch_minutes(dt:pd.Series):
+  '''
+  'YYYYMMDDHHMMSS' (서울시) -> UTC epoch 분
+  '''
+  local = pd.to_datetime(dt, format='%Y%m%d%H%M%S').dt.tz_localize('Asia/Seoul')
+  return (local.dt.tz_convert('UTC').dt.tz_localize(None).values.astype('datetime64[m]').astype('int64'))
+
+def epoch_minutes_to_index(minutes):
+  '''
+  UTC epoch 분 배열 -> dt 인덱스 (서울시)
+  '''
+  return pd.DatetimeIndex((np.asarray(minutes, dtype=np.int64) * 60_000_000_000).view('datetime64[ns]'), name='dt').tz_localize('UTC').tz_convert('Asia/Seoul')
+
+def epoch_minutes_to_str(minutes):
+  return TimeManager.ts_to_str(TimeManager.epoch_minutes_to_ts(int(minutes)), '%Y%m%d%H%M%S')
+
+def kst_day_numbers(minutes):
+  '''
+  UTC epoch 분 -> 서울시 날짜 번호 (1970-01-01부터 일 수)
+  '''
+  return (np.asarray(minutes, dtype=np.int64) + 9 * 60) // 1440
+
+def day_number_to_ts(day):
+  '''
+  서울시 날짜 번호 -> 그 날 00:00 (서울시)
+  '''
+  return pd.Timestamp(int(day) * 1440 * 60_000_000_000).tz_localize('Asia/Seoul')
+
+def filled_minute_range(df:pd.DataFrame, counts:dict, code, dt_last):
+  '''
+  append_minutes 결과에서 code의 dt_last 이하 (이미 읽어 둔 구간)에 행이 들어갔는지
+  반환: None (들어가지 않음) | (dt_from, True): 확실히 들어감 | (dt_from, False): 확실하지 않음 (dt_last 이후 행 일부가 이미 있었던 경우)
+  dt_from: 배치에서 dt_last 이하인 가장 이른 dt ('YYYYMMDDHHMMSS'), 확실하지 않으면 [dt_from, dt_last] 구간 행 수로 확인한다.
+  '''
+  if counts.get(code, {'inserted': 0})['inserted'] == 0:
+    return None
+  dts = df['dt'].values[df['st_code'].values == code]
+  before = dts[dts <= dt_last]
+  if len(before) == 0:
+    return None
+  num_after = len(np.unique(dts[dts > dt_last]))
+  # dt_last 이후 행이 모두 새 행이어도 삽입 수가 더 많으면 이전에도 들어간 것, 건너뛴 행이 없으면 배치 전체가 들어간 것
+  certain = counts[code]['inserted'] > num_after or counts[code]['skipped'] == 0
+  return before.min(), certain
+
+def make_minute_frame(code, index:pd.DatetimeIndex, values):
+  '''
+  종목 하나의 분봉 데이터프레임: dt 인덱스 + st_code, open, high, low, close, volume (int64)
+  '''
+  df = pd.DataFrame(np.asarray(values, dtype=np.int64).reshape(-1, len(minute_value_columns)), columns=minute_value_columns)
+  df.index = index
+  df.insert(0, 'st_code', code)
+  return df
+
+def split_sorted_minutes(keys, dt_minutes, values, key_of_code:dict, codes):
+  '''
+  (종목 키, dt) 순으로 정렬된 배열을 종목 경계(searchsorted)로 잘라서 {code: 분봉 데이터프레임}
+  keys: 종목 키 배열 (st_code 또는 st_id), dt_minutes: UTC epoch 분
+  '''
+  history = {}
+  for code in codes:
+    key = key_of_code.get(code)
+    begin, end = (np.searchsorted(keys, key, side='left'), np.searchsorted(keys, key, side='right')) if key is not None else (0, 0)
+    history[code] = make_minute_frame(code, epoch_minutes_to_index(dt_minutes[begin:end]), values[begin:end])
+  return history
+
+class QueryBaseStrings:
+  table_create_query = '''
+  CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+    st_code TEXT not NULL,
+    dt TEXT not NULL,
+    open INTEGER,
+    high INTEGER,
+    low INTEGER,
+    close INTEGER,
+    volume INTEGER
+  )
+  '''
+  index_create_query = '''
+  CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {TABLE_NAME} (st_code ASC, dt ASC)
+  '''
+
+  insert_query = '''
+  INSERT INTO {TABLE_NAME} (st_code, dt, open, high, low, close, volume)
+  VALUES (?, ?, ?, ?, ?, ?, ?)
+  '''
+
+  # 분봉 테이블: (st_code, dt) 유일 키 + 충돌은 건너뛰는 삽입 (겹치는 구간을 다시 넣어도 안전)
+  unique_index_create_query = '''
+  CREATE UNIQUE INDEX IF NOT EXISTS {INDEX_NAME} ON {TABLE_NAME} (st_code ASC, dt ASC)
+  '''
+
+  insert_or_ignore_query = '''
+  INSERT OR IGNORE INTO {TABLE_NAME} (st_code, dt, open, high, low, close, volume)
+  VALUES (?, ?, ?, ?, ?, ?, ?)
+  '''
+
+  drop_table_query = '''
+  DROP TABLE IF EXISTS {TABLE_NAME}
+  '''
+
+  # 분봉 스키마 v2: 정수 종목 id + UTC epoch 분, (st_id, dt) 클러스터드 기본키 (별도 인덱스/rowid 없음)
+  table_create_query_v2 = '''
+  CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+    st_id INTEGER not NULL,
+    dt INTEGER not NULL,
+    open INTEGER,
+    high INTEGER,
+    low INTEGER,
+    close INTEGER,
+    volume INTEGER,
+    PRIMARY KEY (st_id, dt)
+  ) WITHOUT ROWID
+  '''
+
+  instruments_create_query = '''
+  CREATE TABLE IF NOT EXISTS instruments (
+    st_id INTEGER PRIMARY KEY,
+    st_code TEXT not NULL UNIQUE
+  )
+  '''
+
+  insert_or_ignore_query_v2 = '''
+  INSERT OR IGNORE INTO {TABLE_NAME} (st_id, dt, open, high, low, close, volume)
+  VALUES (?, ?, ?, ?, ?, ?, ?)
+  '''
+
+  drop_index_query = '''
+  DROP INDEX IF EXISTS {INDEX_NAME}
+  '''
+
+  # 롤업 테이블: dt는 버킷 시작 (UTC epoch 분), 버킷을 다시 집계하면 교체
+  rollup_table_create_query = '''
+  CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+    st_code TEXT not NULL,
+    dt INTEGER not NULL,
+    open INTEGER,
+    high INTEGER,
+    low INTEGER,
+    close INTEGER,
+    volume INTEGER,
+    PRIMARY KEY (st_code, dt)
+  ) WITHOUT ROWID
+  '''
+
+  rollup_upsert_query = '''
+  INSERT OR REPLACE INTO {TABLE_NAME} (st_code, dt, open, high, low, close, volume)
+  VALUES (?, ?, ?, ?, ?, ?, ?)
+  '''
+
+  # 틱 -> 1분봉 (dt: YYYYMMDDHHMM00), 파라미터: (YYYYMMDD, FROM_HHMMSS, END_HHMMSS)
+  make_minute_chart_query = '''
+  select DISTINCT t.st_code, ?||t.minute||'00' as dt,
+  first_value(t.close) over (partition by t.st_code, t.minute order by t.dt, t.seq ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as open,
+  max(t.close) over (partition by t.st_code, t.minute order by t.dt, t.seq ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as high,
+  min(t.close) over (partition by t.st_code, t.minute order by t.dt, t.seq ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as low,
+  last_value(t.close) over (partition by t.st_code, t.minute order by t.dt, t.seq ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as close,
+  sum(t.volume) over (partition by t.st_code, t.minute order by t.dt, t.seq ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as volume
+  from (
+    select rowid as seq, *, substr(dt, 0, 5) as minute
+    from {TABLE_NAME}
+    where dt >= ? and dt < ?
+    ) as t
+  order by t.st_code, t.minute
+  '''
+
+class StorageBackend(metaclass=ABCMeta):
+  """
+  데이터 프로바이더(MinuteChartDataProvider, RealTimeTickDataPrivder) 아래의 저장소 연산
+  - 분봉 테이블: (st_code, dt) 유일, 생성 / 일괄 추가(중복 건너뜀) / 종목별 구간 읽기 / 마지막 시간 / 종목별 (min, max)
+  - 롤업 테이블 ({table}_5m, _15m, _60m, _1d): 생성 / 버킷 교체 / 구간 읽기 / 직전 버킷, 분봉에서 날짜 단위로 다시 집계 (update_rollups)
+  - 틱 테이블: 생성 / 일괄 추가 / 마지막 체결시간 / 1분봉 집계 / 전체 읽기
+  분봉 구간 읽기의 결과는 {code: 데이터프레임(dt 인덱스(서울시), st_code, open, high, low, close, volume)}로 모든 백엔드가 같다.
+  """
+  name = None
+
+  @staticmethod
+  def Factory(name, db_path=':memory:', pragmas=None):
+    """
+    Factory method: 'sqlite' | 'duckdb' | 'numpy'
+    """
+    if name == 'sqlite':
+      return SQLiteStorageBackend(db_path, pragmas=pragmas)
+    if name == 'duckdb':
+      return DuckDBStorageBackend(db_path)
+    if name == 'numpy':
+      return NumPyStorageBackend()
+    raise ValueError(f'unknown storage backend: {name}')
+
+  # 분봉
+  @abstractmethod
+  def create_minute_table(self, table, drop=False, schema_version='v1'):
+    pass
+
+  def minute_schema_version(self, table):
+    return self.name
+
+  @abstractmethod
+  def append_minutes(self, table, df:pd.DataFrame):
+    '''
+    df: st_code, dt('YYYYMMDDHHMMSS'), open, high, low, close, volume
+    이미 있는 (종목, 시간)과 배치 안에서 다시 나온 (종목, 시간)은 건너뛴다. 반환: {code: {'inserted': n, 'skipped': m}}
+    '''
+    pass
+
+  @abstractmethod
+  def read_minutes(self, table, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    '''
+    [ts_from, ts_end) (분 단위 내림) 구간의 분봉: {code: 데이터프레임}, 데이터가 없는 종목은 빈 데이터프레임
+    '''
+    pass
+
+  @abstractmethod
+  def last_minute_ts(self, table, code):
+    '''
+    종목의 마지막 분봉 시간 (없으면 None)
+    '''
+    pass
+
+  @abstractmethod
+  def minute_stats(self, table, codes):
+    '''
+    종목별 (min(dt), max(dt)) 'YYYYMMDDHHMMSS': 행이 없는 종목은 빠진다.
+    '''
+    pass
+
+  def migrate_minute_table(self, table, to_version, vacuum=True):
+    raise NotImplementedError(f'{self.name}: schema migration is not supported')
+
+  # 롤업
+  @staticmethod
+  def rollup_table_name(table, resolution):
+    return f'{table}_{resolution}'
+
+  @abstractmethod
+  def create_rollup_tables(self, table, resolutions, drop=False):
+    pass
+
+  @abstractmethod
+  def write_rollups(self, table, resolution, code, buckets, values):
+    '''
+    버킷 (시작: UTC epoch 분) 행 교체 (없으면 추가), values: (n, 5) open, high, low, close, volume
+    '''
+    pass
+
+  @abstractmethod
+  def read_rollups(self, table, resolution, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    '''
+    버킷 시작이 [ts_from, ts_end)인 롤업 봉: {code: 데이터프레임} (read_minutes와 같은 형태, dt는 버킷 시작)
+    '''
+    pass
+
+  @abstractmethod
+  def rollup_before(self, table, resolution, code, ts:pd.Timestamp):
+    '''
+    버킷 시작이 ts 미만인 마지막 롤업 봉: (버킷 시작 ts, [open, high, low, close, volume]), 없으면 None
+    '''
+    pass
+
+  def update_rollups(self, table, resolutions, code_days:dict, max_read_days=31):
+    '''
+    code_days: {code: 서울시 날짜 번호 배열} 해당 날짜에 속한 버킷만 분봉에서 다시 집계하여 교체 (버킷은 하루를 넘지 않는다)
+    가까운 날짜(7일 이내)끼리 묶어 최대 max_read_days 일씩 한 번에 읽는다.
+    반환: {resolution: 교체한 버킷 수}
+    '''
+    counts = {res: 0 for res in resolutions}
+    for code, days in code_days.items():
+      days = np.unique(np.asarray(days, dtype=np.int64))
+      begin = 0
+      for i in range(1, len(days) + 1):
+        if i < len(days) and days[i] - days[i - 1] <= 7 and days[i] - days[begin] < max_read_days:
+          continue
+        run = days[begin:i]
+        begin = i
+        df = self.read_minutes(table, [code], day_number_to_ts(run[0]), day_number_to_ts(run[-1] + 1))[code]
+        dt_minutes = df.index.asi8 // 60_000_000_000
+        values = df[minute_value_columns].to_numpy(dtype='int64')
+        for res in resolutions:
+          buckets, bars = rollup_minute_arrays(dt_minutes, values, rollup_resolutions[res])
+          keep = np.isin(kst_day_numbers(buckets), run)
+          self.write_rollups(table, res, code, buckets[keep], bars[keep])
+          counts[res] += int(keep.sum())
+    return counts
+
+  # 틱
+  @abstractmethod
+  def create_tick_table(self, table, drop=False):
+    pass
+
+  @abstractmethod
+  def append_ticks(self, table, rows):
+    '''
+    rows: [(st_code, hhmmss, open, high, low, close, volume), ...] (도착순)
+    '''
+    pass
+
+  @abstractmethod
+  def last_tick_hhmmss(self, table):
+    pass
+
+  @abstractmethod
+  def aggregate_ticks_to_minute(self, table, yyyymmdd, from_hhmmss, end_hhmmss):
+    '''
+    [from_hhmmss, end_hhmmss) 틱을 1분봉으로 (시/고/저/종가는 체결가 기준, 같은 시간은 도착순), (종목, 시간)순
+    '''
+    pass
+
+  @abstractmethod
+  def read_ticks(self, table):
+    pass
+
+  def query(self, query_string, params=()):
+    raise NotImplementedError(f'{self.name}: SQL query is not supported')
+
+  def close(self):
+    pass
+
+class SQLiteStorageBackend(StorageBackend):
+  """
+  SQLite 저장소 (기본): 스레드마다 오래 유지하는 연결 (SQLiteConnectionManager)
+  - 분봉 스키마 v1(TEXT dt + 유일 인덱스) / v2(정수 키 WITHOUT ROWID)는 테이블마다 감지해서 읽고 쓴다.
+  """
+  name = 'sqlite'
+
+  def __init__(self, db_path, pragmas:dict=None):
+    self.db_path = db_path
+    self.connections = SQLiteConnectionManager(db_path, pragmas=pragmas)
+    self.engine = self.connections.engine
+    self.__schema_versions = {} # table -> 'v1' | 'v2'
+    self.__unique_keys = {} # table -> v1 테이블에 (st_code, dt) 유일 인덱스가 있는지
+    self.__instrument_ids = {} # st_code -> st_id (v2)
+
+  def query(self, query_string, params=()):
+    return self.connections.query(query_string, params)
+
+  def close(self):
+    self.connections.close()
+
+  @staticmethod
+  def unique_index_name(table):
+    return f'uidx_{table}'
+
+  def detect_schema_version(self, table):
+    '''
+    테이블의 스키마 ('v1' | 'v2'), 테이블이 없으면 None
+    '''
+    columns = [row[1] for row in self.connections.execute(f'PRAGMA table_info({table})')]
+    if not columns:
+      return None
+    return 'v2' if 'st_id' in columns else 'v1'
+
+  def minute_schema_version(self, table):
+    return self.__schema_versions.get(table)
+
+  def create_minute_table(self, table, drop=False, schema_version='v1'):
+    '''
+    schema_version: 테이블이 없을 때 만들 스키마, 이미 있는 테이블은 실제 스키마를 따른다.
+    '''
+    if drop:
+      with self.connections.transaction() as connection:
+        connection.execute(QueryBaseStrings.drop_table_query.format(TABLE_NAME=table))
+    self.__schema_versions[table] = self.detect_schema_version(table) or schema_version
+    with self.connections.transaction() as connection:
+      if self.__schema_versions[table] == 'v2':
+        connection.execute(QueryBaseStrings.instruments_create_query)
+        connection.execute(QueryBaseStrings.table_create_query_v2.format(TABLE_NAME=table))
+      else:
+        connection.execute(QueryBaseStrings.table_create_query.format(TABLE_NAME=table))
+        self.__ensure_unique_key(connection, table)
+
+  def __ensure_unique_key(self, connection, table):
+    '''
+    v1: (st_code, dt) 유일 인덱스 보장
+    예전 테이블(비유일 인덱스 idx_<table>)은 중복 행이 없을 때만 유일 인덱스로 바꾼다. (행을 지우지 않는다)
+    중복 행이 있으면 읽기만 되고, 쓰기 전에 dedup_minute_table (run_migrate_minute_schema.py)로 정리해야 한다.
+    '''
+    index_name = SQLiteStorageBackend.unique_index_name(table)
+    exists = connection.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name=?", (index_name,)).fetchall()
+    if not exists:
+      has_duplicates = connection.execute(f'SELECT 1 FROM {table} GROUP BY st_code, dt HAVING COUNT(*) > 1 LIMIT 1').fetchall()
+      if has_duplicates:
+        self.__unique_keys[table] = False
+        return
+      connection.execute(QueryBaseStrings.unique_index_create_query.format(INDEX_NAME=index_name, TABLE_NAME=table))
+    connection.execute(QueryBaseStrings.drop_index_query.format(INDEX_NAME=f'idx_{table}'))
+    self.__unique_keys[table] = True
+
+  def dedup_minute_table(self, table):
+    '''
+    v1: (st_code, dt)가 중복된 행을 먼저 들어간 행만 남기고 지운 뒤 유일 인덱스 생성 (INSERT OR IGNORE 적재와 같은 규칙)
+    반환값: 지운 행 수
+    '''
+    index_name = SQLiteStorageBackend.unique_index_name(table)
+    with self.connections.transaction() as connection:
+      num_removed = connection.execute(f'DELETE FROM {table} WHERE rowid NOT IN (SELECT MIN(rowid) FROM {table} GROUP BY st_code, dt)').rowcount
+      connection.execute(QueryBaseStrings.unique_index_create_query.format(INDEX_NAME=index_name, TABLE_NAME=table))
+      connection.execute(QueryBaseStrings.drop_index_query.format(INDEX_NAME=f'idx_{table}'))
+    self.__unique_keys[table] = True
+    return num_removed
+
+  def get_instrument_ids(self, codes, create=False):
+    '''
+    v2: st_code -> st_id (create=True이면 없는 종목을 등록)
+    '''
+    missing = [code for code in codes if code not in self.__instrument_ids]
+    if missing:
+      with self.connections.transaction() as connection:
+        if create:
+          connection.executemany('INSERT OR IGNORE INTO instruments (st_code) VALUES (?)', [(code,) for code in missing])
+        rows = connection.execute(f"SELECT st_code, st_id FROM instruments WHERE st_code IN ({','.join('?' * len(missing))})", missing).fetchall()
+      self.__instrument_ids.update({st_code: st_id for st_code, st_id in rows})
+    return {code: self.__instrument_ids[code] for code in codes if code in self.__instrument_ids}
+
+  def append_minutes(self, table, df:pd.DataFrame):
+    counts = {}
+    if len(df) == 0:
+      return counts
+    df = df.sort_values(['st_code', 'dt'], kind='stable')
+    if self.minute_schema_version(table) == 'v2':
+      ids = self.get_instrument_ids(df['st_code'].unique().tolist(), create=True)
+      keys = df['st_code'].map(ids).tolist()
+      dts = dt_str_to_epoch_minutes(df['dt']).tolist()
+      insert_query = QueryBaseStrings.insert_or_ignore_query_v2.format(TABLE_NAME=table)
+    else:
+      assert self.__unique_keys.get(table, True), f'{table}: (st_code, dt) 중복 행이 있어 유일 인덱스가 없다. run_migrate_minute_schema.py로 정리한 뒤 적재'
+      keys = df['st_code'].tolist()
+      dts = df['dt'].tolist()
+      insert_query = QueryBaseStrings.insert_or_ignore_query.format(TABLE_NAME=table)
+    rows = list(zip(keys, dts, *(df[col].tolist() for col in minute_value_columns)))
+    st_codes = df['st_code'].values
+    boundaries = np.flatnonzero(np.r_[True, st_codes[1:] != st_codes[:-1], True])
+    with self.connections.transaction() as connection:
+      for begin, end in zip(boundaries[:-1], boundaries[1:]):
+        num_inserted = connection.executemany(insert_query, rows[begin:end]).rowcount
+        counts[st_codes[begin]] = {'inserted': num_inserted, 'skipped': int(end - begin) - num_inserted}
+    return counts
+
+  def read_minutes(self, table, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    if self.minute_schema_version(table) == 'v2':
+      return self.__read_minutes_v2(table, codes, ts_from, ts_end)
+    df = self.query(f'''
+    SELECT * FROM {table}
+    WHERE st_code IN ({','.join('?' * len(codes))}) AND dt >= ?{' AND dt < ?' if ts_end is not None else ''}
+    ORDER BY st_code ASC, dt ASC
+    ''', [*codes, TimeManager.ts_to_str(ts_from)] + ([TimeManager.ts_to_str(ts_end)] if ts_end is not None else []))
+    return SQLiteStorageBackend.split_by_code(df, codes)
+
+  @staticmethod
+  def split_by_code(df:pd.DataFrame, codes):
+    '''
+    v1: (st_code, dt) 순으로 정렬된 쿼리 결과를 한 번에 변환하고, 종목 경계(searchsorted)로 잘라서 종목별로 나눈다.
+    포맷을 지정한 to_datetime 한 번 + 종목별 슬라이스이므로 종목 수만큼 전체를 다시 훑지 않는다.
+    '''
+    df['dt'] = pd.to_datetime(df['dt'], format='%Y%m%d%H%M%S').dt.tz_localize('Asia/Seoul')
+    df = df.set_index('dt')
+    st_codes = df['st_code'].values
+    history = {}
+    for st_code in codes:
+      begin, end = np.searchsorted(st_codes, st_code, side='left'), np.searchsorted(st_codes, st_code, side='right')
+      history[st_code] = df.iloc[begin:end].copy()
+    return history
+
+  def __read_minutes_v2(self, table, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp):
+    '''
+    v2: 종목별 기본키 범위를 읽고, 정수 dt를 그대로 인덱스로 변환 (문자열 파싱 없음)
+    '''
+    ids = self.get_instrument_ids(codes)
+    id_list = sorted(ids.values())
+    df = self.query(f'''
+    SELECT st_id, dt, open, high, low, close, volume FROM {table}
+    WHERE st_id IN ({','.join('?' * len(id_list))}) AND dt >= ?{' AND dt < ?' if ts_end is not None else ''}
+    ORDER BY st_id ASC, dt ASC
+    ''', [*id_list, TimeManager.ts_to_epoch_minutes(ts_from)] + ([TimeManager.ts_to_epoch_minutes(ts_end)] if ts_end is not None else [])) if id_list else pd.DataFrame(columns=['st_id', 'dt'] + minute_value_columns)
+    return split_sorted_minutes(df['st_id'].values.astype(np.int64), df['dt'].values.astype(np.int64), df[minute_value_columns].to_numpy(dtype='int64'), ids, codes)
+
+  def last_minute_ts(self, table, code):
+    if self.minute_schema_version(table) == 'v2':
+      st_id = self.get_instrument_ids([code]).get(code)
+      last_dt = self.connections.execute(f'SELECT MAX(dt) FROM {table} WHERE st_id=?', (st_id,)).fetchone()[0] if st_id is not None else None
+      return TimeManager.epoch_minutes_to_ts(int(last_dt)) if last_dt is not None else None
+    row = self.connections.execute(f'SELECT dt FROM {table} WHERE st_code=? ORDER BY dt DESC LIMIT 1', (code,)).fetchone()
+    return TimeManager.str_to_ts(row[0]) if row is not None else None
+
+  def minute_stats(self, table, codes):
+    '''
+    종목마다 MIN/MAX를 따로 조회해야 (종목, dt) 인덱스의 양 끝만 읽는다.
+    '''
+    if self.minute_schema_version(table) == 'v2':
+      ids = self.get_instrument_ids(codes)
+      if not ids:
+        return {}
+      rows = self.connections.execute(' UNION ALL '.join(f'''
+      SELECT ? st_code,
+        (SELECT MIN(dt) FROM {table} WHERE st_id=?) min_dt,
+        (SELECT MAX(dt) FROM {table} WHERE st_id=?) max_dt
+      ''' for _ in ids), [value for code, st_id in ids.items() for value in (code, st_id, st_id)]).fetchall()
+      return {st_code: (epoch_minutes_to_str(min_dt), epoch_minutes_to_str(max_dt)) for st_code, min_dt, max_dt in rows if max_dt is not None}
+    if not codes:
+      return {}
+    rows = self.connections.execute(' UNION ALL '.join(f'''
+    SELECT ? st_code,
+      (SELECT MIN(dt) FROM {table} WHERE st_code=?) min_dt,
+      (SELECT MAX(dt) FROM {table} WHERE st_code=?) max_dt
+    ''' for _ in codes), [code for code in codes for _ in range(3)]).fetchall()
+    return {st_code: (min_dt, max_dt) for st_code, min_dt, max_dt in rows if max_dt is not None}
+
+  def migrate_minute_table(self, table, to_version='v2', vacuum=True):
+    '''
+    테이블을 to_version 스키마로 제자리 변환 (한 트랜잭션: 새 테이블 생성 -> 변환 복사 -> 기존 테이블 삭제 -> 이름 변경)
+    v1 -> v2에서 (종목, 시간)이 중복된 행은 먼저 들어간 행만 남는다. (v1 -> v1은 중복 정리만)
+    반환값: (변환 전 행 수, 변환 후 행 수)
+    '''
+    from_version = self.minute_schema_version(table)
+    if from_version == to_version == 'v1' and not self.__unique_keys.get(table, True):
+      num_before = self.connections.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+      num_removed = self.dedup_minute_table(table)
+      if vacuum:
+        self.connections.execute('VACUUM')
+      return num_before, num_before - num_removed
+    tmp_table = f'{table}__migrating'
+    index_name = SQLiteStorageBackend.unique_index_name(table)
+    with self.connections.transaction() as connection:
+      num_before = connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+      if from_version == to_version:
+        return num_before, num_before
+      connection.execute(QueryBaseStrings.drop_table_query.format(TABLE_NAME=tmp_table))
+      if to_version == 'v2':
+        # dt는 서울시 기준 문자열이므로 UTC epoch 분으로 바꿀 때 9시간(540분)을 뺀다.
+        connection.execute(QueryBaseStrings.instruments_create_query)
+        connection.execute(QueryBaseStrings.table_create_query_v2.format(TABLE_NAME=tmp_table))
+        connection.execute(f'INSERT OR IGNORE INTO instruments (st_code) SELECT DISTINCT st_code FROM {table}')
+        connection.execute(f'''
+        INSERT OR IGNORE INTO {tmp_table} (st_id, dt, open, high, low, close, volume)
+        SELECT i.st_id,
+          CAST(strftime('%s', substr(t.dt, 1, 4) || '-' || substr(t.dt, 5, 2) || '-' || substr(t.dt, 7, 2) || ' ' || substr(t.dt, 9, 2) || ':' || substr(t.dt, 11, 2) || ':' || substr(t.dt, 13, 2)) AS INTEGER) / 60 - 540,
+          t.open, t.high, t.low, t.close, t.volume
+        FROM {table} t JOIN instruments i ON i.st_code = t.st_code
+        ORDER BY t.rowid
+        ''')
+        connection.execute(QueryBaseStrings.drop_index_query.format(INDEX_NAME=index_name))
+      else:
+        connection.execute(QueryBaseStrings.table_create_query.format(TABLE_NAME=tmp_table))
+        connection.execute(f'''
+        INSERT INTO {tmp_table} (st_code, dt, open, high, low, close, volume)
+        SELECT i.st_code, strftime('%Y%m%d%H%M%S', (t.dt + 540) * 60, 'unixepoch'), t.open, t.high, t.low, t.close, t.volume
+        FROM {table} t JOIN instruments i ON i.st_id = t.st_id
+        ORDER BY i.st_code, t.dt
+        ''')
+      connection.execute(QueryBaseStrings.drop_table_query.format(TABLE_NAME=table))
+      connection.execute(f'ALTER TABLE {tmp_table} RENAME TO {table}')
+      if to_version == 'v1':
+        connection.execute(QueryBaseStrings.unique_index_create_query.format(INDEX_NAME=index_name, TABLE_NAME=table))
+      num_after = connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    self.__schema_versions[table] = to_version
+    self.__unique_keys[table] = True
+    self.__instrument_ids = {}
+    if vacuum:
+      self.connections.execute('VACUUM')
+    return num_before, num_after
+
+  def create_rollup_tables(self, table, resolutions, drop=False):
+    with self.connections.transaction() as connection:
+      for res in resolutions:
+        rollup_table = StorageBackend.rollup_table_name(table, res)
+        if drop:
+          connection.execute(QueryBaseStrings.drop_table_query.format(TABLE_NAME=rollup_table))
+        connection.execute(QueryBaseStrings.rollup_table_create_query.format(TABLE_NAME=rollup_table))
+
+  def write_rollups(self, table, resolution, code, buckets, values):
+    if len(buckets) == 0:
+      return
+    rows = [(code, bucket, *bar) for bucket, bar in zip(np.asarray(buckets).tolist(), np.asarray(values).tolist())]
+    with self.connections.transaction() as connection:
+      connection.executemany(QueryBaseStrings.rollup_upsert_query.format(TABLE_NAME=StorageBackend.rollup_table_name(table, resolution)), rows)
+
+  def read_rollups(self, table, resolution, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    codes = list(codes)
+    df = self.query(f'''
+    SELECT st_code, dt, open, high, low, close, volume FROM {StorageBackend.rollup_table_name(table, resolution)}
+    WHERE st_code IN ({','.join('?' * len(codes))}) AND dt >= ?{' AND dt < ?' if ts_end is not None else ''}
+    ORDER BY st_code ASC, dt ASC
+    ''', [*codes, TimeManager.ts_to_epoch_minutes(ts_from)] + ([TimeManager.ts_to_epoch_minutes(ts_end)] if ts_end is not None else [])) if codes else pd.DataFrame(columns=['st_code', 'dt'] + minute_value_columns)
+    return split_sorted_minutes(df['st_code'].values.astype(str), df['dt'].values.astype(np.int64), df[minute_value_columns].to_numpy(dtype='int64'), {code: code for code in codes}, codes)
+
+  def rollup_before(self, table, resolution, code, ts:pd.Timestamp):
+    row = self.connections.execute(f'''
+    SELECT dt, open, high, low, close, volume FROM {StorageBackend.rollup_table_name(table, resolution)}
+    WHERE st_code=? AND dt < ? ORDER BY dt DESC LIMIT 1
+    ''', (code, TimeManager.ts_to_epoch_minutes(ts))).fetchone()
+    return (TimeManager.epoch_minutes_to_ts(row[0]), list(row[1:])) if row is not None else None
+
+  def create_tick_table(self, table, drop=False):
+    with self.connections.transaction() as connection:
+      if drop:
+        connection.execute(QueryBaseStrings.drop_table_query.format(TABLE_NAME=table))
+        connection.execute(QueryBaseStrings.drop_index_query.format(INDEX_NAME=f'idx_{table}'))
+      connection.execute(QueryBaseStrings.table_create_query.format(TABLE_NAME=table))
+      connection.execute(QueryBaseStrings.index_create_query.format(INDEX_NAME=f'idx_{table}', TABLE_NAME=table))
+
+  def append_ticks(self, table, rows):
+    with self.connections.transaction() as connection:
+      connection.executemany(QueryBaseStrings.insert_query.format(TABLE_NAME=table), rows)
+
+  def last_tick_hhmmss(self, table):
+    row = self.connections.execute(f'SELECT dt FROM {table} ORDER BY dt DESC LIMIT 1').fetchone()
+    return row[0] if row is not None else None
+
+  def aggregate_ticks_to_minute(self, table, yyyymmdd, from_hhmmss, end_hhmmss):
+    return self.query(QueryBaseStrings.make_minute_chart_query.format(TABLE_NAME=table), (yyyymmdd, from_hhmmss, end_hhmmss))
+
+  def read_ticks(self, table):
+    return self.query(f'SELECT * FROM {table}')
+
+class DuckDBStorageBackend(StorageBackend):
+  """
+  DuckDB (임베디드 컬럼형) 저장소: 1년치 백테스트/롤업처럼 구간 전체를 훑는 분석용
+  - 분봉 dt는 UTC epoch 분 (BIGINT), 인덱스 없이 (종목, 시간) 유일성은 삽입할 때 기존 키를 제외(NOT EXISTS)하여 보장한다.
+  - 틱의 같은 체결시간은 rowid(도착순)로 정렬한다.
+  - duckdb 패키지가 필요하다. (64비트 환경: 32비트 에이전트 환경에는 sqlite/numpy를 쓴다)
+  """
+  name = 'duckdb'
+
+  def __init__(self, db_path=':memory:'):
+    import duckdb
+    self.db_path = db_path
+    self.connection = duckdb.connect(db_path)
+    self.__local = threading.local()
+
+  def cursor(self):
+    '''
+    스레드마다 따로 쓰는 커서 (같은 데이터베이스)
+    '''
+    if getattr(self.__local, 'cursor', None) is None:
+      self.__local.cursor = self.connection.cursor()
+    return self.__local.cursor
+
+  def query(self, query_string, params=()):
+    return self.cursor().execute(query_string, list(params)).df()
+
+  def close(self):
+    self.connection.close()
+
+  def create_minute_table(self, table, drop=False, schema_version='v1'):
+    cursor = self.cursor()
+    if drop:
+      cursor.execute(QueryBaseStrings.drop_table_query.format(TABLE_NAME=table))
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {table} (
+      st_code VARCHAR NOT NULL,
+      dt BIGINT NOT NULL,
+      open BIGINT, high BIGINT, low BIGINT, close BIGINT, volume BIGINT
+    )
+    ''')
+
+  def append_minutes(self, table, df:pd.DataFrame):
+    counts = {}
+    if len(df) == 0:
+      return counts
+    batch = pd.DataFrame({'st_code': df['st_code'].values, 'dt': dt_str_to_epoch_minutes(df['dt'])})
+    for col in minute_value_columns:
+      batch[col] = df[col].values.astype(np.int64)
+    batch = batch.drop_duplicates(['st_code', 'dt'], keep='first')
+    cursor = self.cursor()
+    cursor.register('minute_batch', batch)
+    try:
+      cursor.execute('BEGIN TRANSACTION')
+      inserted = cursor.execute(f'''
+      INSERT INTO {table} SELECT b.st_code, b.dt, b.open, b.high, b.low, b.close, b.volume FROM minute_batch b
+      WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.st_code = b.st_code AND t.dt = b.dt)
+      RETURNING st_code
+      ''').df()['st_code'].value_counts()
+      cursor.execute('COMMIT')
+    except Exception:
+      cursor.execute('ROLLBACK')
+      raise
+    finally:
+      cursor.unregister('minute_batch')
+    for st_code, num_rows in df['st_code'].value_counts().items():
+      num_inserted = int(inserted.get(st_code, 0))
+      counts[st_code] = {'inserted': num_inserted, 'skipped': int(num_rows) - num_inserted}
+    return counts
+
+  def read_minutes(self, table, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    codes = list(codes)
+    params = [*codes, TimeManager.ts_to_epoch_minutes(ts_from)] + ([TimeManager.ts_to_epoch_minutes(ts_end)] if ts_end is not None else [])
+    df = self.query(f'''
+    SELECT st_code, dt, open, high, low, close, volume FROM {table}
+    WHERE st_code IN ({','.join('?' * len(codes))}) AND dt >= ?{' AND dt < ?' if ts_end is not None else ''}
+    ORDER BY st_code, dt
+    ''', params) if codes else pd.DataFrame(columns=['st_code', 'dt'] + minute_value_columns)
+    return split_sorted_minutes(df['st_code'].values.astype(str), df['dt'].values.astype(np.int64), df[minute_value_columns].to_numpy(dtype='int64'), {code: code for code in codes}, codes)
+
+  def last_minute_ts(self, table, code):
+    last_dt = self.cursor().execute(f'SELECT MAX(dt) FROM {table} WHERE st_code = ?', [code]).fetchone()[0]
+    return TimeManager.epoch_minutes_to_ts(int(last_dt)) if last_dt is not None else None
+
+  def minute_stats(self, table, codes):
+    codes = list(codes)
+    if not codes:
+      return {}
+    rows = self.cursor().execute(f'''
+    SELECT st_code, MIN(dt), MAX(dt) FROM {table} WHERE st_code IN ({','.join('?' * len(codes))}) GROUP BY st_code
+    ''', codes).fetchall()
+    return {st_code: (epoch_minutes_to_str(min_dt), epoch_minutes_to_str(max_dt)) for st_code, min_dt, max_dt in rows}
+
+  def create_rollup_tables(self, table, resolutions, drop=False):
+    cursor = self.cursor()
+    for res in resolutions:
+      rollup_table = StorageBackend.rollup_table_name(table, res)
+      if drop:
+        cursor.execute(QueryBaseStrings.drop_table_query.format(TABLE_NAME=rollup_table))
+      cursor.execute(f'''
+      CREATE TABLE IF NOT EXISTS {rollup_table} (
+        st_code VARCHAR NOT NULL,
+        dt BIGINT NOT NULL,
+        open BIGINT, high BIGINT, low BIGINT, close BIGINT, volume BIGINT,
+        PRIMARY KEY (st_code, dt)
+      )
+      ''')
+
+  def write_rollups(self, table, resolution, code, buckets, values):
+    if len(buckets) == 0:
+      return
+    batch = pd.DataFrame(np.asarray(values, dtype=np.int64), columns=minute_value_columns)
+    batch.insert(0, 'dt', np.asarray(buckets, dtype=np.int64))
+    batch.insert(0, 'st_code', code)
+    cursor = self.cursor()
+    cursor.register('rollup_batch', batch)
+    try:
+      cursor.execute(f'INSERT OR REPLACE INTO {StorageBackend.rollup_table_name(table, resolution)} SELECT st_code, dt, open, high, low, close, volume FROM rollup_batch')
+    finally:
+      cursor.unregister('rollup_batch')
+
+  def read_rollups(self, table, resolution, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    return self.read_minutes(StorageBackend.rollup_table_name(table, resolution), codes, ts_from, ts_end)
+
+  def rollup_before(self, table, resolution, code, ts:pd.Timestamp):
+    row = self.cursor().execute(f'''
+    SELECT dt, open, high, low, close, volume FROM {StorageBackend.rollup_table_name(table, resolution)}
+    WHERE st_code = ? AND dt < ? ORDER BY dt DESC LIMIT 1
+    ''', [code, TimeManager.ts_to_epoch_minutes(ts)]).fetchone()
+    return (TimeManager.epoch_minutes_to_ts(int(row[0])), [int(x) for x in row[1:]]) if row is not None else None
+
+  def create_tick_table(self, table, drop=False):
+    cursor = self.cursor()
+    if drop:
+      cursor.execute(QueryBaseStrings.drop_table_query.format(TABLE_NAME=table))
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {table} (
+      st_code VARCHAR NOT NULL,
+      dt VARCHAR NOT NULL,
+      open BIGINT, high BIGINT, low BIGINT, close BIGINT, volume BIGINT
+    )
+    ''')
+
+  def append_ticks(self, table, rows):
+    if len(rows) == 0:
+      return
+    batch = pd.DataFrame.from_records(rows, columns=tick_frame_columns)
+    cursor = self.cursor()
+    cursor.register('tick_batch', batch)
+    try:
+      cursor.execute(f'INSERT INTO {table} SELECT st_code, dt, open, high, low, close, volume FROM tick_batch')
+    finally:
+      cursor.unregister('tick_batch')
+
+  def last_tick_hhmmss(self, table):
+    return self.cursor().execute(f'SELECT MAX(dt) FROM {table}').fetchone()[0]
+
+  def aggregate_ticks_to_minute(self, table, yyyymmdd, from_hhmmss, end_hhmmss):
+    return self.query(f'''
+    SELECT st_code, ? || minute || '00' AS dt,
+      first(close ORDER BY dt, rowid) AS open, MAX(close) AS high, MIN(close) AS low,
+      last(close ORDER BY dt, rowid) AS close, CAST(SUM(volume) AS BIGINT) AS volume
+    FROM (SELECT rowid, *, substr(dt, 1, 4) AS minute FROM {table} WHERE dt >= ? AND dt < ?)
+    GROUP BY st_code, minute
+    ORDER BY st_code, minute
+    ''', (yyyymmdd, from_hhmmss, end_hhmmss))
+
+  def read_ticks(self, table):
+    return self.query(f'SELECT st_code, dt, open, high, low, close, volume FROM {table} ORDER BY rowid')
+
+class NumPyStorageBackend(StorageBackend):
+  """
+  순수 메모리 NumPy 저장소 (프로세스가 끝나면 사라진다): 백테스트, 실시간 틱
+  - 분봉: 테이블 -> 종목 -> (dt: UTC epoch 분 정렬 배열, values: (n, 5) int64), 뒤에 붙는 배치는 이어 붙이고 중간에 끼는 배치만 다시 정렬한다.
+  - 롤업: 분봉과 같은 형태로 {table}_{res} 이름에 저장 (버킷을 교체하며 정렬 유지)
+  - 틱: 테이블 -> 종목 -> TickColumns (시간순, 같은 시간은 도착순)
+  """
+  name = 'numpy'
+
+  def __init__(self):
+    self.__minutes = {} # table -> {code: (dt, values)}
+    self.__ticks = {} # table -> {code: TickColumns}
+
+  def create_minute_table(self, table, drop=False, schema_version='v1'):
+    if drop or table not in self.__minutes:
+      self.__minutes[table] = {}
+
+  def append_minutes(self, table, df:pd.DataFrame):
+    counts = {}
+    if len(df) == 0:
+      return counts
+    df = df.sort_values(['st_code', 'dt'], kind='stable')
+    st_codes = df['st_code'].values
+    dts = dt_str_to_epoch_minutes(df['dt'])
+    values = df[minute_value_columns].to_numpy(dtype='int64')
+    store = self.__minutes[table]
+    boundaries = np.flatnonzero(np.r_[True, st_codes[1:] != st_codes[:-1], True])
+    for begin, end in zip(boundaries[:-1], boundaries[1:]):
+      code = st_codes[begin]
+      # 배치 안의 중복은 처음 것만 (정렬되어 있으므로 unique의 첫 위치)
+      new_dt, first = np.unique(dts[begin:end], return_index=True)
+      new_values = values[begin:end][first]
+      old_dt, old_values = store.get(code, (np.zeros(0, dtype=np.int64), np.zeros((0, len(minute_value_columns)), dtype=np.int64)))
+      pos = np.searchsorted(old_dt, new_dt)
+      fresh = (pos == len(old_dt)) | (old_dt[np.minimum(pos, len(old_dt) - 1)] != new_dt) if len(old_dt) else np.ones(len(new_dt), dtype=bool)
+      new_dt, new_values = new_dt[fresh], new_values[fresh]
+      if len(new_dt) > 0:
+        dt, merged = np.concatenate((old_dt, new_dt)), np.concatenate((old_values, new_values))
+        if len(old_dt) > 0 and new_dt[0] < old_dt[-1]:
+          order = np.argsort(dt, kind='stable')
+          dt, merged = dt[order], merged[order]
+        store[code] = (dt, merged)
+      counts[code] = {'inserted': int(len(new_dt)), 'skipped': int(end - begin) - int(len(new_dt))}
+    return counts
+
+  def read_minutes(self, table, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    store = self.__minutes[table]
+    from_minutes = TimeManager.ts_to_epoch_minutes(ts_from)
+    history = {}
+    for code in codes:
+      dt, values = store.get(code, (np.zeros(0, dtype=np.int64), np.zeros((0, len(minute_value_columns)), dtype=np.int64)))
+      begin = np.searchsorted(dt, from_minutes, side='left')
+      end = np.searchsorted(dt, TimeManager.ts_to_epoch_minutes(ts_end), side='left') if ts_end is not None else len(dt)
+      history[code] = make_minute_frame(code, epoch_minutes_to_index(dt[begin:end]), values[begin:end])
+    return history
+
+  def last_minute_ts(self, table, code):
+    dt = self.__minutes[table].get(code, (np.zeros(0, dtype=np.int64),))[0]
+    return TimeManager.epoch_minutes_to_ts(int(dt[-1])) if len(dt) > 0 else None
+
+  def minute_stats(self, table, codes):
+    store = self.__minutes[table]
+    return {code: (epoch_minutes_to_str(store[code][0][0]), epoch_minutes_to_str(store[code][0][-1])) for code in codes if code in store and len(store[code][0]) > 0}
+
+  def create_rollup_tables(self, table, resolutions, drop=False):
+    for res in resolutions:
+      self.create_minute_table(StorageBackend.rollup_table_name(table, res), drop=drop)
+
+  def write_rollups(self, table, resolution, code, buckets, values):
+    if len(buckets) == 0:
+      return
+    store = self.__minutes[StorageBackend.rollup_table_name(table, resolution)]
+    old_dt, old_values = store.get(code, (np.zeros(0, dtype=np.int64), np.zeros((0, len(minute_value_columns)), dtype=np.int64)))
+    keep = ~np.isin(old_dt, buckets)
+    dt = np.concatenate((old_dt[keep], np.asarray(buckets, dtype=np.int64)))
+    values = np.concatenate((old_values[keep], np.asarray(values, dtype=np.int64)))
+    order = np.argsort(dt, kind='stable')
+    store[code] = (dt[order], values[order])
+
+  def read_rollups(self, table, resolution, codes, ts_from:pd.Timestamp, ts_end:pd.Timestamp=None):
+    return self.read_minutes(StorageBackend.rollup_table_name(table, resolution), codes, ts_from, ts_end)
+
+  def rollup_before(self, table, resolution, code, ts:pd.Timestamp):
+    dt, values = self.__minutes[StorageBackend.rollup_table_name(table, resolution)].get(code, (np.zeros(0, dtype=np.int64), None))
+    i = np.searchsorted(dt, TimeManager.ts_to_epoch_minutes(ts), side='left') - 1
+    return (TimeManager.epoch_minutes_to_ts(int(dt[i])), values[i].tolist()) if i >= 0 else None
+
+  def create_tick_table(self, table, drop=False):
+    if drop or table not in self.__ticks:
+      self.__ticks[table] = {}
+
+  def append_ticks(self, table, rows):
+    ticks = self.__ticks[table]
+    for code, hhmmss, open, high, low, close, volume in rows:
+      if code not in ticks:
+        ticks[code] = TickColumns()
+      ticks[code].append(hhmmss_to_seconds(hhmmss), open, high, low, close, volume)
+
+  def last_tick_hhmmss(self, table):
+    last_seconds = [int(cols.view('t')[-1]) for cols in self.__ticks[table].values() if cols.size > 0]
+    return seconds_to_hhmmss(max(last_seconds)) if last_seconds else None
+
+  def aggregate_ticks_to_minute(self, table, yyyymmdd, from_hhmmss, end_hhmmss):
+    return minute_chart_frame(self.__ticks[table], yyyymmdd, hhmmss_to_seconds(from_hhmmss), hhmmss_to_seconds(end_hhmmss))
+
+  def read_ticks(self, table):
+    return tick_frame(self.__ticks[table])
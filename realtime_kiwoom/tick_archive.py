@@ -0,0 +1,132 @@
+from __future__ import annotations
+import json
+import os
+import numpy as np
+import pandas as pd
+from miscs.config_manager import ConfigManager
+
+class TickArchive:
+  """
+  장 마감 후 하루치 틱을 일자/종목별로 분할한 컬럼형 파일로 보관
+  - 경로: <archive_dir>/<YYYYMMDD>/<종목코드>/columns.npz + meta.json
+  - 시간/가격 컬럼: 첫 값(base) + 델타 인코딩, 거래량: 원값
+  - 각 컬럼은 값 범위에 맞는 가장 작은 정수형으로 줄인 뒤 (대부분 int8/int16) np.savez_compressed(zlib)로 압축
+    (델타는 0 근처 값이 반복되므로 폭 축소만 할 때보다 훨씬 작아진다.)
+  - 읽을 때는 파티션 단위로 압축을 풀고 디코딩한다. (메모리 맵 아님), 이전 형식 (컬럼별 .npy)도 읽는다.
+  """
+  archive_file = 'columns.npz'
+  delta_columns = ['t', 'open', 'high', 'low', 'close']
+  plain_columns = ['volume']
+  columns = ['st_code', 'open', 'high', 'low', 'close', 'volume']
+
+  @staticmethod
+  def Factory(config_manager: ConfigManager):
+    """
+    Factory method: 설정에 아카이브 경로가 없으면 None
+    """
+    if config_manager is None:
+      return None
+    archive_path = config_manager.get_realtime_info()['tick_archive_path']
+    return TickArchive(archive_path) if archive_path else None
+
+  def __init__(self, archive_dir):
+    self.archive_dir = archive_dir
+
+  @staticmethod
+  def smallest_int_dtype(values):
+    '''
+    values를 담을 수 있는 가장 작은 부호있는 정수형
+    '''
+    if len(values) == 0:
+      return np.dtype(np.int8)
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+      info = np.iinfo(dtype)
+      if info.min <= lo and hi <= info.max:
+        return np.dtype(dtype)
+
+  def partition_path(self, yyyymmdd, code):
+    return os.path.join(self.archive_dir, yyyymmdd, code)
+
+  def write_day(self, yyyymmdd, ticks):
+    """
+    하루치 틱 (TickJournal.JOURNAL_DTYPE 구조화 배열)을 종목별로 분할 저장
+    종목별 저장 건수를 반환
+    """
+    num_written = {}
+    for code_bytes in np.unique(ticks['code']):
+      code = code_bytes.decode('ascii')
+      code_ticks = ticks[ticks['code'] == code_bytes]
+      code_ticks = code_ticks[np.argsort(code_ticks['t'], kind='stable')]
+      path = self.partition_path(yyyymmdd, code)
+      os.makedirs(path, exist_ok=True)
+
+      meta = {'num_ticks': len(code_ticks), 'format': 'npz', 'columns': {}}
+      arrays = {}
+      for name in TickArchive.delta_columns + TickArchive.plain_columns:
+        values = code_ticks[name].astype(np.int64)
+        if name in TickArchive.delta_columns:
+          base = int(values[0]) if len(values) > 0 else 0
+          encoded = np.diff(values, prepend=base)
+          meta['columns'][name] = {'encoding': 'delta', 'base': base}
+        else:
+          encoded = values
+          meta['columns'][name] = {'encoding': 'plain'}
+        dtype = TickArchive.smallest_int_dtype(encoded)
+        meta['columns'][name]['dtype'] = dtype.name
+        arrays[name] = encoded.astype(dtype)
+      np.savez_compressed(os.path.join(path, TickArchive.archive_file), **arrays)
+      with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+      num_written[code] = len(code_ticks)
+    return num_written
+
+  def list_dates(self):
+    if not os.path.isdir(self.archive_dir):
+      return []
+    return sorted(d for d in os.listdir(self.archive_dir) if d.isdigit() and len(d) == 8)
+
+  def read_partition(self, yyyymmdd, code):
+    """
+    한 파티션을 읽어 디코딩: dict(컬럼 -> np.ndarray), 없으면 None
+    """
+    path = self.partition_path(yyyymmdd, code)
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+      return None
+    with open(os.path.join(path, 'meta.json')) as f:
+      meta = json.load(f)
+    if meta.get('format') == 'npz':
+      with np.load(os.path.join(path, TickArchive.archive_file)) as archive:
+        encoded_columns = {name: archive[name] for name in meta['columns']}
+    else:
+      # 이전 형식: 압축하지 않은 컬럼별 .npy
+      encoded_columns = {name: np.load(os.path.join(path, f'{name}.npy')) for name in meta['columns']}
+    decoded = {}
+    for name, info in meta['columns'].items():
+      encoded = encoded_columns[name]
+      if info['encoding'] == 'delta':
+        decoded[name] = info['base'] + np.cumsum(encoded, dtype=np.int64)
+      else:
+        decoded[name] = encoded.astype(np.int64)
+    return decoded
+
+  def read(self, codes, date_from:str, date_to:str):
+    """
+    [date_from, date_to] (YYYYMMDD) 기간, codes 종목의 틱을 종목별 데이터프레임으로 반환
+    인덱스 dt는 Asia/Seoul 시간
+    """
+    dates = [d for d in self.list_dates() if date_from <= d <= date_to]
+    history = {}
+    for code in codes:
+      dfs = []
+      for yyyymmdd in dates:
+        decoded = self.read_partition(yyyymmdd, code)
+        if decoded is None:
+          continue
+        dt = pd.Timestamp(yyyymmdd, tz='Asia/Seoul') + pd.to_timedelta(decoded['t'], unit='s')
+        dfs.append(pd.DataFrame({
+          'st_code': code,
+          **{name: decoded[name] for name in ['open', 'high', 'low', 'close', 'volume']},
+        }, index=pd.DatetimeIndex(dt, name='dt')))
+      history[code] = pd.concat(dfs) if dfs else pd.DataFrame(columns=TickArchive.columns, index=pd.DatetimeIndex([], name='dt', tz='Asia/Seoul'))
+    return history
@@ -0,0 +1,108 @@
+from __future__ import annotations
+import os
+import struct
+import time
+import numpy as np
+from miscs.config_manager import ConfigManager
+from miscs.time_manager import TimeManager
+from realtime_kiwoom.kiwoom_type import StockExecutionRecord
+from realtime_kiwoom.tick_store import hhmmss_to_seconds, seconds_to_hhmmss
+
+class TickJournal:
+  """
+  장중 틱 저널: 디코딩된 '주식체결' 틱을 append-only 바이너리 파일에 기록
+  - 레코드는 고정 길이(JOURNAL_DTYPE)이며, fsync는 fsync_every 건 또는 fsync_seconds 마다 묶어서 수행
+  - 재기동시 load()로 메모리 맵 읽기 후, 실시간 저장소/분봉 생성기에 재적재한다.
+  """
+  JOURNAL_DTYPE = np.dtype([
+    ('code', 'S6'),
+    ('t', '<i4'), # 자정 기준 초
+    ('open', '<i4'),
+    ('high', '<i4'),
+    ('low', '<i4'),
+    ('close', '<i4'),
+    ('volume', '<i8'),
+  ])
+  record_struct = struct.Struct('<6s5iq')
+
+  @staticmethod
+  def Factory(config_manager: ConfigManager):
+    """
+    Factory method: 설정에 저널 경로가 없으면 None
+    """
+    if config_manager is None:
+      return None
+    journal_path = config_manager.get_realtime_info()['tick_journal_path']
+    if not journal_path:
+      return None
+    return TickJournal(journal_path, TimeManager.ts_to_str(TimeManager.get_now(), '%Y%m%d'))
+
+  @staticmethod
+  def journal_file_path(journal_dir, yyyymmdd):
+    return os.path.join(journal_dir, f'ticks_{yyyymmdd}.journal')
+
+  def __init__(self, journal_dir, yyyymmdd, fsync_every=256, fsync_seconds=1.0):
+    os.makedirs(journal_dir, exist_ok=True)
+    self.path = TickJournal.journal_file_path(journal_dir, yyyymmdd)
+    self.fsync_every = fsync_every
+    self.fsync_seconds = fsync_seconds
+    self.__file = open(self.path, 'ab')
+    # 직전 프로세스가 레코드 중간에 죽었다면 잘린 꼬리를 버린다.
+    tail = self.__file.tell() % TickJournal.JOURNAL_DTYPE.itemsize
+    if tail:
+      self.__file.truncate(self.__file.tell() - tail)
+      self.__file.seek(0, os.SEEK_END)
+    self.__num_unsynced = 0
+    self.__last_synced = time.monotonic()
+
+  def append(self, real_data:StockExecutionRecord):
+    self.__file.write(TickJournal.record_struct.pack(
+      real_data.code.encode('ascii'),
+      hhmmss_to_seconds(real_data.hhmmss),
+      real_data.open, real_data.high, real_data.low, real_data.close,
+      real_data.volume,
+    ))
+    self.__num_unsynced += 1
+    if self.__num_unsynced >= self.fsync_every or time.monotonic() - self.__last_synced >= self.fsync_seconds:
+      self.sync()
+
+  def sync(self):
+    if self.__num_unsynced > 0:
+      self.__file.flush()
+      os.fsync(self.__file.fileno())
+      self.__num_unsynced = 0
+    self.__last_synced = time.monotonic()
+
+  def close(self):
+    self.sync()
+    self.__file.close()
+
+  @staticmethod
+  def load(path):
+    """
+    저널 파일을 메모리 맵으로 읽어 구조화 배열로 반환 (완전한 레코드만)
+    반환값은 메모리로 복사한 배열이므로 이후 같은 파일에 계속 append 해도 된다.
+    """
+    if not os.path.exists(path):
+      return np.zeros(0, dtype=TickJournal.JOURNAL_DTYPE)
+    num_records = os.path.getsize(path) // TickJournal.JOURNAL_DTYPE.itemsize
+    if num_records == 0:
+      return np.zeros(0, dtype=TickJournal.JOURNAL_DTYPE)
+    mapped = np.memmap(path, dtype=TickJournal.JOURNAL_DTYPE, mode='r', shape=(num_records,))
+    ticks = np.array(mapped)
+    del mapped
+    return ticks
+
+  @staticmethod
+  def to_records(ticks):
+    """
+    구조화 배열 -> StockExecutionRecord 리스트 (재적재용)
+    """
+    return [
+      StockExecutionRecord(
+        code.decode('ascii'),
+        hhmmss=seconds_to_hhmmss(int(t)),
+        open=int(open), high=int(high), low=int(low), close=int(close), volume=int(volume),
+      )
+      for code, t, open, high, low, close, volume in ticks.tolist()
+    ]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+from collections import deque
+from realtime_kiwoom.kiwoom_type import StockExecutionRecord
+
+class TickSequencer:
+  """
+  실시간 '주식체결' 틱을 종목별 직전 틱과 비교하여 분류 (정렬 없이 O(1))
+  - IN_ORDER: 직전 틱과 같거나 이후 시간 -> fast path (그대로 뒤에 붙인다)
+  - LATE: 직전 틱보다 이른 시간 -> slow path (해당 분봉만 보정)
+  - DUPLICATE: 최근 틱과 시간/가격/거래량/누적거래량이 모두 같음 -> 버림
+  누적거래량은 체결마다 증가하므로, 같은 초에 같은 가격/수량으로 실제 체결된 틱은 중복으로 보지 않는다.
+  장 시작/마감 동시호가 전후의 빈도를 보기 위해 분(HHMM)별로 LATE/DUPLICATE 건수를 센다.
+  """
+  IN_ORDER = 'in_order'
+  LATE = 'late'
+  DUPLICATE = 'duplicate'
+
+  def __init__(self, window=16):
+    self.window = window
+    self.__last_hhmmss = {} # code -> 마지막 (가장 늦은) 체결시간
+    self.__recent_keys = {} # code -> deque[(hhmmss, close, volume, acc_volume)]
+    self.counters = {TickSequencer.IN_ORDER: 0, TickSequencer.LATE: 0, TickSequencer.DUPLICATE: 0}
+    self.slow_path_by_minute = {} # HHMM -> {LATE: n, DUPLICATE: n}
+
+  def classify(self, real_data:StockExecutionRecord):
+    code = real_data.code
+    key = (real_data.hhmmss, real_data.close, real_data.volume, real_data.acc_volume)
+    recent = self.__recent_keys.get(code)
+    if recent is None:
+      recent = self.__recent_keys[code] = deque(maxlen=self.window)
+    elif key in recent:
+      return self.__count(TickSequencer.DUPLICATE, real_data.hhmmss)
+    recent.append(key)
+
+    last_hhmmss = self.__last_hhmmss.get(code)
+    if last_hhmmss is not None and real_data.hhmmss < last_hhmmss:
+      return self.__count(TickSequencer.LATE, real_data.hhmmss)
+    self.__last_hhmmss[code] = real_data.hhmmss
+    self.counters[TickSequencer.IN_ORDER] += 1
+    return TickSequencer.IN_ORDER
+
+  def __count(self, kind, hhmmss):
+    self.counters[kind] += 1
+    by_minute = self.slow_path_by_minute.setdefault(hhmmss[:4], {TickSequencer.LATE: 0, TickSequencer.DUPLICATE: 0})
+    by_minute[kind] += 1
+    return kind
+
+  def format_summary(self):
+    lines = [f"틱 분류: {self.counters}"]
+    for hhmm in sorted(self.slow_path_by_minute):
+      lines.append(f"  {hhmm}: {self.slow_path_by_minute[hhmm]}")
+    return '\n'.join(lines)
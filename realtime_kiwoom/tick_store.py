@@ -0,0 +1,125 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+def hhmmss_to_seconds(hhmmss:str):
+  '''
+  HHMMSS 문자열을 자정 기준 초로 변환
+  '''
+  return int(hhmmss[:2]) * 3600 + int(hhmmss[2:4]) * 60 + int(hhmmss[4:6])
+
+def seconds_to_hhmmss(seconds:int):
+  '''
+  자정 기준 초를 HHMMSS 문자열로 변환
+  '''
+  return f'{seconds // 3600:02d}{seconds // 60 % 60:02d}{seconds % 60:02d}'
+
+def aggregate_minute_bars(t, close, volume):
+  '''
+  시간순으로 정렬된 틱 배열을 1분봉으로 집계 (np.ufunc.reduceat)
+  시가/고가/저가/종가는 모두 체결가 기준 (make_minute_chart_query와 동일)
+  returns: (분(자정 기준 분), open, high, low, close, volume)
+  '''
+  if len(t) == 0:
+    empty = np.zeros(0, dtype=np.int64)
+    return empty, empty, empty, empty, empty, empty
+  minutes = t // 60
+  starts = np.flatnonzero(np.r_[True, minutes[1:] != minutes[:-1]])
+  ends = np.r_[starts[1:], len(t)]
+  return (
+    minutes[starts],
+    close[starts],
+    np.maximum.reduceat(close, starts),
+    np.minimum.reduceat(close, starts),
+    close[ends - 1],
+    np.add.reduceat(volume, starts),
+  )
+
+class TickColumns:
+  """
+  한 종목의 틱을 컬럼별로 저장하는 가변 길이 배열
+  - t: 자정 기준 초 (int32), open/high/low/close: int32, volume: int64
+  - 항상 시간순을 유지한다: 시간순 틱은 뒤에 붙이고(fast path), 늦게 도착한 틱만 제자리에 끼워 넣는다(slow path).
+  """
+  dtypes = {'t': np.int32, 'open': np.int32, 'high': np.int32, 'low': np.int32, 'close': np.int32, 'volume': np.int64}
+
+  def __init__(self, initial_capacity=4096):
+    self.size = 0
+    self.num_late = 0 # slow path로 끼워 넣은 틱 수
+    self.columns = {name: np.zeros(initial_capacity, dtype=dtype) for name, dtype in TickColumns.dtypes.items()}
+
+  def __grow(self):
+    for name, arr in self.columns.items():
+      grown = np.zeros(len(arr) * 2, dtype=arr.dtype)
+      grown[:self.size] = arr[:self.size]
+      self.columns[name] = grown
+
+  def append(self, t, open, high, low, close, volume):
+    if self.size == len(self.columns['t']):
+      self.__grow()
+    i = self.size
+    if i > 0 and t < self.columns['t'][i - 1]:
+      # 같은 시간의 틱들 중에서는 도착순을 유지하도록 뒤쪽에 끼워 넣고, 그 뒤만 한 칸씩 민다.
+      i = int(np.searchsorted(self.columns['t'][:self.size], t, side='right'))
+      for arr in self.columns.values():
+        arr[i + 1:self.size + 1] = arr[i:self.size]
+      self.num_late += 1
+    self.columns['t'][i] = t
+    self.columns['open'][i] = open
+    self.columns['high'][i] = high
+    self.columns['low'][i] = low
+    self.columns['close'][i] = close
+    self.columns['volume'][i] = volume
+    self.size += 1
+
+  def view(self, name, begin=0, end=None):
+    return self.columns[name][begin:self.size if end is None else end]
+
+  def index_range(self, from_seconds, end_seconds):
+    '''
+    [from_seconds, end_seconds) 에 해당하는 인덱스 범위
+    '''
+    t = self.view('t')
+    return np.searchsorted(t, from_seconds, side='left'), np.searchsorted(t, end_seconds, side='left')
+
+tick_frame_columns = ['st_code', 'dt', 'open', 'high', 'low', 'close', 'volume']
+
+def minute_chart_frame(ticks:dict, yyyymmdd:str, from_seconds, end_seconds):
+  '''
+  종목별 TickColumns {code: TickColumns}의 [from_seconds, end_seconds) 틱을 1분봉 데이터프레임으로 (종목, 시간순)
+  dt: YYYYMMDDHHMM00
+  '''
+  dfs = []
+  for code in sorted(ticks):
+    cols = ticks[code]
+    begin, end = cols.index_range(from_seconds, end_seconds)
+    if begin == end:
+      continue
+    minutes, open, high, low, close, volume = aggregate_minute_bars(
+      cols.view('t', begin, end).astype(np.int64),
+      cols.view('close', begin, end).astype(np.int64),
+      cols.view('volume', begin, end),
+    )
+    dfs.append(pd.DataFrame({
+      'st_code': code,
+      'dt': [f'{yyyymmdd}{m // 60:02d}{m % 60:02d}00' for m in minutes],
+      'open': open, 'high': high, 'low': low, 'close': close, 'volume': volume,
+    }))
+  if not dfs:
+    return pd.DataFrame(columns=tick_frame_columns)
+  return pd.concat(dfs, ignore_index=True)
+
+def tick_frame(ticks:dict):
+  '''
+  종목별 TickColumns {code: TickColumns}의 모든 틱 (dt: HHMMSS)
+  '''
+  dfs = []
+  for code, cols in ticks.items():
+    dfs.append(pd.DataFrame({
+      'st_code': code,
+      'dt': [seconds_to_hhmmss(int(t)) for t in cols.view('t')],
+      **{name: cols.view(name).astype(np.int64) for name in ['open', 'high', 'low', 'close', 'volume']},
+    }))
+  if not dfs:
+    return pd.DataFrame(columns=tick_frame_columns)
+  return pd.concat(dfs, ignore_index=True)
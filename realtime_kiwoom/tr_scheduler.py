@@ -0,0 +1,131 @@
+from __future__ import annotations
+import heapq
+import itertools
+import threading
+import time
+from miscs.latency_tracker import LatencyHistogram
+
+class TokenBucket:
+  """
+  토큰 버킷: 어떤 period 초 구간에서도 limit 회를 넘지 않도록
+  - 처음 burst 개를 채워두고 (limit - burst) / period 개/초로 충전한다. (burst + 충전량 <= limit)
+  """
+  def __init__(self, limit, period, burst=1):
+    assert 0 < burst < limit
+    self.limit = limit
+    self.period = period
+    self.burst = burst
+    self.rate = (limit - burst) / period
+    self.tokens = float(burst)
+    self.__updated = time.monotonic()
+
+  def refill(self, now):
+    self.tokens = min(self.burst, self.tokens + (now - self.__updated) * self.rate)
+    self.__updated = now
+
+  def delay(self, now, reserve=0):
+    '''
+    reserve 개를 남기고 토큰 하나를 쓸 수 있을 때까지 기다릴 시간 (초)
+    '''
+    self.refill(now)
+    need = 1 + min(reserve, self.burst - 1) - self.tokens
+    return 0.0 if need <= 0 else need / self.rate
+
+  def consume(self):
+    self.tokens -= 1
+
+  def drain(self, now):
+    self.refill(now)
+    self.tokens = min(self.tokens, 0.0)
+
+class TRScheduler:
+  """
+  키움 TR 요청 한도 (초당, 시간당)를 토큰 버킷으로 관리하는 스케줄러, RTKiwoom의 모든 TR 요청이 공유한다.
+  - 주문 (SendOrder)은 서버가 TR과 따로 세므로 거치지 않는다. (Qt 스레드에서 주문이 TR 토큰을 기다리지 않도록)
+  - acquire(priority): 모든 버킷에 토큰이 생기는 즉시 반환 (고정 sleep 없음), 기다리는 동안 호출한 스레드를 블록킹한다.
+  - 여러 스레드가 동시에 기다릴 때만 우선순위 (RECOVERY < ACCOUNT < BULK), 같은 우선순위는 먼저 온 순서로 토큰을 받는다.
+    Qt 스레드 하나에서 부르면 요청은 호출 순서대로 하나씩 나가므로 우선순위는 효과가 없고, 대기 시간 집계 구분으로만 쓰인다.
+  - BULK는 시간당 버킷에서 bulk_reserve 개를 남겨 두므로 대량 수집이 주문/복구/계좌 조회 몫을 다 쓰지 않는다.
+  - 서버가 과부하(-200)로 거절하면 penalize()로 초당 버킷을 비운다.
+  - 우선순위별 요청 수, 대기한 요청 수 (throttled), 대기 시간 히스토그램을 남긴다.
+  """
+  RECOVERY = 0 # 장중 기동시 오늘 분봉 복구
+  ACCOUNT = 1 # 예수금/잔고/미체결 조회
+  BULK = 2 # 과거 분봉 대량 수집
+  priority_names = {RECOVERY: 'recovery', ACCOUNT: 'account', BULK: 'bulk'}
+
+  def __init__(self, per_second=5, per_hour=1000, per_second_burst=1, per_hour_burst=500, bulk_reserve=100):
+    self.__cond = threading.Condition()
+    self.__waiters = [] # (priority, 순번) 힙
+    self.__sequence = itertools.count()
+    self.delays = {p: LatencyHistogram() for p in TRScheduler.priority_names} # 대기 시간 (나노초)
+    self.counters = {p: {'requests': 0, 'throttled': 0} for p in TRScheduler.priority_names}
+    self.rejected = 0 # 서버 과부하 거절 수
+    self.configure(per_second, per_hour, per_second_burst, per_hour_burst, bulk_reserve)
+
+  def configure(self, per_second=5, per_hour=1000, per_second_burst=1, per_hour_burst=500, bulk_reserve=100):
+    with self.__cond:
+      self.buckets = [TokenBucket(per_second, 1.0, per_second_burst), TokenBucket(per_hour, 3600.0, per_hour_burst)]
+      self.reserves = {p: [0, bulk_reserve if p == TRScheduler.BULK else 0] for p in TRScheduler.priority_names}
+      self.__cond.notify_all()
+
+  def __delay(self, priority, now):
+    return max(bucket.delay(now, reserve) for bucket, reserve in zip(self.buckets, self.reserves[priority]))
+
+  def acquire(self, priority=ACCOUNT):
+    '''
+    토큰을 얻을 때까지 블록킹, 반환값: 대기 시간 (초)
+    '''
+    ts_start = time.perf_counter_ns()
+    throttled = False
+    with self.__cond:
+      entry = (priority, next(self.__sequence))
+      heapq.heappush(self.__waiters, entry)
+      self.__cond.notify_all()
+      try:
+        while True:
+          delay = self.__delay(priority, time.monotonic()) if self.__waiters[0] == entry else None
+          if delay == 0.0:
+            break
+          throttled = True
+          self.__cond.wait(delay)
+        for bucket in self.buckets:
+          bucket.consume()
+      finally:
+        self.__waiters.remove(entry)
+        heapq.heapify(self.__waiters)
+        self.__cond.notify_all()
+
+      elapsed_ns = time.perf_counter_ns() - ts_start
+      self.counters[priority]['requests'] += 1
+      self.counters[priority]['throttled'] += throttled
+      self.delays[priority].add(elapsed_ns)
+    return elapsed_ns / 1e9
+
+  def penalize(self):
+    '''
+    서버가 과부하로 거절한 경우: 초당 버킷을 비워서 다음 요청을 충전 주기만큼 미룬다.
+    '''
+    with self.__cond:
+      self.rejected += 1
+      self.buckets[0].drain(time.monotonic())
+
+  def summary(self):
+    '''
+    우선순위 -> {requests, throttled, mean, p95, max} (대기 시간, ms)
+    '''
+    return {
+      TRScheduler.priority_names[p]: {
+        **self.counters[p],
+        'mean': hist.total_ns / hist.count / 1e6,
+        'p95': hist.percentile(95) / 1e6,
+        'max': hist.max_ns / 1e6,
+      }
+      for p, hist in self.delays.items() if hist.count > 0
+    }
+
+  def format_summary(self):
+    lines = [f"TR 스케줄러 (서버 과부하 거절 #{self.rejected})", f"{'priority':<10}{'requests':>10}{'throttled':>10}{'mean':>10}{'p95':>10}{'max':>10} (ms)"]
+    for name, s in self.summary().items():
+      lines.append(f"{name:<10}{s['requests']:>10}{s['throttled']:>10}{s['mean']:>10.1f}{s['p95']:>10.1f}{s['max']:>10.1f}")
+    return '\n'.join(lines)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+import json
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+from pykiwoom import parser
+
+# 출력 레코드 -> {항목: 형식}, 없는 항목은 문자열 (앞뒤 공백 제거)
+# - abs_int: 부호가 전일 대비 방향인 가격/거래량 (부호 제거)
+# - int, float: 부호가 값인 금액/수량/비율
+price_columns = {'현재가': 'abs_int', '거래량': 'abs_int', '시가': 'abs_int', '고가': 'abs_int', '저가': 'abs_int', '전일종가': 'abs_int'}
+tr_column_types = {
+  '주식분봉차트조회': price_columns,
+  '업종분봉조회': price_columns,
+  '예수금상세현황': {'예수금': 'int', '주문가능금액': 'int', '출금가능금액': 'int', 'd+1출금가능금액': 'int', 'd+2출금가능금액': 'int'},
+  '계좌평가결과': {'총매입금액': 'int', '총평가금액': 'int', '총평가손익금액': 'int', '총수익률(%)': 'float', '추정예탁자산': 'int'},
+  '계좌평가잔고개별합산': {
+    '보유수량': 'int', '매입가': 'int', '현재가': 'abs_int', '평가금액': 'int', '평가손익': 'int', '수익률(%)': 'float',
+    '매입금액': 'int', '매매가능수량': 'int',
+  },
+  '미체결': {'주문수량': 'int', '주문가격': 'int', '미체결수량': 'int', '체결량': 'int', '현재가': 'abs_int'},
+}
+
+def is_number(value, parse):
+  try:
+    parse(value)
+    return True
+  except ValueError:
+    return False
+
+def convert_column(values, kind):
+  '''
+  문자열 값 목록 -> kind 형식 배열 (한 컬럼을 한 번에 변환, 빈 값은 0)
+  숫자로 읽을 수 없는 값 (예: int 컬럼의 '1.5', '1,234')이 있으면 ValueError: 0으로 바꿔서 적재하지 않는다.
+  '''
+  if kind == 'str':
+    return np.array([value.strip() for value in values], dtype=object)
+  parse, dtype = (float, np.float64) if kind == 'float' else (int, np.int64)
+  stripped = [value.strip() or '0' for value in values]
+  try:
+    column = np.array(stripped, dtype=str).astype(dtype) if len(stripped) > 0 else np.zeros(0, dtype=dtype)
+  except ValueError:
+    invalid = [value for value in stripped if not is_number(value, parse)]
+    raise ValueError(f"숫자가 아닌 값 ({kind}): #{len(invalid)} {invalid[:5]}") from None
+  return np.abs(column) if kind == 'abs_int' else column
+
+class TRSchema:
+  """
+  TR 레이아웃 (.enc) 하나를 컴파일한 결과
+  - input_ids: SetInputValue 할 입력 항목 (순서 유지)
+  - outputs: [(레코드 이름, [항목, ...]), ...] (.enc 순서, 0번은 싱글 데이터)
+  - output(record): 레코드 이름 -> (순번, 항목) 을 dict로 바로 찾는다.
+  - kinds: 출력마다 항목별 형식 (tr_column_types), to_frame()에서 컬럼 단위로 변환
+  """
+  __slots__ = ('trcode', 'input_ids', 'outputs', 'output_index', 'kinds')
+
+  def __init__(self, trcode, input_ids, outputs):
+    self.trcode = trcode
+    self.input_ids = tuple(input_ids)
+    self.outputs = [(record, list(items)) for record, items in outputs]
+    self.output_index = {}
+    for i, (record, items) in enumerate(self.outputs):
+      self.output_index.setdefault(record, (i, items))
+    self.kinds = [[tr_column_types.get(record, {}).get(item, 'str') for item in items] for record, items in self.outputs]
+
+  @staticmethod
+  def from_tr_items(tr_items):
+    '''
+    parser.parse_dat 결과 -> TRSchema
+    '''
+    input_ids = [id for block in tr_items['input'] for ids in block.values() for id in ids]
+    outputs = [item for block in tr_items['output'] for item in block.items()]
+    return TRSchema(tr_items['trcode'], input_ids, outputs)
+
+  def output(self, record):
+    '''
+    레코드 이름 -> (순번, 항목), 없으면 (-1, None)
+    '''
+    return self.output_index.get(record, (-1, None))
+
+  def to_frame(self, i, columns):
+    '''
+    i번 출력의 컬럼별 문자열 값 [[값, ...], ...] (항목 순서) -> 형식이 변환된 DataFrame
+    숫자로 읽을 수 없는 값이 있으면 항목 이름과 함께 ValueError
+    '''
+    items = self.outputs[i][1]
+    converted = {}
+    for j, (values, kind) in enumerate(zip(columns, self.kinds[i])):
+      try:
+        converted[j] = convert_column(values, kind)
+      except ValueError as e:
+        raise ValueError(f"{self.trcode} {items[j]}: {e}") from None
+    df = pd.DataFrame(converted, columns=range(len(items)))
+    df.columns = items
+    return df
+
+  def to_dict(self):
+    return {'input': list(self.input_ids), 'output': self.outputs}
+
+class TRSchemaRegistry:
+  """
+  TR 레이아웃 레지스트리: TR 코드마다 .enc를 한 번만 읽고 파싱한다.
+  - cache_path가 있으면 컴파일 결과를 JSON 파일 하나로 남기고, 다음 기동시 .enc의 수정 시간이 같으면 파싱 없이 쓴다.
+  - .enc가 갱신되면 (버전 처리) 수정 시간이 달라지므로 그 TR만 다시 파싱한다.
+  """
+  def __init__(self, cache_path=None, enc_dir=None):
+    self.cache_path = cache_path
+    self.enc_dir = enc_dir
+    self.__schemas = {} # trcode -> TRSchema
+    self.__cache = None # trcode -> {'mtime', 'input', 'output'} (cache_path 내용)
+    self.num_parsed = 0
+
+  def configure(self, cache_path=None, enc_dir=None):
+    self.cache_path = cache_path
+    self.enc_dir = enc_dir
+    self.__schemas = {}
+    self.__cache = None
+
+  def enc_path(self, trcode):
+    return os.path.join(self.enc_dir if self.enc_dir is not None else parser.DIR_PATH, f'{trcode}.enc')
+
+  def __load_cache(self):
+    if self.__cache is None:
+      self.__cache = {}
+      if self.cache_path is not None and os.path.exists(self.cache_path):
+        try:
+          with open(self.cache_path, encoding='utf-8') as f:
+            self.__cache = json.load(f)
+        except (OSError, ValueError):
+          self.__cache = {} # 깨진 캐시는 버리고 다시 만든다.
+    return self.__cache
+
+  def __save_cache(self):
+    if self.cache_path is None:
+      return
+    os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+    tmp_path = self.cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+      json.dump(self.__cache, f, ensure_ascii=False)
+    os.replace(tmp_path, self.cache_path)
+
+  def read_tr_items(self, trcode):
+    '''
+    .enc 읽기 + 파싱 (parser.read_enc / parse_dat과 같은 결과)
+    '''
+    with zipfile.ZipFile(self.enc_path(trcode)) as enc:
+      lines = enc.read(trcode.upper() + '.dat').decode('cp949')
+    return parser.parse_dat(trcode, lines)
+
+  def get(self, trcode) -> TRSchema:
+    schema = self.__schemas.get(trcode)
+    if schema is not None:
+      return schema
+
+    cache = self.__load_cache()
+    mtime = os.stat(self.enc_path(trcode)).st_mtime_ns
+    entry = cache.get(trcode)
+    if entry is not None and entry['mtime'] == mtime:
+      schema = TRSchema(trcode, entry['input'], entry['output'])
+    else:
+      schema = TRSchema.from_tr_items(self.read_tr_items(trcode))
+      self.num_parsed += 1
+      cache[trcode] = {'mtime': mtime, **schema.to_dict()}
+      self.__save_cache()
+    self.__schemas[trcode] = schema
+    return schema
@@ -0,0 +1,75 @@
+from realtime_kiwoom.data_provider import *
+import argparse
+import glob
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from miscs.config_manager import ConfigManager
+from miscs.collect_targets import code_of_csv
+
+'''
+ 수집기 CSV 덤프(data/*.csv)를 분봉 테이블로 일괄 적재 (백필)
+ - 파싱: 워커 프로세스마다 파일 하나씩, 필요한 컬럼만 명시적 dtype으로 읽고 (체결시간: str, 가격/거래량: int64) 부호는 abs()로 한 번에 제거
+ - 적재: 파싱 결과를 시간순으로 합쳐서 ingest_minute_dataframe 한 번 (sqlite: 한 트랜잭션), 이미 있는 (종목, 시간)은 건너뛰므로 겹치는 파일을 다시 돌려도 안전
+ - 같은 (종목, 시간)이 여러 파일에 있으면 명령줄에서 먼저 나온 파일의 행이 남는다.
+ - 종목코드는 파일 이름으로 정한다. (miscs.collect_targets, 예: kodex_200.csv, kodex_200_20221017.csv -> 069500)
+ - --verify: 적재 후 조회 경로 (get_history_range, 스냅샷이 설정되어 있으면 스냅샷)가 테이블과 같은지 확인
+'''
+
+csv_dtypes = {'체결시간': str, '시가': 'int64', '고가': 'int64', '저가': 'int64', '현재가': 'int64', '거래량': 'int64'}
+
+def parse_minute_csv(path, code):
+  '''
+  워커: CSV 하나 -> st_code, dt, open, high, low, close, volume
+  '''
+  raw = pd.read_csv(path, usecols=list(csv_dtypes), dtype=csv_dtypes, engine='c')
+  return MinuteChartDataProvider.convert_raw_dataframes({code: raw})
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("paths", nargs='*', help="csv files or glob patterns", default=[os.path.join('data', '*.csv')])
+  parser.add_argument("-t", "--tag", help="table type in config", default='history')
+  parser.add_argument("-w", "--workers", type=int, help="number of parser processes", default=os.cpu_count())
+  parser.add_argument("--verify", action='store_true', help="check that reads after the backfill match the table")
+  args = parser.parse_args()
+
+  files = []
+  for pattern in args.paths:
+    for path in sorted(glob.glob(pattern)) or [pattern]:
+      code = code_of_csv(path)
+      if code is None or not os.path.exists(path):
+        print(f'skipped: {path}')
+        continue
+      files.append((path, code))
+  if not files:
+    sys.exit(0)
+
+  ts_start = time.perf_counter()
+  with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(files)))) as executor:
+    frames = list(executor.map(parse_minute_csv, *zip(*files)))
+  # 시간순 병합 (안정 정렬: 같은 (종목, 시간)은 앞 파일이 먼저)
+  df = pd.concat(frames, ignore_index=True)
+  df = df.iloc[np.argsort(df['dt'].values, kind='stable')]
+  parse_seconds = time.perf_counter() - ts_start
+  print(f'parsed {len(files)} files, {len(df)} rows in {parse_seconds:.2f}s ({len(df) / parse_seconds:,.0f} rows/s)')
+
+  cm = ConfigManager('config/.config.xml')
+  provider = MinuteChartDataProvider.Factory(cm, tag=args.tag)
+  ts_start = time.perf_counter()
+  counts = provider.ingest_minute_dataframe(df)
+  ingest_seconds = time.perf_counter() - ts_start
+  for code, count in counts.items():
+    print(f"{code}: #{count['inserted']} rows inserted (#{count['skipped']} already stored)")
+  print(f'ingested {len(df)} rows in {ingest_seconds:.2f}s ({len(df) / ingest_seconds:,.0f} rows/s)')
+  if provider.coverage_index is not None and len(df) > 0:
+    provider.coverage_index.update(provider, list(counts), TimeManager.str_to_ts(df['dt'].iloc[0]), TimeManager.str_to_ts(df['dt'].iloc[-1]))
+  mismatched = []
+  if args.verify and counts:
+    ts_all = TimeManager.str_to_ts('19700101000000')
+    history = provider.get_history_range(ts_all, codes=list(counts))
+    table = provider.read_history_range(ts_all, codes=list(counts))
+    mismatched = [code for code in counts if not history[code].equals(table[code])]
+    for code in counts:
+      print(f"verify {code}: read #{len(history[code])} rows, table #{len(table[code])} rows{'' if code not in mismatched else ' (MISMATCH)'}")
+  provider.close()
+  if mismatched:
+    sys.exit(1)
@@ -0,0 +1,22 @@
+from realtime_kiwoom.data_provider import *
+import argparse
+from miscs.config_manager import ConfigManager
+
+'''
+ 분봉 롤업 테이블 ({table}_5m, _15m, _60m, _1d) 전체 다시 집계
+ - 설정의 <rollups>를 처음 켰거나, 롤업 없이 적재한 뒤에 한 번 실행 (이후에는 삽입할 때마다 영향받은 날짜의 버킷만 갱신된다)
+'''
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-t", "--tag", help="table type in config", default='history')
+  parser.add_argument("-c", "--codes", nargs='+', help="codes (default: candidate ETFs)", default=None)
+  args = parser.parse_args()
+
+  cm = ConfigManager('config/.config.xml')
+  provider = MinuteChartDataProvider.Factory(cm, tag=args.tag)
+  assert provider.rollups, f"rollups are not configured for {args.tag}"
+  ts_start = time.perf_counter()
+  counts = provider.rebuild_rollups(args.codes)
+  print(f'{provider.table_name}: {counts}, {time.perf_counter() - ts_start:.1f}s')
+  provider.close()
@@ -0,0 +1,44 @@
+from realtime_kiwoom.data_provider import *
+import argparse
+import sys
+from miscs.config_manager import ConfigManager
+
+'''
+ 분봉 테이블 커버리지 점검 (학습 전 확인용)
+ - XKRX 거래 분 격자 대비 (종목, 날짜)별 빠진 분/중복 분/격자 밖 행을 커버리지 인덱스(<coverage_path>)로 확인
+ - --update: 테이블을 다시 읽어 인덱스 갱신 (기본은 저장된 인덱스만 사용하므로 빠르다)
+ - 기준을 넘는 날이 있으면 목록을 출력하고 종료 코드 1
+ - 빈 구간 채우기: python run_collect_etf_minute_charts.py --backfill <일 수>
+'''
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-d", "--days", type=int, help="check recent n_days (today is excluded)", default=365)
+  parser.add_argument("-c", "--codes", nargs='+', help="codes (default: candidate ETFs)", default=None)
+  parser.add_argument("-u", "--update", action='store_true', help="rebuild the index from the table before checking")
+  parser.add_argument("--max_missing_ratio", type=float, help="allowed ratio of missing minutes per day", default=0.0)
+  parser.add_argument("--allow_duplicates", action='store_true', help="do not fail on duplicated minutes")
+  args = parser.parse_args()
+
+  cm = ConfigManager('config/.config.xml')
+  provider = MinuteChartDataProvider.Factory(cm, tag='history')
+  coverage = provider.coverage_index
+  assert coverage is not None, "coverage_path is not configured"
+  codes = args.codes if args.codes else [x[0] for x in cm.retrieve_candidate_ETFs()]
+  ts_today = TimeManager.ts_floor_time(TimeManager.get_now(), freq='D')
+  ts_from = TimeManager.ts_day_shift(ts_today, days=-args.days)
+
+  if args.update:
+    ts_start = time.perf_counter()
+    coverage.update(provider, codes, ts_from, ts_today)
+    print(f'index updated in {time.perf_counter() - ts_start:.2f}s')
+  report = coverage.report(codes, ts_from, ts_today)
+  print(report.groupby('st_code')[['expected', 'present', 'missing', 'duplicates', 'extra']].sum().to_string())
+
+  failed = coverage.preflight(codes, ts_from, ts_today, max_missing_ratio=args.max_missing_ratio, allow_duplicates=args.allow_duplicates)
+  provider.close()
+  if len(failed) > 0:
+    print(f'{len(failed)} (code, day) failed the check')
+    print(failed.to_string())
+    sys.exit(1)
+  print('ok')
@@ -5,25 +5,18 @@ import pickle
 from tqdm.auto import tqdm
 from realtime_kiwoom.data_provider import *
 import os
+import json
 import argparse
 from miscs.config_manager import ConfigManager
 from miscs.time_manager import TimeManager
-
-'''
- 몇가지 ETF 종목과 업종 
-'''
-
-tr_dic = {
-  'opt20005': {'001': 'kospi', '201': 'kospi200'},
-  'opt10080': {'069500':'kodex_200', '114800':'kodex_inverse', '226490':'kodex_kospi'}
-}
+from miscs.collect_targets import tr_dic
 
 def make_argument_dic(tr_code, code, is_next=False):
   '''
     tr_code에 따라 적절한 arg_dic을 만들어서 반환한다.
   '''
 
-  arg_dic = {'틱범위': "1", 'next':2 if is_next else 0}
+  arg_dic = {'틱범위': "1", 'next':2 if is_next else 0, 'priority': TRScheduler.BULK}
   if tr_code == 'opt10080':
     arg_dic.update({'종목코드': code, 'output': "주식분봉차트조회", '수정주가구분': "1"})
   elif tr_code == 'opt20005':
@@ -32,7 +25,10 @@ def make_argument_dic(tr_code, code, is_next=False):
     assert False, "Unknown tr_code"
   return arg_dic
 
-def main_job(kiwoom, tr_code, code, name, is_daily=False):
+def main_job(kiwoom, tr_code, code, name, is_daily=False, stop_before_dt=None):
+  '''
+  stop_before_dt: 'YYYYMMDDHHMMSS', 받은 페이지가 이 시간 이전까지 내려가면 더 넘기지 않는다. (빈 구간 백필)
+  '''
   dfs = []
   with tqdm(total=1 if is_daily else 106) as pbar:
     df = kiwoom.block_TR_request(tr_code,
@@ -43,8 +39,7 @@ def main_job(kiwoom, tr_code, code, name, is_daily=False):
     pbar.update(1)
 
     if not is_daily:
-      while kiwoom.tr_remained:
-        time.sleep(1)
+      while kiwoom.tr_remained and not (stop_before_dt and len(df) > 0 and df['체결시간'].min() < stop_before_dt):
         df = kiwoom.block_TR_request(tr_code,
                                   **make_argument_dic(tr_code, code, is_next=True))
         dfs.append(df)
@@ -53,10 +48,75 @@ def main_job(kiwoom, tr_code, code, name, is_daily=False):
 
   return pd.concat(dfs)
 
+def load_checkpoint(path, day_str):
+  '''
+  증분 수집 체크포인트: {'day': 'YYYYMMDD', 'codes': {code: state}}
+  다른 날의 체크포인트는 끝난 종목만 버린다. 끝나지 않은 종목은 floor (처음 시작할 때의 마지막 저장 시간)를 그대로 두어야
+  중단된 구간 (floor ~ oldest)을 건너뛰지 않는다. (새로 floor를 읽으면 이미 적재한 newest가 된다)
+  '''
+  if os.path.exists(path):
+    with open(path, encoding='utf-8') as f:
+      checkpoint = json.load(f)
+    if checkpoint.get('day') != day_str:
+      checkpoint = {'day': day_str, 'codes': {code: state for code, state in checkpoint.get('codes', {}).items() if not state['done']}}
+    return checkpoint
+  return {'day': day_str, 'codes': {}}
+
+def save_checkpoint(path, checkpoint):
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+  tmp_path = path + '.tmp'
+  with open(tmp_path, 'w', encoding='utf-8') as f:
+    json.dump(checkpoint, f, ensure_ascii=False, indent=1)
+  os.replace(tmp_path, path)
+
+def incremental_job(kiwoom, minute_data_provider, tr_code, code, name, state, on_page, csv_path=None):
+  '''
+  증분 수집: 최신 페이지부터 넘기면서 페이지마다 바로 적재하고, 저장되어 있던 마지막 시간(state['floor'])에 닿으면 멈춘다.
+  state (체크포인트): floor, oldest/newest (이번 수집에서 적재한 범위), pages (적재한 페이지 수), done
+  - 재개: 키움 연속조회는 페이지를 건너뛸 수 없으므로 앞 페이지는 다시 받지만, 페이지마다 저장되어 있지 않은 분만 적재한다.
+    (다른 날 재개하면 새 분봉이 앞에 붙어서 페이지 경계가 밀리므로 oldest/newest 범위만으로는 건너뛸 페이지를 정할 수 없다.)
+  - csv_path에는 적재한 행만 추가한다. (다시 받은 페이지, floor 이전 분이 중복되지 않음)
+  on_page(state): 페이지 적재 후 호출 (체크포인트 저장)
+  반환: {'inserted': n, 'skipped': m}
+  '''
+  counts = {'inserted': 0, 'skipped': 0}
+  is_next = False
+  with tqdm(desc=f'{code}/{name}') as pbar:
+    while True:
+      df = kiwoom.block_TR_request(tr_code, **make_argument_dic(tr_code, code, is_next=is_next))
+      is_next = True
+      pbar.update(1)
+      if len(df) == 0:
+        break
+      page_min, page_max = df['체결시간'].min(), df['체결시간'].max()
+      stored = minute_data_provider.read_history_range(TimeManager.str_to_ts(page_min), TimeManager.str_to_ts(page_max) + pd.Timedelta(minutes=1), codes=[code])[code]
+      new_df = df[~df['체결시간'].isin(stored.index.strftime('%Y%m%d%H%M%S'))].drop_duplicates('체결시간')
+      counts['skipped'] += len(df) - len(new_df)
+      if len(new_df) > 0:
+        count = minute_data_provider.ingest_raw_dataframes({code: new_df})[code]
+        counts['inserted'] += count['inserted']
+        counts['skipped'] += count['skipped']
+        if csv_path is not None:
+          new_df.to_csv(csv_path, mode='a', header=not os.path.exists(csv_path), index=False)
+        new_min, new_max = new_df['체결시간'].min(), new_df['체결시간'].max()
+        state['oldest'] = new_min if state['oldest'] is None else min(state['oldest'], new_min)
+        state['newest'] = new_max if state['newest'] is None else max(state['newest'], new_max)
+        state['pages'] += 1
+        on_page(state)
+      if not kiwoom.tr_remained or page_min <= state['floor']:
+        break
+  state['done'] = True
+  on_page(state)
+  return counts
+
 if __name__ == "__main__":
   parser = argparse.ArgumentParser()
-  parser.add_argument("-d", "--daily", help="하루치의 데이터만 수집", action="store_true")
+  mode = parser.add_mutually_exclusive_group()
+  mode.add_argument("-d", "--daily", help="하루치의 데이터만 수집", action="store_true")
   parser.add_argument("-n", "--daysago", type=int, help="number of days ago", default=0)
+  mode.add_argument("-b", "--backfill", type=int, help="커버리지 인덱스에서 최근 n일 중 빈 구간이 있는 종목만, 가장 오래된 빈 구간까지만 수집", default=0)
+  mode.add_argument("-i", "--incremental", help="종목별 마지막 저장 시간까지만 수집 (페이지마다 적재, 중단되면 체크포인트에서 재개)", action="store_true")
+  parser.add_argument("--checkpoint", help="checkpoint file of the incremental mode", default=os.path.join('db', 'collect_checkpoint.json'))
   args = parser.parse_args()
 
   cm = ConfigManager('config/.config.xml')
@@ -70,25 +130,63 @@ if __name__ == "__main__":
     ts = TimeManager.ts_day_shift(TimeManager.get_now(), days=-args.daysago, floor=True)
     day_str = TimeManager.ts_to_str(ts, format="%Y%m%d")
     from_dt_str = TimeManager.ts_to_str(ts, format="%Y%m%d090000")
+  elif args.incremental:
+    day_str = TimeManager.ts_to_str(TimeManager.get_now(), format="%Y%m%d")
+    checkpoint = load_checkpoint(args.checkpoint, day_str)
 
   minute_data_provider = MinuteChartDataProvider.Factory(cm, tag='history')
+  coverage = minute_data_provider.coverage_index
+  if args.backfill:
+    assert coverage is not None, "coverage_path is not configured"
+    ts_backfill = TimeManager.ts_day_shift(TimeManager.get_now(), days=-args.backfill, floor=True)
+    all_codes = [code for dic in tr_dic.values() for code in dic]
+    coverage.update(minute_data_provider, all_codes, ts_backfill)
+    gaps = coverage.missing_ranges(all_codes, ts_backfill, TimeManager.ts_floor_time(TimeManager.get_now(), freq='D'))
+    backfill_from = {code: TimeManager.ts_to_str(ts, '%Y%m%d%H%M%S') for code, ts in gaps.groupby('st_code')['ts_from'].min().items()}
 
   kiwoom = RTKiwoom()
+  kiwoom.configure(cm)
   
   if args.daily:
     kiwoom.get_logger().info(f"Run with daily={args.daily}, daysago={args.daysago}")
     kiwoom.get_logger().info(f"Run with from_dt_str={from_dt_str}, day_str={day_str}")
+  elif args.backfill:
+    kiwoom.get_logger().info(f"Run as a backfill collector: {len(gaps)} gaps in {args.backfill} days, oldest per code={backfill_from}")
+  elif args.incremental:
+    kiwoom.get_logger().info(f"Run as an incremental collector: checkpoint={args.checkpoint}, resumed={ {code: state['pages'] for code, state in checkpoint['codes'].items()} }")
   else:
     kiwoom.get_logger().info(f"Run as a long-range collector")
 
   kiwoom.ComConnect(block=True)
   for tr_code, dic in tr_dic.items():
     for code, name in dic.items():
-      df = main_job(kiwoom, tr_code, code, name, is_daily=args.daily)
+      if args.backfill and code not in backfill_from:
+        continue
+      if args.incremental:
+        if code not in checkpoint['codes']:
+          checkpoint['codes'][code] = {
+            'floor': TimeManager.ts_to_str(minute_data_provider.get_ts_last_inserted(code), '%Y%m%d%H%M%S'),
+            'oldest': None, 'newest': None, 'pages': 0, 'done': False,
+          }
+        state = checkpoint['codes'][code]
+        if state['done']:
+          continue
+        counts = incremental_job(kiwoom, minute_data_provider, tr_code, code, name, state,
+          on_page=lambda _: save_checkpoint(args.checkpoint, checkpoint), csv_path=f'data/{name}_{day_str}.csv')
+        kiwoom.get_logger().info(f"{name} updated after {state['floor']} with #{counts['inserted']} rows (#{counts['skipped']} already stored, #{state['pages']} pages)")
+        if coverage is not None and state['oldest'] is not None:
+          coverage.update(minute_data_provider, [code], TimeManager.str_to_ts(state['oldest']), TimeManager.str_to_ts(state['newest']))
+        continue
+      df = main_job(kiwoom, tr_code, code, name, is_daily=args.daily, stop_before_dt=backfill_from[code] if args.backfill else None)
 
       if args.daily:
         df = df[df['체결시간'] >= from_dt_str]
         name = f'{name}_{day_str}'
       df.to_csv(f'data/{name}.csv', index=False)
-      num_inserted = minute_data_provider.insert_raw_dataframe_data(df, code)
-      kiwoom.get_logger().info(f'{name} saved (or updated) with #{num_inserted} rows')
+      counts = minute_data_provider.ingest_raw_dataframes({code: df})[code]
+      kiwoom.get_logger().info(f"{name} saved (or updated) with #{counts['inserted']} rows (#{counts['skipped']} already stored)")
+      if coverage is not None and len(df) > 0:
+        coverage.update(minute_data_provider, [code], TimeManager.str_to_ts(df['체결시간'].min()), TimeManager.str_to_ts(df['체결시간'].max()))
+  if args.incremental and os.path.exists(args.checkpoint):
+    os.remove(args.checkpoint)
+  kiwoom.get_logger().info(kiwoom.tr_scheduler.format_summary())
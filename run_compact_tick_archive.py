@@ -0,0 +1,30 @@
+from realtime_kiwoom.tick_journal import TickJournal
+from realtime_kiwoom.tick_archive import TickArchive
+import argparse
+import os
+from miscs.config_manager import ConfigManager
+from miscs.time_manager import TimeManager
+
+'''
+ 틱 저널 -> 일자/종목별 컬럼형 틱 아카이브 (장 마감 후 에이전트가 자동 수행하며, 누락된 날짜를 수동으로 다시 만들 때 사용)
+'''
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-d", "--dates", nargs='*', help="YYYYMMDD (생략시 저널이 있는 모든 날짜)", default=None)
+  args = parser.parse_args()
+
+  cm = ConfigManager('config/.config.xml')
+  realtime_info = cm.get_realtime_info()
+  journal_dir = realtime_info['tick_journal_path']
+  tick_archive = TickArchive.Factory(cm)
+  assert journal_dir and tick_archive, 'tick_journal_path, tick_archive_path를 설정해야 합니다.'
+
+  dates = args.dates
+  if not dates:
+    dates = sorted(fname[len('ticks_'):-len('.journal')] for fname in os.listdir(journal_dir) if fname.startswith('ticks_') and fname.endswith('.journal'))
+
+  for yyyymmdd in dates:
+    ticks = TickJournal.load(TickJournal.journal_file_path(journal_dir, yyyymmdd))
+    num_written = tick_archive.write_day(yyyymmdd, ticks)
+    print(f'{yyyymmdd}: {len(ticks)} ticks -> {num_written}')
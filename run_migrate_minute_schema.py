@@ -0,0 +1,34 @@
+from realtime_kiwoom.data_provider import *
+import argparse
+from miscs.config_manager import ConfigManager
+
+'''
+ 분봉 테이블 스키마 변환 (제자리)
+ - v1: st_code TEXT, dt TEXT(YYYYMMDDHHMMSS) + (st_code, dt) 보조 인덱스
+ - v2: st_id INTEGER(instruments), dt INTEGER(UTC epoch 분), PRIMARY KEY(st_id, dt) WITHOUT ROWID
+ 변환 후에는 설정 파일의 <schema>도 맞춰 두어야 today 테이블처럼 매번 새로 만드는 테이블이 같은 스키마로 생성된다.
+ (st_code, dt)가 중복된 예전 v1 테이블은 여기서만 정리한다. (먼저 들어간 행만 남김, --to v1이면 정리만)
+ 테이블을 여는 것만으로는 행을 지우지 않으며, 중복이 남아 있는 v1 테이블에는 적재할 수 없다.
+'''
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("-t", "--tags", nargs='+', help="table types in config (history, today)", default=['history', 'today'])
+  parser.add_argument("--to", help="target schema version", choices=['v1', 'v2'], default='v2')
+  parser.add_argument("--no_vacuum", action='store_true', help="skip VACUUM after migration")
+  args = parser.parse_args()
+
+  cm = ConfigManager('config/.config.xml')
+  table_info = cm.get_tables()
+  for tag in args.tags:
+    # drop_table 설정과 무관하게 기존 데이터를 보존해야 하므로 직접 생성
+    provider = MinuteChartDataProvider(
+      cm,
+      db_path=os.path.join(cm.get_work_path(), cm.get_database()['database']),
+      table_name=table_info[tag]['table_name'],
+      drop_table=False,
+    )
+    from_version = provider.schema_version
+    ts_start = time.perf_counter()
+    num_before, num_after = provider.migrate_schema(args.to, vacuum=not args.no_vacuum)
+    print(f'{tag}({provider.table_name}): {from_version} -> {args.to}, rows {num_before} -> {num_after} (#{num_before - num_after} duplicated rows removed), {time.perf_counter() - ts_start:.1f}s')